@@ -0,0 +1,262 @@
+from collections import namedtuple
+
+from fsm import FSM, State, Transition
+
+# One finding of the validator: kind, state name and a human-readable detail.
+Issue = namedtuple("Issue", ["kind", "state", "detail"])
+
+
+def _graph(fsm):
+    """States of the (flattened) FSM and the successor ids of each state"""
+    if fsm.has_composites():
+        fsm = fsm.flatten()
+    states = fsm.state_list()
+    index = {id(state): i for i, state in enumerate(states)}
+    successors = [[index[id(t.target_state)] for t in state.transitions] for state in states]
+    return states, successors
+
+
+def _closure(start, edges):
+    """Ids reachable from the start ids following edges"""
+    seen = set(start)
+    stack = list(start)
+    while stack:
+        for j in edges[stack.pop()]:
+            if j not in seen:
+                seen.add(j)
+                stack.append(j)
+    return seen
+
+
+def reachable_states(fsm):
+    """
+    Return the states that can be entered from the initial state.
+
+    Dynamic conditions are assumed satisfiable, so every transition counts.
+
+    Args:
+        fsm (FSM): FSM to analyse (composites are flattened)
+
+    Returns:
+        list: Reachable states, in FSM.state_list order
+    """
+    states, successors = _graph(fsm)
+    reached = _closure([0], successors)
+    return [state for i, state in enumerate(states) if i in reached]
+
+
+class ValidationReport:
+    def __init__(self, state_names, reachable, issues):
+        """
+        Findings of validate().
+
+        Args:
+            state_names (list): Names of every state, in FSM.state_list order
+            reachable (set): Names of the states reachable from the initial state
+            issues (list): Issue tuples
+        """
+        self.state_names = state_names
+        self.reachable = reachable
+        self.issues = issues
+
+    @property
+    def ok(self):
+        """True if no issue was found"""
+        return not self.issues
+
+    def by_kind(self, kind):
+        """Issues of one kind (e.g. "shadowed")"""
+        return [issue for issue in self.issues if issue.kind == kind]
+
+    def as_dict(self):
+        """Plain-Python summary of the report"""
+        return {
+            "states": len(self.state_names),
+            "reachable": len(self.reachable),
+            "issues": [issue._asdict() for issue in self.issues],
+        }
+
+    def __str__(self):
+        lines = [f"{len(self.reachable)}/{len(self.state_names)} states reachable, {len(self.issues)} issue(s)"]
+        lines += [f"  [{issue.kind}] {issue.state}: {issue.detail}" for issue in self.issues]
+        return "\n".join(lines)
+
+
+def _transition_issues(state):
+    """Duplicate, shadowed and probability findings for the transitions of one state"""
+    issues = []
+    first = {}
+    unreachable = set()
+    for position, transition in enumerate(state.transitions):
+        target = transition.target_state.name
+        p = transition.probability
+        if not 0.0 <= p <= 1.0:
+            issues.append(Issue("probability", state.name,
+                                f"transition to {target} has probability {p} outside [0, 1]"))
+
+        event = transition.event
+        if event is None:
+            continue
+        # A guard in between cannot help: the earlier literal always matches first
+        if event in first:
+            earlier = first[event]
+            kind = "duplicate" if earlier.target_state is transition.target_state else "shadowed"
+            issues.append(Issue(kind, state.name,
+                                f"transition {position} on {event} to {target} is never taken, "
+                                f"{earlier.target_state.name} wins"))
+            unreachable.add(id(transition))
+        first.setdefault(event, transition)
+
+    # Only transitions accepting the same event compete for the probability mass
+    for event in first:
+        outcomes = {id(t) for t, _ in state.outcomes(event)}
+        for transition in state.transitions:
+            if (transition.event == event and transition.probability > 0
+                    and id(transition) not in outcomes and id(transition) not in unreachable):
+                issues.append(Issue("probability", state.name,
+                                    f"transition on {event} to {transition.target_state.name} gets no "
+                                    "probability mass in State.outcomes(event): an earlier transition "
+                                    "accepting it always succeeds"))
+    return issues
+
+
+def validate(fsm):
+    """
+    Check an FSM for structural and probabilistic mistakes.
+
+    Reported issue kinds:
+        unreachable: registered state that cannot be entered from the initial state
+        dead_end: reachable non-final state without outgoing transitions
+        trap: reachable non-final state from which no final state can be reached
+        duplicate: literal transition repeating an earlier one of the same event and target
+        shadowed: literal transition on an event already taken by an earlier
+            transition to another target (first match wins in process_event)
+        probability: probability outside [0, 1], or a literal transition that
+            receives no mass under the probabilistic model for its event
+            (State.outcomes(event)), e.g. behind a dynamic guard that always succeeds
+
+    Args:
+        fsm (FSM): FSM to check (composites are flattened)
+
+    Returns:
+        ValidationReport: Reachable states and issues found
+    """
+    states, successors = _graph(fsm)
+    reached = _closure([0], successors)
+    predecessors = [[] for _ in states]
+    for i, targets in enumerate(successors):
+        for j in targets:
+            predecessors[j].append(i)
+    live = _closure([i for i, state in enumerate(states) if state.is_final], predecessors)
+
+    issues = []
+    for i, state in enumerate(states):
+        if i not in reached:
+            issues.append(Issue("unreachable", state.name, "cannot be entered from the initial state"))
+            continue
+        if not state.is_final:
+            if not state.transitions:
+                issues.append(Issue("dead_end", state.name, "non-final state without transitions"))
+            elif i not in live:
+                issues.append(Issue("trap", state.name, "no final state can be reached from here"))
+        issues += _transition_issues(state)
+
+    return ValidationReport([state.name for state in states],
+                            {states[i].name for i in reached}, issues)
+
+
+def _signature(state):
+    """Everything two equivalent states must share, apart from their targets"""
+    return (state.is_final, state.is_success, state.action, state.timeout, state.timeout_event,
+            tuple((t.event, t.probability, t.priority) for t in state.transitions))
+
+
+def minimize(fsm):
+    """
+    Merge equivalent states of an FSM with literal-event conditions.
+
+    Two states are equivalent when they have the same flags, action,
+    timeout and ordered list of (event, probability, priority) transitions
+    and their transitions lead to equivalent states, so the minimized FSM
+    behaves the same both in process_event and under the probabilistic
+    model. Unreachable states are dropped. Equivalence classes are computed
+    with Hopcroft's partition refinement, where the k-th transition of a
+    state is the symbol k.
+
+    Args:
+        fsm (FSM): FSM to minimize (composites are flattened, the FSM is left unchanged)
+
+    Returns:
+        FSM: New FSM with one state per equivalence class, named after the
+            first state of the class in FSM.state_list order
+
+    Raises:
+        ValueError: If a transition has a dynamic condition
+    """
+    states, successors = _graph(fsm)
+    for state in states:
+        for transition in state.transitions:
+            if transition.event is None:
+                raise ValueError(f"Transition {state.name} -> {transition.target_state.name} has a "
+                                 "dynamic condition; only literal-event FSMs can be minimized")
+
+    reached = sorted(_closure([0], successors))
+    # Initial partition: states sharing a signature (hence the same symbols)
+    blocks = {}
+    for i in reached:
+        blocks.setdefault(_signature(states[i]), []).append(i)
+    partition = [set(block) for block in blocks.values()]
+    block_of = {}
+    for b, block in enumerate(partition):
+        for i in block:
+            block_of[i] = b
+
+    # inverse[k][j]: states whose k-th transition leads to j
+    inverse = {}
+    for i in reached:
+        for k, j in enumerate(successors[i]):
+            inverse.setdefault(k, {}).setdefault(j, []).append(i)
+
+    symbols = list(inverse)
+    waiting = [(b, k) for b in range(len(partition)) for k in symbols]
+    while waiting:
+        splitter, k = waiting.pop()
+        touched = {}
+        for j in partition[splitter]:
+            for i in inverse[k].get(j, ()):
+                touched.setdefault(block_of[i], set()).add(i)
+        for b, inside in touched.items():
+            block = partition[b]
+            if len(inside) == len(block):
+                continue
+            outside = block - inside
+            smaller, larger = (inside, outside) if len(inside) <= len(outside) else (outside, inside)
+            partition[b] = larger
+            partition.append(smaller)
+            new = len(partition) - 1
+            for i in smaller:
+                block_of[i] = new
+            # (b, symbol) still pending now covers the larger half; either way
+            # adding the smaller half is enough
+            waiting += [(new, symbol) for symbol in symbols]
+
+    # Build one state per class, represented by its first member
+    representative = {}
+    for i in reached:
+        representative.setdefault(block_of[i], i)
+    merged = {}
+    for b, i in sorted(representative.items(), key=lambda item: item[1]):
+        source = states[i]
+        merged[b] = State(source.name, source.action, is_final=source.is_final,
+                          is_success=source.is_success, timeout=source.timeout,
+                          timeout_event=source.timeout_event)
+    for b, i in representative.items():
+        for transition, j in zip(states[i].transitions, successors[i]):
+            merged[b].add_transition(Transition(merged[block_of[j]], transition.event,
+                                                probability=transition.probability,
+                                                priority=transition.priority))
+
+    result = FSM(merged[block_of[0]], *fsm.history_mode, stochastic=fsm.stochastic)
+    for b, i in sorted(representative.items(), key=lambda item: item[1]):
+        result.add_state(merged[b])
+    return result.compile() if fsm.compiled else result
@@ -0,0 +1,155 @@
+import asyncio
+import inspect
+from time import perf_counter
+
+from events import EVENTS, normalize
+
+# Sentinel that stops a runner when put in its queue.
+STOP = object()
+
+# Returned by AsyncFSMRunner._next_event when the state deadline expires.
+_TIMEOUT = object()
+
+
+class AsyncFSMRunner:
+    def __init__(self, fsm, queue=None, stop_on_final=True):
+        """
+        Drive an FSM from an asyncio.Queue of events.
+
+        State actions may be plain functions or coroutine functions; awaitable
+        results are awaited before the transition is taken. A state with a
+        timeout receives its timeout_event if no transition has left it after
+        `timeout` seconds, measured from the moment it was entered or, when
+        the timeout event keeps the FSM in the state (unmatched, or a
+        self-loop retrying the state), from the last timeout. Events already
+        queued when the timeout expires are processed first.
+
+        Args:
+            fsm (FSM): FSM to run
+            queue (asyncio.Queue, optional): Event queue, a new one by default
+            stop_on_final (bool): Return from run() once a final state is reached
+        """
+        self.fsm = fsm
+        self.queue = queue if queue is not None else asyncio.Queue()
+        self.stop_on_final = stop_on_final
+
+    def post(self, event):
+        """Queue an event without waiting"""
+        self.queue.put_nowait(event)
+
+    async def send(self, event):
+        """Queue an event, waiting if the queue is full"""
+        await self.queue.put(event)
+
+    async def process_event(self, event):
+        """
+        Asynchronous counterpart of FSM.process_event, notifying the FSM's
+        observers the same way (on_action covers the awaited part of the action).
+
+        Args:
+            event (str): Event to process
+
+        Returns:
+            bool: True if the FSM has reached a final state, False otherwise
+        """
+        if event.__class__ is not str and event.__class__ is not int:
+            event = normalize(event)
+        fsm = self.fsm
+        if not fsm._flat:
+            fsm._ensure_flat()
+        state = fsm.current_state
+        fsm.history.append(state.name)
+
+        observed = bool(fsm.observers)
+        if state.action and fsm.run_actions:
+            name = EVENTS.names[event] if event.__class__ is int else event
+            start = perf_counter() if observed else 0.0
+            result = state.action(name)
+            if inspect.isawaitable(result):
+                await result
+            if observed:
+                fsm._notify_action(state, name, perf_counter() - start)
+
+        if observed:
+            return fsm._advance_observed(state, event)
+        return fsm._advance(state, event)
+
+    async def _next_event(self, deadline):
+        if deadline is None or not self.queue.empty():
+            return await self.queue.get()
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            return _TIMEOUT
+        try:
+            return await asyncio.wait_for(self.queue.get(), remaining)
+        except asyncio.TimeoutError:
+            return _TIMEOUT
+
+    async def run(self):
+        """
+        Consume events until a final state is reached or STOP is received.
+
+        Returns:
+            State: State of the FSM when the runner stopped
+        """
+        loop = asyncio.get_running_loop()
+        state = None
+        deadline = None
+        timed_out = False
+        while True:
+            if self.fsm.current_state is not state or timed_out:
+                state = self.fsm.current_state
+                deadline = None if state.timeout is None else loop.time() + state.timeout
+
+            event = await self._next_event(deadline)
+            if event is STOP:
+                break
+            timed_out = event is _TIMEOUT
+            if timed_out:
+                event = state.timeout_event
+            if await self.process_event(event) and self.stop_on_final:
+                break
+        return self.fsm.current_state
+
+
+class AsyncRuntime:
+    def __init__(self):
+        """Set of FSM runners, one per robot, sharing an event loop."""
+        self.runners = {}
+
+    def add(self, robot_id, fsm, **kwargs):
+        """
+        Register the FSM of a robot.
+
+        Returns:
+            AsyncFSMRunner: Runner created for the robot
+        """
+        runner = AsyncFSMRunner(fsm, **kwargs)
+        self.runners[robot_id] = runner
+        return runner
+
+    def post(self, robot_id, event):
+        """Route an event to the queue of a robot"""
+        self.runners[robot_id].post(event)
+
+    def post_many(self, events):
+        """Route a batch of (robot_id, event) pairs, e.g. one vision frame"""
+        runners = self.runners
+        for robot_id, event in events:
+            runners[robot_id].post(event)
+
+    def stop(self):
+        """Ask every runner to stop once its queued events are processed"""
+        for runner in self.runners.values():
+            runner.post(STOP)
+
+    async def run(self):
+        """
+        Run every registered FSM concurrently.
+
+        Returns:
+            dict: Final state of each robot's FSM
+        """
+        robot_ids = list(self.runners)
+        states = await asyncio.gather(*(self.runners[r].run() for r in robot_ids))
+        return dict(zip(robot_ids, states))
@@ -0,0 +1,467 @@
+"""
+Benchmark suite for the FSM hot paths.
+
+Usage:
+    python benchmarks.py                    # run every benchmark
+    python benchmarks.py -k dispatch        # only benchmarks whose name contains "dispatch"
+    python benchmarks.py --save-baseline    # store results in benchmarks_baseline.json
+    python benchmarks.py --compare          # fail if a benchmark regressed against the baseline
+"""
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import main
+import render
+from events import EVENTS
+from fleet import Fleet
+from fsm import FSM, State, Transition
+from instruction_parser import _parse_cached, parse_instruction
+from metrics import MetricsCollector
+from threaded import FSMInbox, LockedFSM
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+
+# A benchmark regresses when its per-operation time in the fastest run grows by more than this factor.
+REGRESSION_FACTOR = 1.25
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark; the function returns (run, operations per run).
+
+    run() performs the operations. If it accepts a `record` argument, it is
+    also called once with a function receiving the duration of each
+    operation (see _timed), for the latency percentiles.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _timed(function, record, operations=1):
+    """
+    Wrap function so the duration of each call, divided by `operations`, is
+    passed to record; return it unchanged when record is None.
+    """
+    if record is None:
+        return function
+
+    def timed(*args):
+        start = time.perf_counter()
+        result = function(*args)
+        record((time.perf_counter() - start) / operations)
+        return result
+    return timed
+
+
+def make_synthetic_fsm(n_states=1000, fanout=8, dynamic=False, seed=0):
+    """
+    Build a large random FSM for benchmarking.
+
+    Every state gets `fanout` outgoing transitions on events E0..E{fanout-1}
+    towards random states, including a success and a failure final state.
+
+    Args:
+        n_states (int): Number of non-final states
+        fanout (int): Transitions per state
+        dynamic (bool): Use opaque callables instead of literal events
+        seed (int): Seed of the random graph
+
+    Returns:
+        FSM: The generated FSM
+    """
+    rng = random.Random(seed)
+    states = [State(f"S{i}") for i in range(n_states)]
+    success = State("SUCCESS", is_final=True, is_success=True)
+    failure = State("FAILURE", is_final=True)
+    targets = states + [success, failure]
+    for state in states:
+        for k in range(fanout):
+            event = f"E{k}"
+            target = rng.choice(targets)
+            condition = (lambda e, expected=event: e == expected) if dynamic else event
+            state.add_transition(Transition(target, condition, probability=rng.uniform(0.5, 1.0)))
+    fsm = FSM(states[0], history="off")
+    for state in targets[1:]:
+        fsm.add_state(state)
+    return fsm
+
+
+def make_event_stream(length, fanout=8, seed=1):
+    """Random stream of events E0..E{fanout-1} plus some unmatched noise"""
+    rng = random.Random(seed)
+    events = [f"E{k}" for k in range(fanout)] + ["NOISE"]
+    return [rng.choice(events) for _ in range(length)]
+
+
+INSTRUCTION_CORPUS = [
+    "Pass the ball to R2", "pass to r7 quickly", "Shoot the ball into the goal", "Block R3",
+    "block r11 on the left", "Intercept the ball", "go for goal", "pass the ball to R12",
+    "dance on the field", "intercept the long pass",
+]
+
+
+def _run_stream(fsm, events):
+    def run(record=None):
+        process = _timed(fsm.process_event, record)
+        fsm.reset()
+        for event in events:
+            if process(event):
+                fsm.reset()
+    return run
+
+
+@benchmark("dispatch_linear")
+def bench_dispatch_linear():
+    fsm = make_synthetic_fsm()
+    events = make_event_stream(20000)
+    return _run_stream(fsm, events), len(events)
+
+
+@benchmark("dispatch_compiled")
+def bench_dispatch_compiled():
+    fsm = make_synthetic_fsm().compile()
+    events = make_event_stream(20000)
+    return _run_stream(fsm, events), len(events)
+
+
+@benchmark("dispatch_compiled_codes")
+def bench_dispatch_compiled_codes():
+    fsm = make_synthetic_fsm().compile()
+    events = list(EVENTS.encode(make_event_stream(20000)))
+    return _run_stream(fsm, events), len(events)
+
+
+@benchmark("dispatch_compiled_dynamic")
+def bench_dispatch_compiled_dynamic():
+    fsm = make_synthetic_fsm(dynamic=True).compile()
+    events = make_event_stream(20000)
+    return _run_stream(fsm, events), len(events)
+
+
+@benchmark("dispatch_compiled_metrics")
+def bench_dispatch_compiled_metrics():
+    fsm = make_synthetic_fsm().compile()
+    fsm.add_observer(MetricsCollector())
+    events = make_event_stream(20000)
+    return _run_stream(fsm, events), len(events)
+
+
+@benchmark("fleet_dispatch_1000_robots")
+def bench_fleet_dispatch():
+    fleet = Fleet(make_synthetic_fsm(), [f"R{i}" for i in range(1000)], run_actions=False)
+    stream = make_event_stream(20, seed=2)
+    ticks = [[(robot_id, event) for robot_id in fleet.robot_ids] for event in stream]
+
+    def run(record=None):
+        dispatch = _timed(fleet.dispatch, record, len(fleet))
+        fleet.reset()
+        for tick in ticks:
+            dispatch(tick)
+    return run, sum(len(tick) for tick in ticks)
+
+
+@benchmark("fleet_fork_and_branch_1000_robots")
+def bench_fleet_fork():
+    fleet = Fleet(make_synthetic_fsm(), [f"R{i}" for i in range(1000)], run_actions=False)
+    stream = make_event_stream(5, seed=3)
+    fleet.dispatch([(robot_id, event) for event in stream for robot_id in fleet.robot_ids])
+    branch = [("R0", event) for event in make_event_stream(3, seed=4)]
+
+    def branch_once():
+        fleet.fork().dispatch(branch)
+
+    def run(record=None):
+        step = _timed(branch_once, record)
+        for _ in range(100):
+            step()
+    return run, 100
+
+
+@benchmark("build_main_fsms")
+def bench_build():
+    builders = [main.create_simple_pass_fsm, main.create_shoot_fsm,
+                main.create_block_fsm, main.create_intercept_fsm]
+
+    def run(record=None):
+        timed = [_timed(builder, record) for builder in builders]
+        for _ in range(100):
+            for builder in timed:
+                builder()
+    return run, 100 * len(builders)
+
+
+@benchmark("fsm_from_instruction_cached")
+def bench_from_instruction():
+    corpus = INSTRUCTION_CORPUS * 100
+
+    def run(record=None):
+        create = _timed(main.create_fsm_from_instruction, record)
+        for instruction in corpus:
+            create(instruction)
+    return run, len(corpus)
+
+
+@benchmark("parse_instruction_cold")
+def bench_parse_cold():
+    corpus = INSTRUCTION_CORPUS * 100
+
+    def run(record=None):
+        parse = _timed(parse_instruction, record)
+        for instruction in corpus:
+            _parse_cached.cache_clear()
+            parse(instruction)
+    return run, len(corpus)
+
+
+@benchmark("parse_instruction_warm")
+def bench_parse_warm():
+    corpus = INSTRUCTION_CORPUS * 100
+
+    def run(record=None):
+        parse = _timed(parse_instruction, record)
+        for instruction in corpus:
+            parse(instruction)
+    return run, len(corpus)
+
+
+@benchmark("export_fsm_to_text")
+def bench_export():
+    fsm = make_synthetic_fsm(n_states=500)
+    path = os.path.join(tempfile.gettempdir(), "fsm_benchmark_export.txt")
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.export_fsm_to_text(fsm, path)
+    return run, 1
+
+
+@benchmark("render_500_states")
+def bench_render():
+    fsm = make_synthetic_fsm(n_states=500)
+
+    def run(record=None):
+        draw = _timed(render.render, record)
+        for fmt in render.RENDERERS:
+            draw(fsm, fmt)
+    return run, len(render.RENDERERS)
+
+
+@benchmark("interception_16_robots_4_balls")
+def bench_interception():
+    import numpy as np
+
+    import kinematics
+
+    rng = np.random.default_rng(0)
+    robots = rng.uniform(-4, 4, (16, 2))
+    balls = rng.uniform(-4, 4, (4, 2))
+    velocities = rng.uniform(-5, 5, (4, 2))
+
+    def run(record=None):
+        compute = _timed(kinematics.interceptions, record)
+        for _ in range(20):
+            compute(robots, balls, velocities)
+    return run, 20
+
+
+@benchmark("world_model_22_robots")
+def bench_world_model():
+    import math
+
+    from world_model import WorldModel
+
+    rng = random.Random(0)
+    robots = {f"R{i}": (rng.uniform(-6, 6), rng.uniform(-4.5, 4.5), 0.0) for i in range(22)}
+    frames = []
+    for f in range(1000):
+        robot = f"R{rng.randrange(22)}"
+        x, y, heading = robots[robot]
+        robots[robot] = (x + 0.01, y, heading)
+        frames.append((f / 60, (3 * math.sin(f / 100), 2 * math.cos(f / 100)), dict(robots)))
+
+    def run(record=None):
+        model = WorldModel()
+        update = _timed(model.update, record)
+        for time, ball, poses in frames:
+            update(time, ball, poses)
+    return run, len(frames)
+
+
+def _stress_threads(target, n_threads):
+    threads = [threading.Thread(target=target, args=(k,)) for k in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@benchmark("threaded_inbox_4_producers")
+def bench_threaded_inbox():
+    """Throughput of an inbox fed by concurrent producers (correctness: tests/test_threaded.py)"""
+    n_producers, per_producer = 4, 5000
+
+    def run():
+        state = State("RECORD", lambda e: None)
+        state.add_transition(Transition(state, "NEVER"))
+        inbox = FSMInbox(FSM(state, history="off").compile()).start()
+
+        def produce(k):
+            for seq in range(0, per_producer, 10):
+                inbox.post((k, seq))
+                inbox.post_many([(k, seq + j) for j in range(1, 10)])
+        _stress_threads(produce, n_producers)
+        inbox.stop()
+    return run, n_producers * per_producer
+
+
+@benchmark("threaded_locked_4_threads")
+def bench_threaded_locked():
+    """Throughput of concurrent process_event calls through LockedFSM (correctness: tests/test_threaded.py)"""
+    n_threads, per_thread = 4, 5000
+
+    def run():
+        ping, pong = State("PING"), State("PONG")
+        ping.add_transition(Transition(pong, "T"))
+        pong.add_transition(Transition(ping, "T"))
+        fsm = FSM(ping, history="off").compile()
+        fsm.add_state(pong)
+        locked = LockedFSM(fsm)
+
+        def worker(k):
+            for _ in range(per_thread // 2):
+                locked.process_event("T")
+                locked.process_events(["T"])
+        _stress_threads(worker, n_threads)
+    return run, n_threads * per_thread
+
+
+def _percentile(ordered, q):
+    """q-th percentile (0-100) of sorted values, by linear interpolation"""
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def run_benchmark(name, repeat=7):
+    """
+    Run one benchmark.
+
+    Throughput and the mean per-operation time come from `repeat` timed runs
+    (median run, and fastest run for regression checks, which is the least
+    sensitive to machine noise).
+    Latency percentiles are computed from the duration of each operation,
+    measured in one extra run when the benchmark records them (the timer
+    adds a few tens of nanoseconds per operation); benchmarks with a single
+    operation per run use the run times instead, and the others report no
+    percentiles (None).
+
+    Returns:
+        dict: throughput (ops/s), mean per-operation time of the median and
+            fastest runs (us), per-operation
+            latency percentiles (us) and peak traced memory (KiB) of one run
+    """
+    run, operations = BENCHMARKS[name]()
+    run()  # warm-up
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) / operations)
+
+    latencies = []
+    if "record" in inspect.signature(run).parameters:
+        run(record=latencies.append)
+    elif operations == 1:
+        latencies = timings
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean = statistics.median(timings)
+    result = {"ops_per_sec": 1.0 / mean, "mean_us": mean * 1e6, "best_us": min(timings) * 1e6}
+    latencies.sort()
+    for q in (50, 95, 99):
+        result[f"p{q}_us"] = _percentile(latencies, q) * 1e6 if latencies else None
+    result["peak_kib"] = peak / 1024
+    return result
+
+
+def compare(results, baseline):
+    """Return the names of the benchmarks slower than the baseline by REGRESSION_FACTOR"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and result["best_us"] > reference["best_us"] * REGRESSION_FACTOR:
+            regressions.append(name)
+    return regressions
+
+
+def _format_us(value):
+    return f"{'-':>9}  " if value is None else f"{value:9.3f}us"
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="FSM benchmark suite")
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks containing this text")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per benchmark")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE_FILE}")
+    parser.add_argument("--compare", action="store_true", help="exit with status 1 on regressions")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in BENCHMARKS:
+        if args.pattern in name:
+            results[name] = run_benchmark(name, args.repeat)
+            if not args.json:
+                r = results[name]
+                print(f"{name:32} {r['ops_per_sec']:>14,.0f} ops/s  mean {r['mean_us']:9.3f}us  "
+                      f"p50 {_format_us(r['p50_us'])}  p95 {_format_us(r['p95_us'])}  "
+                      f"p99 {_format_us(r['p99_us'])}  peak {r['peak_kib']:9.1f}KiB")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        if not os.path.exists(BASELINE_FILE):
+            print(f"No baseline found at {BASELINE_FILE}", file=sys.stderr)
+            return 1
+        with open(BASELINE_FILE) as f:
+            regressions = compare(results, json.load(f))
+        for name in regressions:
+            print(f"REGRESSION: {name}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,194 @@
+from collections import namedtuple
+
+# Structured robot command; target, power and point are only used by some kinds.
+Command = namedtuple("Command", ["robot", "kind", "target", "power", "point"], defaults=(None, None, None))
+
+# Commands sent together during one control cycle.
+Packet = namedtuple("Packet", ["tick", "commands"])
+
+# Actuator each command kind drives: a newer command replaces an older one
+# for the same robot and channel within a tick.
+CHANNELS = {
+    "go_to_ball": "motion",
+    "align": "motion",
+    "go_to_position": "motion",
+    "block": "motion",
+    "intercept": "motion",
+    "kick": "kicker",
+    "pass": "kicker",
+}
+
+
+def describe(command):
+    """Human-readable text of a command"""
+    kind = command.kind
+    robot = command.robot
+    if kind == "go_to_ball":
+        return f"Robot {robot} moves towards the ball"
+    if kind == "align":
+        return f"Robot {robot} aligns with {command.target}"
+    if kind == "kick":
+        return f"Robot {robot} kicks the ball with power {command.power}"
+    if kind == "pass":
+        return f"Robot {robot} passes the ball to {command.target}"
+    if kind == "block":
+        return f"Robot {robot} blocks {command.target}"
+    if kind == "go_to_position":
+        if command.point is not None:
+            return f"Robot {robot} moves to {command.target} position ({command.point[0]:.2f}, {command.point[1]:.2f})"
+        return f"Robot {robot} moves to {command.target} position"
+    if kind == "intercept":
+        return f"Robot {robot} attempts to intercept the ball"
+    return f"Robot {robot} {kind} {command.target or ''}".rstrip()
+
+
+def print_sink(packet):
+    """Sink printing each command of a packet on its own line"""
+    for command in packet.commands:
+        print(describe(command))
+
+
+class ListSink:
+    def __init__(self):
+        """Sink keeping every packet it receives, e.g. for logs or replays."""
+        self.packets = []
+
+    def __call__(self, packet):
+        self.packets.append(packet)
+
+
+class CommandBuffer:
+    def __init__(self, sink=print_sink, autoflush=False):
+        """
+        Per-tick buffer of robot commands.
+
+        Commands are collected during a control cycle and sent to the sink as
+        one Packet by flush(). Within a tick, a command replaces the pending
+        command of the same robot and channel (see CHANNELS).
+
+        For robots whose FSM or fleet is attached (attach, attach_fleet), a
+        channel accepts one command per state entry: repeated events that
+        keep the robot in the same state do not send the command again,
+        unless it is emitted with retrigger=True or the robot is re-armed.
+        Other robots only get the per-tick coalescing.
+
+        Args:
+            sink (callable): Called with each non-empty Packet
+            autoflush (bool): Flush after every command (interactive use)
+        """
+        self.sink = sink
+        self.autoflush = autoflush
+        self.tick = 0
+        self._pending = {}
+        self._robots = {}
+        self._armed = {}
+
+    def attach(self, fsm, robot):
+        """
+        Send the commands of a robot only on entry into a new state of its FSM.
+
+        Args:
+            fsm (FSM): FSM whose actions command the robot
+            robot (str): Robot id used in the commands of these actions, i.e.
+                the robot the FSM was built for (fsm_builder.build_fsm(robot=...))
+        """
+        self._robots[id(fsm)] = robot
+        self._armed[robot] = set(CHANNELS.values())
+        if self not in fsm.observers:
+            fsm.add_observer(self)
+
+    def attach_fleet(self, fleet):
+        """
+        Send the commands of a fleet's robots only on entry into a new state.
+
+        State entries are tracked per robot through Fleet.add_observer,
+        including robots added to the fleet afterwards.
+
+        Args:
+            fleet (fleet.Fleet): Fleet whose actions command its robots
+        """
+        for robot in fleet.robot_ids:
+            self._armed[robot] = set(CHANNELS.values())
+        if self not in fleet.observers:
+            fleet.add_observer(self)
+
+    def detach_fleet(self, fleet):
+        """Stop tracking the state entries of a fleet's robots"""
+        for robot in fleet.robot_ids:
+            if robot not in self._robots.values():
+                self._armed.pop(robot, None)
+        if self in fleet.observers:
+            fleet.remove_observer(self)
+
+    def detach(self, fsm):
+        """Stop tracking the state entries of an FSM"""
+        robot = self._robots.pop(id(fsm), None)
+        if robot is not None and robot not in self._robots.values():
+            del self._armed[robot]
+        if self in fsm.observers:
+            fsm.remove_observer(self)
+
+    def rearm(self, robot):
+        """Accept the next command of every channel of an attached robot"""
+        if robot in self._armed:
+            self._armed[robot] = set(CHANNELS.values())
+
+    def on_enter(self, fsm, state, event):
+        robot = self._robots.get(id(fsm))
+        if robot is not None:
+            self._armed[robot] = set(CHANNELS.values())
+
+    def on_reset(self, fsm, state):
+        self.on_enter(fsm, state, None)
+
+    def on_robot_enter(self, fleet, robot_id, state):
+        self._armed[robot_id] = set(CHANNELS.values())
+
+    def emit(self, command, retrigger=False):
+        """
+        Queue a command for the current tick.
+
+        Args:
+            command (Command): Command to send
+            retrigger (bool): Send it even if the robot's channel already got
+                a command since the last state entry
+
+        Returns:
+            bool: True if the command was queued, False if it was dropped
+        """
+        channel = CHANNELS.get(command.kind, command.kind)
+        armed = self._armed.get(command.robot)
+        if armed is not None:
+            if channel not in armed and not retrigger:
+                return False
+            armed.discard(channel)
+
+        self._pending[command.robot, channel] = command
+        if self.autoflush:
+            self.flush()
+        return True
+
+    @property
+    def pending(self):
+        """Commands waiting for the next flush"""
+        return list(self._pending.values())
+
+    def flush(self):
+        """
+        Send the pending commands as one packet and start the next tick.
+
+        Returns:
+            Packet or None: The packet sent, None if nothing was pending
+        """
+        tick = self.tick
+        self.tick += 1
+        if not self._pending:
+            return None
+        packet = Packet(tick, tuple(self._pending.values()))
+        self._pending.clear()
+        self.sink(packet)
+        return packet
+
+    def clear(self):
+        """Drop the pending commands without sending them"""
+        self._pending.clear()
@@ -0,0 +1,79 @@
+import numbers
+import operator
+import threading
+from array import array
+
+
+class EventRegistry:
+    def __init__(self, names=()):
+        """
+        Interning table mapping event names to small integer codes.
+
+        Codes are assigned in registration order, starting at 0, and never
+        change for the lifetime of the registry. Registration is locked, so
+        threads interning the same new name get the same code.
+
+        Args:
+            names (iterable): Events to register up front
+        """
+        self.codes = {}
+        self.names = []
+        self._lock = threading.Lock()
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        """Return the code of an event, registering it if needed"""
+        code = self.codes.get(name)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(name)
+                if code is None:
+                    # Publish the name before the code, for lock-free readers
+                    self.names.append(name)
+                    code = self.codes[name] = len(self.names) - 1
+        return code
+
+    def code(self, name):
+        """Return the code of a registered event (KeyError if unknown)"""
+        return self.codes[name]
+
+    def name(self, code):
+        """Return the name of an event code"""
+        return self.names[code]
+
+    def encode(self, names):
+        """Intern a sequence of event names into an array of codes"""
+        intern = self.intern
+        return array("H", [intern(name) for name in names])
+
+    def decode(self, codes):
+        """Convert a sequence of codes back to event names"""
+        names = self.names
+        return [names[code] for code in codes]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.codes
+
+
+def normalize(event):
+    """
+    Convert integer event codes of any integer type (e.g. numpy.uint16 from an
+    array of codes) to int, the type the dispatch paths recognise as a code.
+
+    Args:
+        event: Event name, code or None
+
+    Returns:
+        The event, with codes as int
+    """
+    if isinstance(event, numbers.Integral) and event.__class__ is not bool:
+        return operator.index(event)
+    return event
+
+
+# Registry shared by the FSMs: compiled dispatch tables accept these codes.
+EVENTS = EventRegistry()
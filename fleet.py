@@ -0,0 +1,295 @@
+import inspect
+from array import array
+from collections import namedtuple
+
+from events import EVENTS, normalize
+
+# Runtime state of a fleet captured by Fleet.snapshot.
+FleetSnapshot = namedtuple("FleetSnapshot", ["robot_ids", "current", "steps"])
+
+
+def takes_robot(action):
+    """Check if an action accepts the id of the robot it commands (a `robot` parameter)"""
+    try:
+        return "robot" in inspect.signature(action).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class Fleet:
+    def __init__(self, fsm, robot_ids=(), run_actions=True):
+        """
+        Run one shared FSM definition for many robots.
+
+        The graph of the FSM is shared by every robot; per-robot data is kept
+        in compact arrays (current state id and number of processed events)
+        instead of one FSM object per robot.
+
+        Args:
+            fsm (FSM): Shared FSM definition (its own current state is not used);
+                composite states are flattened
+            robot_ids (iterable): Robots to register
+            run_actions (bool): Execute the current state's action for every event,
+                as FSM.process_event does; actions with a `robot` parameter (such
+                as the fsm_builder task actions) are called with robot=robot_id,
+                other actions only get the event
+        """
+        if fsm.has_composites():
+            fsm = fsm.flatten()
+        self.fsm = fsm
+        self.run_actions = run_actions
+        self.states = fsm.state_list()
+        self.state_ids = {state.name: i for i, state in enumerate(self.states)}
+        self._index = {id(state): i for i, state in enumerate(self.states)}
+        self._final = [state.is_final for state in self.states]
+        self._actions = [state.action for state in self.states]
+        self._robot_actions = [state.action is not None and takes_robot(state.action) for state in self.states]
+        self._tables = [self._build_table(state) for state in self.states]
+        self._dense = None
+        self.observers = []
+
+        self.robot_ids = []
+        self.robot_index = {}
+        self.current = array("i")
+        self.steps = array("L")
+        self._shared = False
+        for robot_id in robot_ids:
+            self.add_robot(robot_id)
+
+    def _build_table(self, state):
+        """Event -> target id table of a state, None if it has dynamic guards"""
+        state.compile()
+        if state._guards:
+            return None
+        return {event: self._index[id(t.target_state)] for event, (_, t) in state._table.items()}
+
+    def __len__(self):
+        return len(self.robot_ids)
+
+    def add_observer(self, observer):
+        """
+        Register an observer of the robots' state entries.
+
+        Observers define on_robot_enter(fleet, robot_id, state), called when a
+        robot is added, reset, or takes a transition in dispatch (e.g.
+        commands.CommandBuffer, see attach_fleet). While no observer is
+        registered, dispatch does not pay for the hook.
+
+        Returns:
+            The observer, for chaining
+        """
+        self.observers.append(observer)
+        return observer
+
+    def remove_observer(self, observer):
+        """Stop notifying an observer"""
+        self.observers.remove(observer)
+
+    def _notify_enter(self, robot_id, state_id):
+        state = self.states[state_id]
+        for observer in self.observers:
+            observer.on_robot_enter(self, robot_id, state)
+
+    def _own(self):
+        """Copy the per-robot data still shared with a fork before modifying it"""
+        if self._shared:
+            self.current = array("i", self.current)
+            self.steps = array("L", self.steps)
+            self.robot_ids = list(self.robot_ids)
+            self.robot_index = dict(self.robot_index)
+            self._shared = False
+
+    def fork(self):
+        """
+        Create a copy-on-write copy of the fleet.
+
+        The fork shares the FSM, the dispatch tables and, until one of the two
+        fleets processes an event or changes its robots, the per-robot arrays;
+        each side copies the arrays on its first write. Forking is therefore
+        constant time, which lets a look-ahead planner branch from the live
+        state many times per decision. Observers are not carried over.
+
+        Returns:
+            Fleet: The fork
+        """
+        fork = Fleet.__new__(Fleet)
+        fork.__dict__.update(self.__dict__)
+        fork.observers = []
+        self._shared = fork._shared = True
+        return fork
+
+    def snapshot(self):
+        """
+        Capture the current state and step count of every robot.
+
+        Returns:
+            FleetSnapshot: Snapshot for restore()
+        """
+        return FleetSnapshot(tuple(self.robot_ids), array("i", self.current), array("L", self.steps))
+
+    def restore(self, snapshot):
+        """Return to the state captured by snapshot()"""
+        self.robot_ids = list(snapshot.robot_ids)
+        self.robot_index = {robot_id: i for i, robot_id in enumerate(self.robot_ids)}
+        self.current = array("i", snapshot.current)
+        self.steps = array("L", snapshot.steps)
+        self._shared = False
+
+    def add_robot(self, robot_id):
+        """Register a robot, starting in the initial state"""
+        if robot_id in self.robot_index:
+            raise ValueError(f"Robot {robot_id} is already in the fleet")
+        self._own()
+        self.robot_index[robot_id] = len(self.robot_ids)
+        self.robot_ids.append(robot_id)
+        self.current.append(0)
+        self.steps.append(0)
+        if self.observers:
+            self._notify_enter(robot_id, 0)
+
+    def state_of(self, robot_id):
+        """Return the current state of a robot"""
+        return self.states[self.current[self.robot_index[robot_id]]]
+
+    def is_finished(self, robot_id):
+        """Check if a robot has reached a final state"""
+        return self._final[self.current[self.robot_index[robot_id]]]
+
+    def reset(self, robot_ids=None):
+        """Send robots (all of them by default) back to the initial state"""
+        indexes = range(len(self.robot_ids)) if robot_ids is None else \
+            [self.robot_index[robot_id] for robot_id in robot_ids]
+        self._own()
+        for i in indexes:
+            self.current[i] = 0
+            self.steps[i] = 0
+            if self.observers:
+                self._notify_enter(self.robot_ids[i], 0)
+
+    def dispatch(self, events):
+        """
+        Process a batch of events, with the semantics of FSM.process_event.
+
+        Args:
+            events (iterable): (robot_id, event) pairs, processed in order; events
+                may be names or interned codes (events.EVENTS)
+
+        Returns:
+            list: Robots that are in a final state after their event
+        """
+        self._own()
+        current = self.current
+        steps = self.steps
+        final = self._final
+        tables = self._tables
+        actions = self._actions if self.run_actions else None
+        robot_actions = self._robot_actions
+        index = self.robot_index
+        states = self.states
+        ids = self._index
+        notify = self._notify_enter if self.observers else None
+
+        finished = []
+        for robot_id, event in events:
+            if event.__class__ is not str and event.__class__ is not int:
+                event = normalize(event)
+            i = index[robot_id]
+            state_id = current[i]
+            steps[i] += 1
+
+            if actions is not None and actions[state_id]:
+                name = EVENTS.names[event] if event.__class__ is int else event
+                if robot_actions[state_id]:
+                    actions[state_id](name, robot=robot_id)
+                else:
+                    actions[state_id](name)
+
+            if final[state_id]:
+                finished.append(robot_id)
+                continue
+
+            table = tables[state_id]
+            if table is not None:
+                target = table.get(event)
+            else:
+                transition = states[state_id].match(event)
+                target = None if transition is None else ids[id(transition.target_state)]
+            if target is None:
+                continue
+
+            current[i] = target
+            if notify is not None:
+                notify(robot_id, target)
+            if final[target]:
+                finished.append(robot_id)
+        return finished
+
+    def state_counts(self):
+        """Number of robots in each state, by state name"""
+        counts = {}
+        for state_id in self.current:
+            name = self.states[state_id].name
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def indexes_of(self, robot_ids):
+        """Return the positions of robots in the fleet arrays, for dispatch_codes"""
+        import numpy as np
+
+        return np.fromiter((self.robot_index[robot_id] for robot_id in robot_ids),
+                           dtype=np.intp, count=len(robot_ids))
+
+    def _dense_table(self):
+        """(n_states, n_events) array of target ids, -1 where no transition matches"""
+        import numpy as np
+
+        if self._dense is None or self._dense.shape[1] < len(EVENTS):
+            if any(table is None for table in self._tables):
+                raise ValueError("dispatch_codes requires transitions on literal events only")
+            dense = np.full((len(self.states), len(EVENTS)), -1, dtype=np.int32)
+            for state_id, table in enumerate(self._tables):
+                if self._final[state_id]:
+                    continue
+                for event, target in table.items():
+                    if event.__class__ is int:
+                        dense[state_id, event] = target
+            self._dense = dense
+        return self._dense
+
+    def dispatch_codes(self, robot_indexes, codes):
+        """
+        Process one event per robot with NumPy, for numeric event streams.
+
+        Equivalent to dispatch() when each robot appears at most once in the
+        batch, but the table lookup and the state update are vectorized.
+        Actions are not executed.
+
+        Args:
+            robot_indexes (numpy.ndarray): Positions of the robots (see indexes_of)
+            codes (numpy.ndarray): Interned event code of each robot's event
+
+        Returns:
+            numpy.ndarray: Positions of the robots that are in a final state after their event
+        """
+        import numpy as np
+
+        robot_indexes = np.asarray(robot_indexes, dtype=np.intp)
+        codes = np.asarray(codes, dtype=np.intp)
+        if np.unique(robot_indexes).size != robot_indexes.size:
+            raise ValueError("Each robot may appear only once per dispatch_codes batch")
+
+        self._own()
+        dense = self._dense_table()
+        final = np.fromiter(self._final, dtype=bool, count=len(self._final))
+        current = np.frombuffer(self.current, dtype=np.int32)
+        steps = np.frombuffer(self.steps, dtype=f"u{self.steps.itemsize}")
+
+        steps[robot_indexes] += 1
+        states = current[robot_indexes]
+        targets = np.full(robot_indexes.size, -1, dtype=np.int32)
+        known = codes < dense.shape[1]
+        targets[known] = dense[states[known], codes[known]]
+
+        moved = targets >= 0
+        current[robot_indexes[moved]] = targets[moved]
+        return robot_indexes[final[current[robot_indexes]]]
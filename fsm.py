@@ -1,7 +1,83 @@
+import copy
+import dis
 import random
+from collections import namedtuple
+from time import perf_counter
+
+from events import EVENTS, normalize
+from history import copy_history, export_history, make_history
+
+# Opcodes that carry no semantics for condition detection.
+_IGNORED_OPCODES = {"RESUME", "NOP", "CACHE", "EXTENDED_ARG", "COPY_FREE_VARS"}
+
+# Detected literal events, keyed by code object (lambdas rebuilt by the FSM
+# builders share the same code object, so detection runs once per site).
+_LITERAL_CACHE = {}
+
+
+# Runtime state of an FSM captured by FSM.snapshot.
+FSMSnapshot = namedtuple("FSMSnapshot", ["state", "history", "rng_state"])
+
+
+class EventCondition:
+    """Condition that matches a single literal event."""
+
+    __slots__ = ("event",)
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, event):
+        return event == self.event
+
+    def __repr__(self):
+        return f"EventCondition({self.event!r})"
+
+
+def literal_event(condition):
+    """
+    Return the event a condition compares against, if it is a plain equality test.
+
+    Recognises EventCondition instances and functions whose body is exactly
+    ``return event == "LITERAL"`` (such as ``lambda e: e == "START"`` or
+    ``robot_actions.is_near_ball``).
+
+    Args:
+        condition (callable): Transition condition
+
+    Returns:
+        str or None: The literal event, or None if the condition is dynamic
+    """
+    if isinstance(condition, EventCondition):
+        return condition.event
+
+    code = getattr(condition, "__code__", None)
+    if code is None:
+        return None
+    if code in _LITERAL_CACHE:
+        return _LITERAL_CACHE[code]
+
+    event = None
+    if code.co_argcount == 1 and not code.co_freevars:
+        ops = [op for op in dis.get_instructions(code) if op.opname not in _IGNORED_OPCODES]
+        if (len(ops) == 4
+                and ops[2].opname == "COMPARE_OP" and "==" in ops[2].argrepr
+                and ops[3].opname == "RETURN_VALUE"):
+            if ops[0].opname == "LOAD_CONST":
+                const, load = ops[0], ops[1]
+            else:
+                load, const = ops[0], ops[1]
+            if (const.opname == "LOAD_CONST" and isinstance(const.argval, str)
+                    and load.opname.startswith("LOAD_FAST")
+                    and load.argval == code.co_varnames[0]):
+                event = const.argval
+
+    _LITERAL_CACHE[code] = event
+    return event
+
 
 class State:
-    def __init__(self, name, action=None, is_final=False, is_success=False):
+    def __init__(self, name, action=None, is_final=False, is_success=False, timeout=None, timeout_event="TIMEOUT"):
         """
         Initialize a state.
         
@@ -10,34 +86,133 @@ class State:
             action (callable, optional): Action to execute in this state
             is_final (bool): Indicates if this is a final state
             is_success (bool): Indicates if this is a success state (relevant if is_final=True)
+            timeout (float, optional): Seconds the state may last before timeout_event
+                is fired by the asyncio runtime
+            timeout_event (str): Synthetic event fired when the timeout expires
         """
         self.name = name
         self.action = action
         self.is_final = is_final
         self.is_success = is_success
-        self.transitions = [] 
-    
+        self.timeout = timeout
+        self.timeout_event = timeout_event
+        self.transitions = []
+        self._table = None
+        self._guards = ()
+
     def add_transition(self, transition):
-        """Add an outgoing transition to the state"""
-        self.transitions.append(transition)
+        """
+        Add an outgoing transition to the state.
+
+        Transitions are kept in evaluation order: by decreasing priority, then
+        in the order they were added.
+        """
+        position = len(self.transitions)
+        while position and self.transitions[position - 1].priority < transition.priority:
+            position -= 1
+        self.transitions.insert(position, transition)
+        self._table = None
+
+    def compile(self):
+        """
+        Build the dispatch table of this state.
+
+        Literal-event transitions go into a dict keyed both by event name and
+        by its interned code (events.EVENTS); the remaining (dynamic)
+        transitions are kept with their position so that declaration order
+        still decides which transition wins.
+        """
+        table = {}
+        guards = []
+        for index, transition in enumerate(self.transitions):
+            event = transition.event
+            if event is None:
+                guards.append((index, transition))
+            elif event not in table:
+                table[event] = table[EVENTS.intern(event)] = (index, transition)
+        # Guards first: a thread seeing the new table must also see its guards
+        self._guards = tuple(guards)
+        self._table = table
+
+    def match(self, event):
+        """
+        Return the first transition accepting the event using the dispatch table.
+
+        Args:
+            event (str or int): Event name or interned event code
+
+        Returns:
+            Transition or None: The transition to take, None if no transition matches
+        """
+        if self._table is None:
+            self.compile()
+        hit = self._table.get(event)
+        if self._guards:
+            if event.__class__ is int:
+                event = EVENTS.names[event]
+            limit = hit[0] if hit else len(self.transitions)
+            for index, transition in self._guards:
+                if index > limit:
+                    break
+                if transition.should_transition(event):
+                    return transition
+        return hit[1] if hit else None
+
+    def outcomes(self, event=None):
+        """
+        Outcome distribution of the state under the probabilistic model.
+
+        Transitions are attempted in declaration order and each one is taken
+        with its probability; the mass left once every transition has been
+        tried keeps the robot in this state.
+
+        Args:
+            event (str, optional): Only consider transitions accepting this event.
+                If None, every outgoing transition competes.
+
+        Returns:
+            list: (Transition, float) pairs with a strictly positive probability
+        """
+        remaining = 1.0
+        result = []
+        for transition in self.transitions:
+            if event is not None and not transition.should_transition(event):
+                continue
+            mass = remaining * transition.probability
+            if mass > 0:
+                result.append((transition, mass))
+                remaining -= mass
+            if remaining <= 0:
+                break
+        return result
     
     def __str__(self):
         return f"State({self.name}, final={self.is_final}, success={self.is_success})"
 
 
 class Transition:
-    def __init__(self, target_state, condition, probability=1.0):
+    def __init__(self, target_state, condition, probability=1.0, priority=0):
         """
         Initialize a transition.
         
         Args:
             target_state (State): Target state of the transition
-            condition (callable): Function that evaluates if the transition should be taken
+            condition (callable or str): Function that evaluates if the transition should be taken,
+                or an event name for a literal-event transition
             probability (float): Probability that the transition succeeds (between 0 and 1)
+            priority (int): Transitions with a higher priority are evaluated first
         """
+        if isinstance(condition, str):
+            condition = EventCondition(condition)
         self.target_state = target_state
         self.condition = condition
         self.probability = probability
+        self.priority = priority
+
+    @property
+    def event(self):
+        """Literal event accepted by this transition, None for dynamic conditions"""
+        return literal_event(self.condition)
     
     def should_transition(self, event):
         """
@@ -52,56 +227,545 @@ class Transition:
         return self.condition(event)
 
 
+class CompositeState(State):
+    def __init__(self, name, machine, prefix=None):
+        """
+        Initialize a state embedding a sub-FSM.
+
+        Entering the composite state enters the initial state of the sub-FSM.
+        When the sub-FSM reaches a success final state, the transitions of the
+        composite state take over from there (a composite state without
+        transitions keeps them final); failure final states of the sub-FSM
+        remain failure final states of the enclosing FSM. The sub-FSM
+        is not copied until the enclosing FSM is flattened, so one sub-FSM can
+        be shared by many behaviors.
+
+        Args:
+            name (str): Name of the state
+            machine (FSM): Embedded sub-FSM
+            prefix (str, optional): Prepended to the names of the embedded states
+                when flattening, to keep them unique
+        """
+        super().__init__(name)
+        self.machine = machine
+        self.prefix = prefix
+
+    def __str__(self):
+        return f"CompositeState({self.name}, machine={self.machine.initial_state.name})"
+
+
 class FSM:
-    def __init__(self, initial_state):
+    def __init__(self, initial_state, history="list", history_size=None, history_timestamps=False,
+                 stochastic=False, rng=None):
         """
         Initialize the FSM with an initial state.
+
+        Args:
+            initial_state (State): Initial state
+            history (str): History mode, "list" (unbounded), "off", "ring"
+                (last history_size states) or "compact" (integer-coded array log)
+            history_size (int, optional): Capacity of the ring history
+            history_timestamps (bool): Record timestamps in compact mode
+            stochastic (bool): Sample transitions using their probabilities
+                instead of always taking the first matching one
+            rng (random.Random, optional): Random generator used in stochastic mode,
+                created on first use by default (seeding one costs more than
+                building a small FSM)
         """
         self.states = {initial_state.name: initial_state}
         self.current_state = initial_state
         self.initial_state = initial_state
-        self.history = []  
-    
+        self.history_mode = (history, history_size, history_timestamps)
+        self.history = make_history(history, history_size, history_timestamps)
+        self.compiled = False
+        # True once the FSM is known to hold no composite state left to flatten
+        self._flat = False
+        self.stochastic = stochastic
+        self._rng = rng
+        self._fork_rng = None
+        # False processes events without executing the state actions (see fork)
+        self.run_actions = True
+        self.observers = []
+
+    @property
+    def rng(self):
+        """Random generator of the stochastic mode, created on first use"""
+        if self._rng is None:
+            self._rng = random.Random()
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng):
+        self._rng = rng
+
+    def add_observer(self, observer):
+        """
+        Register an observer notified of what happens in process_event.
+
+        Observers may define any of on_action(fsm, state, event, duration),
+        on_exit(fsm, state, event), on_enter(fsm, state, event),
+        on_unmatched(fsm, state, event) and on_reset(fsm, state) (called by
+        reset() with the initial state); events are given by name. While no
+        observer is registered, process_event does not pay for the hooks.
+
+        Args:
+            observer: Object implementing some of the hooks (e.g. metrics.MetricsCollector)
+
+        Returns:
+            The observer, for chaining
+        """
+        self.observers.append(observer)
+        return observer
+
+    def remove_observer(self, observer):
+        """Stop notifying an observer"""
+        self.observers.remove(observer)
+
     def add_state(self, state):
         """
         Add a state to the FSM.
         """
         self.states[state.name] = state
-    
+        if isinstance(state, CompositeState):
+            self.compiled = self._flat = False
+        elif self.compiled:
+            state.compile()
+
+    def compile(self):
+        """
+        Precompute per-state dispatch tables.
+
+        Once compiled, process_event resolves literal-event transitions with a
+        single dict lookup and only calls the conditions that are genuinely
+        dynamic. Transitions added to a state afterwards invalidate its table,
+        which is rebuilt on the next lookup.
+
+        Composite states are flattened first (see flatten). An FSM with
+        composite states that was not compiled is compiled by its first
+        process_event.
+
+        Returns:
+            FSM: self, to allow chaining
+        """
+        if self.has_composites():
+            flat = self.flatten()
+            self.states = flat.states
+            self.initial_state = self.current_state = flat.initial_state
+        for state in self.states.values():
+            state.compile()
+        self.compiled = self._flat = True
+        return self
+
+    def _ensure_flat(self):
+        """
+        Flatten the FSM before its first dispatch if it holds composite states.
+
+        The position is kept when it is a state outside of the composites.
+
+        Raises:
+            RuntimeError: If the FSM is positioned on a composite state
+        """
+        self._flat = True
+        if not self.has_composites():
+            return
+        current = self.current_state
+        if current is self.initial_state:
+            self.compile()
+            return
+        if isinstance(current, CompositeState):
+            raise RuntimeError(f"FSM positioned on composite state '{current.name}'; "
+                               "compile it before running it")
+        self.compile()
+        self.current_state = self.states[current.name]
+
+    def has_composites(self):
+        """Check if the FSM contains composite states"""
+        return any(isinstance(state, CompositeState) for state in self.state_list())
+
+    def flatten(self):
+        """
+        Return an equivalent FSM where composite states are expanded.
+
+        Each embedded sub-FSM is copied in place of its composite state:
+        transitions into the composite state lead to the copy of the sub-FSM's
+        initial state, and the copies of its success final states become
+        regular states carrying the composite state's transitions. Actions and
+        conditions are shared with the original states, not copied.
+
+        Returns:
+            FSM: New FSM without composite states
+
+        Raises:
+            ValueError: If two expanded states end up with the same name
+        """
+        pending = []
+        flat_states = []
+
+        def expand(fsm, prefix, exits, exit_entries):
+            entries = {}
+            for state in fsm.state_list():
+                if isinstance(state, CompositeState):
+                    entries[id(state)] = expand(state.machine, prefix + (state.prefix or ""),
+                                                state.transitions, entries)
+                    continue
+                flat = State(prefix + state.name, state.action, state.is_final, state.is_success,
+                             state.timeout, state.timeout_event)
+                pending.append((flat, state.transitions, entries))
+                if exits and state.is_final and state.is_success:
+                    flat.is_final = flat.is_success = False
+                    pending.append((flat, exits, exit_entries))
+                entries[id(state)] = flat
+                flat_states.append(flat)
+            return entries[id(fsm.initial_state)]
+
+        initial = expand(self, "", None, None)
+        for flat, transitions, entries in pending:
+            for transition in transitions:
+                flat_transition = copy.copy(transition)
+                flat_transition.target_state = entries[id(transition.target_state)]
+                flat.add_transition(flat_transition)
+
+        result = FSM(initial, *self.history_mode, stochastic=self.stochastic, rng=self._rng)
+        for state in flat_states:
+            if state is initial:
+                continue
+            if state.name in result.states:
+                raise ValueError(f"Duplicate state name '{state.name}' after flattening; "
+                                 "give the composite state a prefix")
+            result.add_state(state)
+        return result
+
+    def spawn(self, rng=None, seed=None, history=None):
+        """
+        Create a lightweight instance sharing this FSM's states and transitions.
+
+        The instance has its own current state, history and random generator
+        but no copy of the graph, so the template must be treated as read-only
+        once spawned.
+
+        Args:
+            rng (random.Random, optional): Random generator of the instance
+            seed (int, optional): Seed of a new random generator, for
+                reproducible stochastic instances
+            history (str, optional): History mode of the instance, e.g. "off" for
+                long-running replays (the template's mode by default)
+
+        Returns:
+            FSM: New FSM positioned on the initial state
+        """
+        if seed is not None:
+            rng = random.Random(seed)
+        mode = self.history_mode if history is None else (history,) + self.history_mode[1:]
+        instance = FSM(self.initial_state, *mode, stochastic=self.stochastic, rng=rng)
+        instance.states = self.states
+        instance.compiled = self.compiled
+        instance._flat = self._flat
+        return instance
+
+    def state_list(self):
+        """
+        Return every state of the FSM in a stable order.
+
+        The initial state comes first, followed by the registered states and
+        then any transition target that was never added with add_state. The
+        position of a state in this list is used as its integer id by the
+        batch simulation and analysis tools.
+
+        Returns:
+            list: States of the FSM
+        """
+        ordered = [self.initial_state]
+        seen = {id(self.initial_state)}
+        for state in self.states.values():
+            if id(state) not in seen:
+                seen.add(id(state))
+                ordered.append(state)
+        for state in ordered:
+            for transition in state.transitions:
+                target = transition.target_state
+                if id(target) not in seen:
+                    seen.add(id(target))
+                    ordered.append(target)
+        return ordered
+
+    def absorption_analysis(self, policy=None, sparse=None):
+        """
+        Compute success probability, expected steps and visit counts exactly.
+
+        Args:
+            policy (dict or callable, optional): Event emitted in each state, by state name
+            sparse (bool, optional): Force or disable the sparse solver
+
+        Returns:
+            markov.AbsorptionAnalysis: Result of the absorbing Markov chain solve
+        """
+        import markov
+
+        return markov.analyze(self, policy=policy, sparse=sparse)
+
+    def validate(self):
+        """
+        Check for unreachable states, dead ends, shadowed transitions and
+        inconsistent probabilities.
+
+        Returns:
+            analysis.ValidationReport: Issues found
+        """
+        import analysis
+
+        return analysis.validate(self)
+
+    def minimize(self):
+        """
+        Return an equivalent FSM with equivalent states merged (literal-event FSMs only).
+
+        Returns:
+            FSM: Minimized FSM
+        """
+        import analysis
+
+        return analysis.minimize(self)
+
+    def save(self, path):
+        """
+        Save the FSM to a file (JSON if the path ends with .json, compact binary otherwise).
+
+        Args:
+            path (str): Output file
+        """
+        import serialization
+
+        serialization.save(self, path)
+
+    @classmethod
+    def load(cls, path, actions=None):
+        """
+        Load an FSM saved with save().
+
+        Args:
+            path (str): File to read
+            actions (dict or callable, optional): Action of each state, by state name
+
+        Returns:
+            FSM: The loaded FSM, compiled
+        """
+        import serialization
+
+        return serialization.load(path, actions)
+
+    @classmethod
+    def load_library(cls, path, actions=None):
+        """
+        Memory-map a library of FSMs written by serialization.save_library.
+
+        Returns:
+            serialization.FSMLibrary: Read-only mapping from behavior name to FSM instances
+        """
+        import serialization
+
+        return serialization.FSMLibrary(path, actions)
+
+    def _sample_transition(self, state, event):
+        """
+        Draw the transition to take in stochastic mode, following State.outcomes.
+
+        Matching transitions are tried in evaluation order, each one being taken
+        with its probability. With a None event every transition competes.
+        """
+        if event.__class__ is int:
+            event = EVENTS.names[event]
+        draw = self.rng.random
+        for transition in state.transitions:
+            if event is not None and not transition.should_transition(event):
+                continue
+            if transition.probability >= 1.0 or draw() < transition.probability:
+                return transition
+        return None
+
+    def _select_transition(self, state, event):
+        """Return the transition of the state accepting the event, or None"""
+        if self.stochastic:
+            return self._sample_transition(state, event)
+        if self.compiled:
+            return state.match(event)
+        if event.__class__ is int:
+            event = EVENTS.names[event]
+        for transition in state.transitions:
+            if transition.should_transition(event):
+                return transition
+        return None
+
     def process_event(self, event):
         """Process an event and perform the appropriate transition.
         
         Args:
-            event (str): Event to process
+            event (str or int): Event to process, by name or by interned code
+                (events.EVENTS) of any integer type, e.g. an item of a NumPy array
+                of codes; actions and dynamic conditions always get the name.
+                In stochastic mode, None lets every outgoing transition compete.
             
         Returns:
             bool: True if the FSM has reached a final state, False otherwise
         """
-        self.history.append(self.current_state.name)
-        
-        if self.current_state.action:
-            self.current_state.action(event)
-        
-        if self.current_state.is_final:
+        if event.__class__ is not str and event.__class__ is not int:
+            event = normalize(event)
+        if not self._flat:
+            self._ensure_flat()
+        if self.observers:
+            return self._process_observed(event)
+
+        state = self.current_state
+        self.history.append(state.name)
+
+        if state.action and self.run_actions:
+            state.action(EVENTS.names[event] if event.__class__ is int else event)
+
+        return self._advance(state, event)
+
+    def _process_observed(self, event):
+        """process_event with the observer hooks (taken only while observers are registered)"""
+        state = self.current_state
+        self.history.append(state.name)
+
+        if state.action and self.run_actions:
+            name = EVENTS.names[event] if event.__class__ is int else event
+            start = perf_counter()
+            state.action(name)
+            self._notify_action(state, name, perf_counter() - start)
+
+        return self._advance_observed(state, event)
+
+    def _notify_action(self, state, event, duration):
+        for observer in self.observers:
+            hook = getattr(observer, "on_action", None)
+            if hook:
+                hook(self, state, event, duration)
+
+    def _notify(self, hook_name, state, event):
+        if event.__class__ is int:
+            event = EVENTS.names[event]
+        for observer in self.observers:
+            hook = getattr(observer, hook_name, None)
+            if hook:
+                hook(self, state, event)
+
+    def _advance(self, state, event):
+        """Take the transition of the state matching the event, once its action has run"""
+        if state.is_final:
             return True
-        
-        possible_transitions = []
-        for transition in self.current_state.transitions:
-            if transition.should_transition(event):
-                possible_transitions.append(transition)
-        
-        if not possible_transitions:
+
+        transition = self._select_transition(state, event)
+        if transition is None:
             return False
-        
-        transition = possible_transitions[0]
 
         self.current_state = transition.target_state
         return self.current_state.is_final
-    
+
+    def _advance_observed(self, state, event):
+        """_advance notifying on_unmatched, on_exit and on_enter"""
+        if state.is_final:
+            return True
+
+        transition = self._select_transition(state, event)
+        if transition is None:
+            self._notify("on_unmatched", state, event)
+            return False
+
+        self._notify("on_exit", state, event)
+        self.current_state = transition.target_state
+        self._notify("on_enter", self.current_state, event)
+        return self.current_state.is_final
+
     def reset(self):
         """Reset the FSM to its initial state"""
         self.current_state = self.initial_state
-        self.history = []
+        self.history = make_history(*self.history_mode)
+        for observer in self.observers:
+            hook = getattr(observer, "on_reset", None)
+            if hook:
+                hook(self, self.initial_state)
+
+    def snapshot(self, history_limit=None):
+        """
+        Capture the runtime state of the FSM: current state, history and
+        random generator state (stochastic mode only).
+
+        The graph is not copied, so a snapshot costs the size of the kept history.
+
+        Args:
+            history_limit (int, optional): Keep only the last entries of the
+                history (all of it by default, 0 for none)
+
+        Returns:
+            FSMSnapshot: Snapshot for restore() or fork(); its history is a copy
+                of the recorder, so compact histories keep their timestamps
+        """
+        return FSMSnapshot(self.current_state, copy_history(self.history, history_limit),
+                           self.rng.getstate() if self.stochastic else None)
+
+    def restore(self, snapshot):
+        """
+        Return to the runtime state captured by snapshot().
+
+        Args:
+            snapshot (FSMSnapshot): Snapshot of this FSM or of one sharing its states
+        """
+        self.current_state = snapshot.state
+        if snapshot.history.__class__ is self.history.__class__:
+            self.history = copy_history(snapshot.history)
+        else:
+            # Snapshot of an FSM with another history mode: only the names carry over
+            history = make_history(*self.history_mode)
+            for name in snapshot.history:
+                history.append(name)
+            self.history = history
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+            self._fork_rng = None
+
+    def fork(self, history_limit=0, run_actions=False):
+        """
+        Create an independent runtime copy positioned on the current state.
+
+        The fork shares the states and transitions (like spawn()), so branching
+        a look-ahead from the live state does not copy the graph. By default
+        the fork does not run the state actions, so planning branches do not
+        command the real robot. In stochastic mode it gets its own random
+        generator, seeded from a stream derived from this FSM's generator
+        without drawing from it: the live run is the same whatever the number
+        of forks.
+
+        Args:
+            history_limit (int, optional): History entries carried over (none by
+                default, None for all)
+            run_actions (bool): Execute the state actions in the fork
+
+        Returns:
+            FSM: The fork
+        """
+        rng = self._rng
+        if self.stochastic:
+            if self._fork_rng is None:
+                self._fork_rng = random.Random(hash(self.rng.getstate()))
+            rng = random.Random(self._fork_rng.getrandbits(64))
+        instance = FSM(self.initial_state, *self.history_mode, stochastic=self.stochastic, rng=rng)
+        instance.states = self.states
+        instance.compiled = self.compiled
+        instance._flat = self._flat
+        instance.run_actions = run_actions
+        instance.current_state = self.current_state
+        instance.history = copy_history(self.history, history_limit)
+        return instance
+
+    def export_history(self):
+        """
+        Export the recorded history in compact form.
+
+        Returns:
+            dict: "states" (symbol table), "codes" (array of indexes into states)
+                and "timestamps" (array or None)
+        """
+        return export_history(self.history)
     
     def display(self):
         """Display the FSM as a list in the console"""
@@ -0,0 +1,140 @@
+from functools import partial
+
+import robot_actions as ra
+from fsm import FSM, CompositeState, State, Transition
+from instruction_parser import INSTRUCTION_MAPPING, TASK_ENTRY_EVENTS, describe_instruction, parse_instruction
+from templates import TemplateRegistry
+
+# Robot commanded by FSMs built without an explicit robot.
+DEFAULT_ROBOT = "R1"
+
+
+def _task_action(command):
+    """
+    Action factory for a task: the action calls command(robot, params).
+
+    The action commands the robot the FSM was built for, unless it is called
+    with robot=..., as Fleet does to run one shared FSM for many robots.
+    """
+    def factory(params):
+        def action(event, robot=params.get("robot", DEFAULT_ROBOT)):
+            return command(robot, params)
+        return action
+    return factory
+
+
+# Action factories of the task states, called with the instruction parameters.
+TASK_ACTIONS = {
+    "GO_TO_BALL": _task_action(lambda robot, params: ra.go_to_ball(robot)),
+    "ALIGN": _task_action(lambda robot, params: ra.align_with_target(robot, params["target_robot"])),
+    "ALIGN_GOAL": _task_action(lambda robot, params: ra.align_with_target(robot, "GOAL")),
+    "PASS": _task_action(lambda robot, params: ra.pass_ball(robot, params["target_robot"])),
+    "SHOOT": _task_action(lambda robot, params: ra.kick_ball(robot, power=1.0)),
+    "CALCULATE_POSITION": _task_action(lambda robot, params: ra.calculate_block_position(robot, params["target_robot"])),
+    "GO_TO_POSITION": _task_action(lambda robot, params: ra.go_to_position(robot, "blocking")),
+    "BLOCK": _task_action(lambda robot, params: ra.block_robot(robot, params["target_robot"])),
+    "CALCULATE_TRAJECTORY": _task_action(lambda robot, params: ra.calculate_trajectory(robot)),
+    "GO_TO_INTERCEPT_POSITION": _task_action(lambda robot, params: ra.go_to_position(robot, "interception")),
+    "INTERCEPT": _task_action(lambda robot, params: ra.intercept_ball(robot)),
+}
+
+
+def build_fsm(action, robot=DEFAULT_ROBOT, **params):
+    """
+    Build the FSM of an action from its task sequence in INSTRUCTION_MAPPING.
+
+    The FSM is INITIAL, then one state per task entered on the task's event
+    (TASK_ENTRY_EVENTS), then the success and failure final states of the action.
+
+    Args:
+        action (str): Action name (e.g. "pass")
+        robot (str): Robot commanded by the state actions
+        **params: Action parameters (e.g. target_robot), defaults are taken
+            from INSTRUCTION_MAPPING
+
+    Returns:
+        FSM: The generated FSM
+    """
+    spec = INSTRUCTION_MAPPING[action]
+    params = {**spec["defaults"], **params, "robot": robot}
+
+    initial = State("INITIAL", None)
+    fsm = FSM(initial)
+    previous = initial
+    for task in spec["task_sequence"]:
+        if task not in TASK_ENTRY_EVENTS:
+            raise ValueError(f"No entry event defined for task '{task}'")
+        factory = TASK_ACTIONS.get(task)
+        state = State(task, factory(params) if factory else None)
+        previous.add_transition(Transition(state, TASK_ENTRY_EVENTS[task]))
+        fsm.add_state(state)
+        previous = state
+
+    success_name, success_event, success_probability = spec["success"]
+    failure_name, failure_event = spec["failure"]
+    success_state = State(success_name, None, is_final=True, is_success=True)
+    failure_state = State(failure_name, None, is_final=True, is_success=False)
+    previous.add_transition(Transition(success_state, success_event, probability=success_probability))
+    previous.add_transition(Transition(failure_state, failure_event, probability=1.0))
+    fsm.add_state(success_state)
+    fsm.add_state(failure_state)
+
+    return fsm
+
+
+FSM_TEMPLATES = TemplateRegistry(maxsize=32)
+for _action in INSTRUCTION_MAPPING:
+    FSM_TEMPLATES.register(_action, partial(build_fsm, _action))
+
+
+def fsm_from_instruction(instruction, robot=DEFAULT_ROBOT):
+    """
+    Parse an instruction and return a runnable FSM built from the cached template.
+
+    Args:
+        instruction (str): Text instruction (e.g. "Pass the ball to R2")
+        robot (str): Robot executing the instruction
+
+    Returns:
+        tuple: (FSM, description), or (None, None) if the instruction is not recognised
+    """
+    parsed = parse_instruction(instruction)
+    if not parsed:
+        return None, None
+
+    params = {**INSTRUCTION_MAPPING[parsed["action"]]["defaults"], **parsed["params"]}
+    return FSM_TEMPLATES.instance(parsed["action"], robot=robot, **params), describe_instruction(parsed)
+
+
+def build_play(actions, link_event="START", robot=DEFAULT_ROBOT, **params):
+    """
+    Compose a play from the cached FSMs of several actions (e.g. pass then shoot).
+
+    Each action is embedded as a composite state sharing its template from
+    FSM_TEMPLATES; after the success of one action, link_event starts the
+    next one. Embedded state names are prefixed with the action and its rank
+    (e.g. "PASS_1.ALIGN").
+
+    Args:
+        actions (list): Action names, in execution order
+        link_event (str): Event moving from one action's success to the next action
+        robot (str): Robot commanded by the play
+        **params: Action parameters, given to the actions that declare them
+
+    Returns:
+        FSM: The flattened, compiled play
+    """
+    pieces = []
+    for rank, action in enumerate(actions, start=1):
+        spec = INSTRUCTION_MAPPING[action]
+        piece_params = {**spec["defaults"], **{k: v for k, v in params.items() if k in spec["params"]}}
+        name = f"{action.upper()}_{rank}"
+        pieces.append(CompositeState(name, FSM_TEMPLATES.template(action, robot=robot, **piece_params), prefix=f"{name}."))
+
+    for piece, next_piece in zip(pieces, pieces[1:]):
+        piece.add_transition(Transition(next_piece, link_event))
+
+    fsm = FSM(pieces[0])
+    for piece in pieces[1:]:
+        fsm.add_state(piece)
+    return fsm.compile()
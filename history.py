@@ -0,0 +1,144 @@
+import itertools
+import time
+from array import array
+from collections import deque
+
+HISTORY_MODES = ("list", "off", "ring", "compact")
+
+
+class NullHistory:
+    """History recorder that keeps nothing"""
+
+    def append(self, name):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+
+class CompactHistory:
+    def __init__(self, timestamps=False, clock=time.monotonic):
+        """
+        Integer-coded, array-backed history of visited states.
+
+        Each state name is stored once in a symbol table; the log itself is an
+        array of 16-bit codes, plus an optional array of timestamps.
+
+        Args:
+            timestamps (bool): Record the time of each entry
+            clock (callable): Time source used for timestamps
+        """
+        self.names = []
+        self.name_codes = {}
+        self.codes = array("H")
+        self.timestamps = array("d") if timestamps else None
+        self.clock = clock
+
+    def append(self, name):
+        code = self.name_codes.get(name)
+        if code is None:
+            code = self.name_codes[name] = len(self.names)
+            self.names.append(name)
+        self.codes.append(code)
+        if self.timestamps is not None:
+            self.timestamps.append(self.clock())
+
+    def clear(self):
+        del self.codes[:]
+        if self.timestamps is not None:
+            del self.timestamps[:]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        names = self.names
+        return (names[code] for code in self.codes)
+
+    def __getitem__(self, index):
+        return self.names[self.codes[index]]
+
+
+def make_history(mode="list", size=None, timestamps=False):
+    """
+    Create a history recorder.
+
+    Args:
+        mode (str): "list" (unbounded list of names), "off" (nothing recorded),
+            "ring" (last `size` names) or "compact" (integer-coded array log)
+        size (int, optional): Capacity of the ring buffer
+        timestamps (bool): Record timestamps (compact mode only)
+
+    Returns:
+        Recorder exposing append(name), clear(), len() and iteration
+    """
+    if mode == "list":
+        return []
+    if mode == "off":
+        return NullHistory()
+    if mode == "ring":
+        if not size or size <= 0:
+            raise ValueError("Ring history needs a positive size")
+        return deque(maxlen=size)
+    if mode == "compact":
+        return CompactHistory(timestamps=timestamps)
+    raise ValueError(f"Unknown history mode '{mode}', expected one of {HISTORY_MODES}")
+
+
+def copy_history(history, limit=None):
+    """
+    Copy a history recorder, keeping only its last entries.
+
+    The copy has the same mode as the original; compact histories keep their
+    codes and timestamps (not the time of the copy).
+
+    Args:
+        history: Recorder created by make_history
+        limit (int, optional): Entries to keep (all by default, 0 for none)
+
+    Returns:
+        New recorder
+    """
+    start = 0 if limit is None else max(len(history) - limit, 0)
+    if isinstance(history, CompactHistory):
+        copy = CompactHistory(clock=history.clock)
+        copy.names = list(history.names)
+        copy.name_codes = dict(history.name_codes)
+        copy.codes = history.codes[start:]
+        copy.timestamps = None if history.timestamps is None else history.timestamps[start:]
+        return copy
+    if isinstance(history, NullHistory):
+        return NullHistory()
+    if isinstance(history, deque):
+        return deque(itertools.islice(history, start, None), maxlen=history.maxlen)
+    return history[start:]
+
+
+def export_history(history):
+    """
+    Export a history in compact form.
+
+    Args:
+        history: Recorder created by make_history
+
+    Returns:
+        dict: "states" (symbol table), "codes" (array of indexes into states)
+            and "timestamps" (array or None)
+    """
+    if isinstance(history, CompactHistory):
+        return {
+            "states": list(history.names),
+            "codes": array("H", history.codes),
+            "timestamps": None if history.timestamps is None else array("d", history.timestamps),
+        }
+
+    compact = CompactHistory()
+    for name in history:
+        compact.append(name)
+    return {"states": compact.names, "codes": compact.codes, "timestamps": None}
@@ -1,53 +1,123 @@
+import re
+from functools import lru_cache
+
 INSTRUCTION_MAPPING = {
     "pass": {
+        "keywords": ["pass"],
         "task_sequence": ["GO_TO_BALL", "ALIGN", "PASS"],
-        "params": ["target_robot"]
+        "params": ["target_robot"],
+        "defaults": {"target_robot": "R2"},
+        "success": ("SUCCESS", "BALL_RECEIVED", 0.85),
+        "failure": ("FAILURE", "PASS_FAILED"),
+        "description": "Pass to robot {target_robot}"
     },
     "shoot": {
+        "keywords": ["shoot", "goal"],
         "task_sequence": ["GO_TO_BALL", "ALIGN_GOAL", "SHOOT"],
-        "params": []
+        "params": [],
+        "defaults": {},
+        "success": ("GOAL", "GOAL_SCORED", 1.0),
+        "failure": ("MISSED", "SHOT_MISSED"),
+        "description": "Shoot at goal"
     },
     "block": {
-        "task_sequence": ["GO_TO_POSITION", "BLOCK"],
-        "params": ["target_robot"]
+        "keywords": ["block"],
+        "task_sequence": ["CALCULATE_POSITION", "GO_TO_POSITION", "BLOCK"],
+        "params": ["target_robot"],
+        "defaults": {"target_robot": "R3"},
+        "success": ("BLOCKING_SUCCESS", "BLOCKING_EFFECTIVE", 0.9),
+        "failure": ("BLOCKING_FAILURE", "BLOCKING_INEFFECTIVE"),
+        "description": "Block robot {target_robot}"
     },
     "intercept": {
-        "task_sequence": ["CALCULATE_TRAJECTORY", "GO_TO_POSITION", "INTERCEPT"],
-        "params": []
+        "keywords": ["intercept"],
+        "task_sequence": ["CALCULATE_TRAJECTORY", "GO_TO_INTERCEPT_POSITION", "INTERCEPT"],
+        "params": [],
+        "defaults": {},
+        "success": ("INTERCEPTION_SUCCESS", "BALL_INTERCEPTED", 0.75),
+        "failure": ("INTERCEPTION_FAILURE", "INTERCEPTION_MISSED"),
+        "description": "Intercept the ball"
     }
 }
 
+# Event that moves the robot into each task state.
+TASK_ENTRY_EVENTS = {
+    "GO_TO_BALL": "NEAR_BALL",
+    "ALIGN": "ALIGNED",
+    "ALIGN_GOAL": "ALIGNED",
+    "PASS": "BALL_KICKED",
+    "SHOOT": "BALL_KICKED",
+    "CALCULATE_POSITION": "START",
+    "GO_TO_POSITION": "POSITION_CALCULATED",
+    "BLOCK": "POSITION_REACHED",
+    "CALCULATE_TRAJECTORY": "START",
+    "GO_TO_INTERCEPT_POSITION": "TRAJECTORY_CALCULATED",
+    "INTERCEPT": "INTERCEPT_POSITION_REACHED",
+}
+
+# Single pass over the instruction: every action keyword at once, and robot ids of any length.
+KEYWORD_ACTIONS = {keyword: action
+                   for action, spec in INSTRUCTION_MAPPING.items()
+                   for keyword in spec["keywords"]}
+ACTION_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in KEYWORD_ACTIONS))
+ACTION_PRIORITY = {key: i for i, key in enumerate(INSTRUCTION_MAPPING)}
+ROBOT_PATTERN = re.compile(r"\br(\d+)\b")
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(instruction):
+    """
+    Analyse une instruction normalisée, résultat mis en cache.
+
+    """
+    matches = ACTION_PATTERN.findall(instruction)
+    if not matches:
+        return None
+    action = min((KEYWORD_ACTIONS[match] for match in matches), key=ACTION_PRIORITY.__getitem__)
+
+    params = ()
+    if "target_robot" in INSTRUCTION_MAPPING[action]["params"]:
+        robot = ROBOT_PATTERN.search(instruction)
+        if robot:
+            params = (("target_robot", f"R{int(robot.group(1))}"),)
+    return action, params
+
+
 def parse_instruction(instruction):
     """
     Analyse une instruction textuelle et retourne une séquence de tâches.
 
     """
-    instruction = instruction.lower().strip()
-    
-    action = None
-    params = {}
-    
-    for key in INSTRUCTION_MAPPING:
-        if key in instruction:
-            action = key
-            break
-    
-    if not action:
-        return None  
-    
-    if "to r" in instruction:
-        for i in range(1, 10):  
-            if f"r{i}" in instruction:
-                params["target_robot"] = f"R{i}"
-                break
-    
+    parsed = _parse_cached(instruction.lower().strip())
+
+    if not parsed:
+        return None
+
+    action, params = parsed
     return {
         "action": action,
         "task_sequence": INSTRUCTION_MAPPING[action]["task_sequence"],
-        "params": params
+        "params": dict(params)
     }
 
 
+def describe_instruction(parsed):
+    """
+    Décrit en langage naturel une instruction analysée.
+
+    """
+    spec = INSTRUCTION_MAPPING[parsed["action"]]
+    return spec["description"].format(**{**spec["defaults"], **parsed["params"]})
+
+
+def parse_many(instructions):
+    """
+    Analyse une liste d'instructions, dans l'ordre.
+
+    """
+    return [parse_instruction(instruction) for instruction in instructions]
+
+
 def generate_task_sequence(instruction):
     """
     Génère séquence tâches à partir d'une instruction.
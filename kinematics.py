@@ -0,0 +1,242 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Rolling deceleration of the ball on the field carpet (m/s^2).
+BALL_DECELERATION = 0.5
+# Maximum speed assumed for our robots when computing reach times (m/s).
+ROBOT_MAX_SPEED = 2.5
+# Centre of the goal we defend (m), in field coordinates.
+OWN_GOAL = (-4.5, 0.0)
+# Distance kept from a blocked robot, towards the goal (m).
+BLOCK_STANDOFF = 0.3
+# Time step of the interception search (s) and its horizon.
+TIME_STEP = 1 / 60
+HORIZON = 4.0
+
+# Earliest reachable interception of one ball candidate by one robot.
+Interception = namedtuple("Interception", ["points", "times", "feasible"])
+
+# Blocking positions and the time each robot needs to reach each of them.
+Blocking = namedtuple("Blocking", ["points", "travel_times"])
+
+
+def stop_time(velocity, deceleration=BALL_DECELERATION):
+    """
+    Time before the ball stops rolling.
+
+    Args:
+        velocity (array_like): Ball velocities, shape (..., 2)
+
+    Returns:
+        numpy.ndarray: Seconds, shape (...)
+    """
+    return np.linalg.norm(np.asarray(velocity, dtype=float), axis=-1) / deceleration
+
+
+def ball_positions(position, velocity, times, deceleration=BALL_DECELERATION):
+    """
+    Predict ball positions under constant rolling friction.
+
+    The ball decelerates along its direction of motion and stays still once
+    stopped: p(t) = p0 + u (v0 t' - a t'^2 / 2) with t' = min(t, v0 / a).
+
+    Args:
+        position (array_like): Ball positions, shape (B, 2) or (2,)
+        velocity (array_like): Ball velocities, same shape as position
+        times (array_like): Prediction times in seconds, shape (T,)
+        deceleration (float): Rolling deceleration
+
+    Returns:
+        numpy.ndarray: Positions, shape (B, T, 2) (or (T, 2) for a single ball)
+    """
+    position = np.asarray(position, dtype=float)
+    velocity = np.asarray(velocity, dtype=float)
+    times = np.asarray(times, dtype=float)
+
+    speed = np.linalg.norm(velocity, axis=-1)
+    direction = np.divide(velocity, speed[..., None], out=np.zeros_like(velocity),
+                          where=speed[..., None] > 0)
+    t = np.minimum(times, (speed / deceleration)[..., None])
+    travelled = speed[..., None] * t - 0.5 * deceleration * t * t
+    return position[..., None, :] + direction[..., None, :] * travelled[..., None]
+
+
+def ball_trajectory(position, velocity, horizon=HORIZON, dt=TIME_STEP, deceleration=BALL_DECELERATION):
+    """
+    Sample ball trajectories on a regular time grid.
+
+    Returns:
+        tuple: (times, shape (T,), positions as returned by ball_positions)
+    """
+    times = np.arange(0.0, horizon + dt / 2, dt)
+    return times, ball_positions(position, velocity, times, deceleration)
+
+
+def interceptions(robots, ball_position, ball_velocity, robot_speed=ROBOT_MAX_SPEED,
+                  horizon=HORIZON, dt=TIME_STEP, deceleration=BALL_DECELERATION):
+    """
+    Earliest point where each robot can reach each ball candidate.
+
+    For every robot x ball pair, the ball trajectory is sampled every dt and
+    the first sample the robot reaches in time (straight line at robot_speed)
+    is the interception point. When no sample of the horizon is reachable,
+    the last predicted position is returned with feasible=False.
+
+    Args:
+        robots (array_like): Robot positions, shape (R, 2)
+        ball_position (array_like): Ball candidate positions, shape (B, 2)
+        ball_velocity (array_like): Ball candidate velocities, shape (B, 2)
+        robot_speed (float): Robot speed
+
+    Returns:
+        Interception: points (R, B, 2), times (R, B) and feasible (R, B)
+    """
+    robots = np.asarray(robots, dtype=float).reshape(-1, 2)
+    times, path = ball_trajectory(np.asarray(ball_position, dtype=float).reshape(-1, 2),
+                                  np.asarray(ball_velocity, dtype=float).reshape(-1, 2),
+                                  horizon, dt, deceleration)
+
+    # (R, B, T): time the robot needs to reach each predicted ball position
+    offsets = path[None, :, :, :] - robots[:, None, None, :]
+    travel = np.hypot(offsets[..., 0], offsets[..., 1]) / robot_speed
+    reachable = travel <= times
+    feasible = reachable.any(axis=-1)
+    first = np.where(feasible, reachable.argmax(axis=-1), len(times) - 1)
+
+    ball_index = np.arange(path.shape[0])[None, :]
+    points = path[ball_index, first]
+    arrival = np.where(feasible, times[first], np.take_along_axis(travel, first[..., None], -1)[..., 0])
+    return Interception(points, arrival, feasible)
+
+
+def blocking_points(threats, protect=OWN_GOAL, standoff=BLOCK_STANDOFF):
+    """
+    Positions covering each threat: on the segment from the threat to the
+    protected point, standoff metres away from the threat.
+
+    Args:
+        threats (array_like): Opponent positions, shape (N, 2)
+        protect (array_like): Point to cover (our goal by default), shape (2,) or (N, 2)
+        standoff (float): Distance from the threat
+
+    Returns:
+        numpy.ndarray: Blocking positions, shape (N, 2)
+    """
+    threats = np.asarray(threats, dtype=float).reshape(-1, 2)
+    offsets = np.asarray(protect, dtype=float) - threats
+    distance = np.hypot(offsets[:, 0], offsets[:, 1])
+    step = np.minimum(standoff, distance)
+    scale = np.divide(step, distance, out=np.zeros_like(distance), where=distance > 0)
+    return threats + offsets * scale[:, None]
+
+
+def blocking(robots, threats, protect=OWN_GOAL, standoff=BLOCK_STANDOFF, robot_speed=ROBOT_MAX_SPEED):
+    """
+    Blocking positions of several threats and the time every robot needs to reach them.
+
+    Returns:
+        Blocking: points (N, 2) and travel_times (R, N)
+    """
+    robots = np.asarray(robots, dtype=float).reshape(-1, 2)
+    points = blocking_points(threats, protect, standoff)
+    offsets = points[None, :, :] - robots[:, None, :]
+    return Blocking(points, np.hypot(offsets[..., 0], offsets[..., 1]) / robot_speed)
+
+
+class KinematicsEngine:
+    def __init__(self, robot_speed=ROBOT_MAX_SPEED, protect=OWN_GOAL):
+        """
+        Geometry of the current vision frame, computed once per frame.
+
+        update() stores a frame; interception() and blocking() compute their
+        result for every robot at once the first time they are requested in
+        that frame and return the cached arrays afterwards, so the state
+        actions of many robots share one computation.
+
+        Args:
+            robot_speed (float): Speed of our robots
+            protect (tuple): Point defended by blocking positions
+        """
+        self.robot_speed = robot_speed
+        self.protect = protect
+        self.frame = None
+        self.robot_ids = []
+        self.opponent_ids = []
+        self._robot_index = {}
+        self._opponent_index = {}
+        self._cache = {}
+
+    def update(self, frame, ball_position, ball_velocity, robots, opponents=None):
+        """
+        Store a vision frame.
+
+        Args:
+            frame (int): Frame number; results are reused while it does not change
+            ball_position (array_like): Ball candidate positions, shape (B, 2) or (2,)
+            ball_velocity (array_like): Ball candidate velocities, same shape
+            robots (dict): Position of each of our robots, by robot id
+            opponents (dict, optional): Position of each opponent robot, by robot id
+        """
+        if frame == self.frame:
+            return
+        opponents = opponents or {}
+        self.frame = frame
+        self.ball_position = np.asarray(ball_position, dtype=float).reshape(-1, 2)
+        self.ball_velocity = np.asarray(ball_velocity, dtype=float).reshape(-1, 2)
+        self.robot_ids = list(robots)
+        self.robots = np.array([robots[r] for r in self.robot_ids], dtype=float).reshape(-1, 2)
+        self._robot_index = {r: i for i, r in enumerate(self.robot_ids)}
+        self.opponent_ids = list(opponents)
+        self.opponents = np.array([opponents[r] for r in self.opponent_ids], dtype=float).reshape(-1, 2)
+        self._opponent_index = {r: i for i, r in enumerate(self.opponent_ids)}
+        self._cache.clear()
+
+    def interception(self):
+        """Interceptions of every ball candidate by every robot, for the current frame"""
+        result = self._cache.get("interception")
+        if result is None:
+            result = self._cache["interception"] = interceptions(
+                self.robots, self.ball_position, self.ball_velocity, self.robot_speed)
+        return result
+
+    def blocking(self):
+        """Blocking positions of every opponent and reach times of every robot, for the current frame"""
+        result = self._cache.get("blocking")
+        if result is None:
+            result = self._cache["blocking"] = blocking(
+                self.robots, self.opponents, self.protect, robot_speed=self.robot_speed)
+        return result
+
+    def interception_point(self, robot, candidate=0):
+        """
+        Interception point of a robot on a ball candidate.
+
+        Returns:
+            tuple or None: ((x, y), time, feasible), None without a frame or
+                if the robot is not in it
+        """
+        i = self._robot_index.get(robot)
+        if self.frame is None or i is None:
+            return None
+        result = self.interception()
+        return tuple(map(float, result.points[i, candidate])), float(result.times[i, candidate]), bool(result.feasible[i, candidate])
+
+    def blocking_point(self, robot, opponent):
+        """
+        Blocking position of a robot against an opponent.
+
+        Returns:
+            tuple or None: ((x, y), travel time), None without a frame or if a
+                robot is not in it
+        """
+        i = self._robot_index.get(robot)
+        j = self._opponent_index.get(opponent)
+        if self.frame is None or i is None or j is None:
+            return None
+        result = self.blocking()
+        return tuple(map(float, result.points[j])), float(result.travel_times[i, j])
+
+
+# Engine fed by the vision loop and used by the task actions.
+ENGINE = KinematicsEngine()
@@ -1,165 +1,40 @@
-from fsm import FSM, State, Transition
-import random
-import robot_actions as ra
+from fsm import FSM
+import json
+import sys
+from fsm_builder import FSM_TEMPLATES, build_fsm, fsm_from_instruction
 
 def create_simple_pass_fsm(target_robot="R2"):
-    initial = State("INITIAL", None)
-    go_to_ball_state = State("GO_TO_BALL", lambda e: ra.go_to_ball("R1"))
-    align_state = State("ALIGN", lambda e: ra.align_with_target("R1", target_robot))
-    pass_state = State("PASS", lambda e: ra.pass_ball("R1", target_robot))
-    success_state = State("SUCCESS", None, is_final=True, is_success=True)
-    failure_state = State("FAILURE", None, is_final=True, is_success=False)
-    
-    t1 = Transition(go_to_ball_state, ra.is_near_ball)
-    t2 = Transition(align_state, ra.is_aligned)
-    t3 = Transition(pass_state, ra.ball_kicked)
-    t4 = Transition(success_state, ra.ball_received, probability=0.85)
-    t5 = Transition(failure_state, lambda e: e == "PASS_FAILED", probability=1.0)
-    
-    initial.add_transition(t1)
-    go_to_ball_state.add_transition(t2)
-    align_state.add_transition(t3)
-    pass_state.add_transition(t4)
-    pass_state.add_transition(t5)
-
-    fsm = FSM(initial)
-    fsm.add_state(go_to_ball_state)
-    fsm.add_state(align_state)
-    fsm.add_state(pass_state)
-    fsm.add_state(success_state)
-    fsm.add_state(failure_state)
-    
-    return fsm
+    """
+    FSM for passing the ball to another robot.
+    """
+    return build_fsm("pass", target_robot=target_robot)
 
 def create_shoot_fsm():
     """
     FSM for shooting at goal.
     """
-    initial = State("INITIAL", None)
-    go_to_ball_state = State("GO_TO_BALL", lambda e: ra.go_to_ball("R1"))
-    align_goal_state = State("ALIGN_GOAL", lambda e: ra.align_with_target("R1", "GOAL"))
-    shoot_state = State("SHOOT", lambda e: ra.kick_ball("R1", power=1.0))
-    goal_state = State("GOAL", None, is_final=True, is_success=True)
-    missed_state = State("MISSED", None, is_final=True, is_success=False)
-    
-    # Create transitions
-    t1 = Transition(go_to_ball_state, ra.is_near_ball)
-    t2 = Transition(align_goal_state, ra.is_aligned)
-    t3 = Transition(shoot_state, ra.ball_kicked)
-    t4 = Transition(goal_state, lambda e: e == "GOAL_SCORED", probability=1.0)  # 100% instead of 70%
-    t5 = Transition(missed_state, lambda e: e == "SHOT_MISSED", probability=1.0)
-    
-    initial.add_transition(t1)
-    go_to_ball_state.add_transition(t2)
-    align_goal_state.add_transition(t3)
-    shoot_state.add_transition(t4)
-    shoot_state.add_transition(t5)
-    
-    fsm = FSM(initial)
-    fsm.add_state(go_to_ball_state)
-    fsm.add_state(align_goal_state)
-    fsm.add_state(shoot_state)
-    fsm.add_state(goal_state)
-    fsm.add_state(missed_state)
-    
-    return fsm
+    return build_fsm("shoot")
 
 def create_block_fsm(target_robot="R3"):
     """
     FSM for blocking an opponent robot.
     """
-    initial = State("INITIAL", None)
-    calc_pos_state = State("CALCULATE_POSITION", lambda e: print(f"Calculating position to block {target_robot}"))
-    go_to_pos_state = State("GO_TO_POSITION", lambda e: print(f"Robot R1 moves to blocking position"))
-    block_state = State("BLOCK", lambda e: ra.block_robot("R1", target_robot))
-    success_state = State("BLOCKING_SUCCESS", None, is_final=True, is_success=True)
-    failure_state = State("BLOCKING_FAILURE", None, is_final=True, is_success=False)
-    
-    t1 = Transition(calc_pos_state, lambda e: e == "START")
-    t2 = Transition(go_to_pos_state, lambda e: e == "POSITION_CALCULATED")
-    t3 = Transition(block_state, lambda e: e == "POSITION_REACHED")
-    t4 = Transition(success_state, lambda e: e == "BLOCKING_EFFECTIVE", probability=0.9)
-    t5 = Transition(failure_state, lambda e: e == "BLOCKING_INEFFECTIVE", probability=1.0)
-
-    initial.add_transition(t1)
-    calc_pos_state.add_transition(t2)
-    go_to_pos_state.add_transition(t3)
-    block_state.add_transition(t4)
-    block_state.add_transition(t5)
-
-    fsm = FSM(initial)
-    fsm.add_state(calc_pos_state)
-    fsm.add_state(go_to_pos_state)
-    fsm.add_state(block_state)
-    fsm.add_state(success_state)
-    fsm.add_state(failure_state)
-    
-    return fsm
+    return build_fsm("block", target_robot=target_robot)
 
 def create_intercept_fsm():
     """
     FSM for intercepting the ball.
     """
-    initial = State("INITIAL", None)
-    calc_trajectory_state = State("CALCULATE_TRAJECTORY", lambda e: print("Calculating ball trajectory"))
-    go_to_intercept_state = State("GO_TO_INTERCEPT_POSITION", lambda e: print("Robot R1 moves to interception position"))
-    intercept_state = State("INTERCEPT", lambda e: print("Robot R1 attempts to intercept the ball"))
-    success_state = State("INTERCEPTION_SUCCESS", None, is_final=True, is_success=True)
-    failure_state = State("INTERCEPTION_FAILURE", None, is_final=True, is_success=False)
-
-    t1 = Transition(calc_trajectory_state, lambda e: e == "START")
-    t2 = Transition(go_to_intercept_state, lambda e: e == "TRAJECTORY_CALCULATED")
-    t3 = Transition(intercept_state, lambda e: e == "INTERCEPT_POSITION_REACHED")
-    t4 = Transition(success_state, lambda e: e == "BALL_INTERCEPTED", probability=0.75)
-    t5 = Transition(failure_state, lambda e: e == "INTERCEPTION_MISSED", probability=1.0)
-    
-    initial.add_transition(t1)
-    calc_trajectory_state.add_transition(t2)
-    go_to_intercept_state.add_transition(t3)
-    intercept_state.add_transition(t4)
-    intercept_state.add_transition(t5)
-    
-    fsm = FSM(initial)
-    fsm.add_state(calc_trajectory_state)
-    fsm.add_state(go_to_intercept_state)
-    fsm.add_state(intercept_state)
-    fsm.add_state(success_state)
-    fsm.add_state(failure_state)
-    
-    return fsm
+    return build_fsm("intercept")
 
 def create_fsm_from_instruction(instruction):
     """
     Creates FSM from a text instruction.
     """
-    instruction = instruction.lower().strip()
-    
-    if "pass" in instruction:
-        # Find target robot (R1, R2, R3, etc.)
-        target = "R2"  # Default
-        for i in range(1, 10):
-            if f"r{i}" in instruction:
-                target = f"R{i}"
-                break
-        return create_pass_fsm(target), f"Pass to robot {target}"
-    
-    elif "shoot" in instruction or "goal" in instruction:
-        return create_shoot_fsm(), "Shoot at goal"
-    
-    elif "block" in instruction:
-        # Find robot to block
-        target = "R3"  # Default
-        for i in range(1, 10):
-            if f"r{i}" in instruction:
-                target = f"R{i}"
-                break
-        return create_block_fsm(target), f"Block robot {target}"
-    
-    elif "intercept" in instruction:
-        return create_intercept_fsm(), "Intercept the ball"
-    
-    else:
+    fsm, description = fsm_from_instruction(instruction)
+    if fsm is None:
         return None, "Unrecognized instruction"
+    return fsm, description
 
 def display_fsm_with_explanation(fsm, action_type):
     """
@@ -217,44 +92,10 @@ def text_visualize_fsm(fsm):
     """
     Visualizes FSM as ASCII text.
     """
+    import render
+
     print("\nFSM Visualization:")
-    
-    initial = fsm.initial_state
-    finals = [state for state in fsm.states.values() if state.is_final]
-    intermediates = [state for state in fsm.states.values() 
-                     if state != initial and state not in finals]
-    
-    print(f"  [{initial.name}]")
-    print("    |")
-    
-    for i, state in enumerate(intermediates):
-        print(f"    v")
-        print(f"  [{state.name}]")
-        if i < len(intermediates) - 1:
-            print("    |")
-    
-    if finals:
-        if len(finals) == 1:
-            print("    |")
-            print("    v")
-            state = finals[0]
-            success = "✓" if state.is_success else "✗"
-            print(f"  [{state.name}] {success}")
-        else:
-            print("    |")
-            print("    +---------+") 
-            
-            success_states = [state for state in finals if state.is_success]
-            if success_states:
-                print("    |         |")
-                print(f"    v         v")
-                state = success_states[0]
-                print(f"  [{state.name}] ✓    [{finals[1].name}] ✗")
-                print("  (Success)   (Failure)")
-            else:
-                print("    |         |")
-                print(f"    v         v")
-                print(f"  [{finals[0].name}]    [{finals[1].name}]")
+    print(render.to_ascii(fsm), end="")
 
 def show_help_and_glossary():
     """
@@ -283,37 +124,49 @@ def show_help_and_glossary():
     
     input("\nPress Enter to return to main menu...")
 
+def get_transition_probability(fsm, target_name):
+    """
+    Returns the probability of the transition leading to a state.
+    """
+    for state in fsm.states.values():
+        for transition in state.transitions:
+            if transition.target_state.name == target_name:
+                return transition.probability
+    return 1.0
+
 def simulate_fsm(fsm, action_type):
     """
     Simulates FSM execution with a predefined sequence of events.
     """
     print(f"\nFSM simulation for: {action_type}")
-    fsm.reset()  
+    # The simulation runs from the initial state; the FSM is put back as it was afterwards
+    snapshot = fsm.snapshot()
+    fsm.reset()
     
     sequences = {
         "Pass": [
             ("NEAR_BALL", "GO_TO_BALL"),
             ("ALIGNED", "ALIGN"),
             ("BALL_KICKED", "PASS"),
-            ("BALL_RECEIVED", "SUCCESS", 0.85)  # Probabilité de 85%
+            ("BALL_RECEIVED", "SUCCESS")
         ],
         "Shoot": [
             ("NEAR_BALL", "GO_TO_BALL"),
             ("ALIGNED", "ALIGN_GOAL"),
             ("BALL_KICKED", "SHOOT"),
-            ("GOAL_SCORED", "GOAL", 0.1)  # Probabilité de 70%
+            ("GOAL_SCORED", "GOAL")
         ],
         "Block": [
             ("START", "CALCULATE_POSITION"),
             ("POSITION_CALCULATED", "GO_TO_POSITION"),
             ("POSITION_REACHED", "BLOCK"),
-            ("BLOCKING_EFFECTIVE", "BLOCKING_SUCCESS", 0.9)  # Probabilité de 90%
+            ("BLOCKING_EFFECTIVE", "BLOCKING_SUCCESS")
         ],
         "Intercept": [
             ("START", "CALCULATE_TRAJECTORY"),
             ("TRAJECTORY_CALCULATED", "GO_TO_INTERCEPT_POSITION"),
             ("INTERCEPT_POSITION_REACHED", "INTERCEPT"),
-            ("BALL_INTERCEPTED", "INTERCEPTION_SUCCESS", 0.75)  # Probabilité de 75%
+            ("BALL_INTERCEPTED", "INTERCEPTION_SUCCESS")
         ]
     }
     
@@ -329,65 +182,49 @@ def simulate_fsm(fsm, action_type):
         sequence = sequences["Pass"]
     
     print("\nProposed event sequence:")
-    for i, event_info in enumerate(sequence):
-        if len(event_info) == 2:
-            event, next_state = event_info
-            print(f"{i+1}. {event} -> {next_state}")
-        else:
-            event, next_state, prob = event_info
+    for i, (event, next_state) in enumerate(sequence):
+        prob = get_transition_probability(fsm, next_state)
+        if prob < 1.0:
             print(f"{i+1}. {event} -> {next_state} (Probability: {prob*100:.0f}%)")
+        else:
+            print(f"{i+1}. {event} -> {next_state}")
     
     print("\nPress Enter to progress in the simulation, or type 'q' to quit.")
     
-    for event_info in sequence:
-        if len(event_info) == 2:
-            event, expected_state = event_info
-            prob = None
-        else:
-            event, expected_state, prob = event_info
-        
-        input_val = input(f"\nPress Enter to send event '{event}', or type 'q' to quit: ")
-        
-        if input_val.lower() == 'q':
-            print("Simulation stopped.")
-            break
-        
-        print(f"Event sent: {event}")
-        
-        force_failure_state = False
-        failure_state_name = None
-        
-        if prob and event in ["BALL_RECEIVED", "GOAL_SCORED", "BLOCKING_EFFECTIVE", "BALL_INTERCEPTED"]:
-            import random
-            random.seed()  
-            success_roll = random.random()
+    # The FSM draws probabilistic outcomes itself, using its transition probabilities
+    stochastic = fsm.stochastic
+    fsm.stochastic = True
+    try:
+        for event, expected_state in sequence:
+            input_val = input(f"\nPress Enter to send event '{event}', or type 'q' to quit: ")
+            
+            if input_val.lower() == 'q':
+                print("Simulation stopped.")
+                break
+            
+            print(f"Event sent: {event}")
+            
+            prob = get_transition_probability(fsm, expected_state)
+            if prob >= 1.0:
+                fsm.process_event(event)
+                continue
+            
             print(f"Probability check: {prob*100:.0f}% chance of success")
-            print(f"Random roll: {success_roll*100:.2f}%")
+            # Without a specific event, every outgoing transition competes
+            fsm.process_event(None)
             
-            if success_roll < prob:
-                print(f"Result: Success! The action will succeed")
+            if fsm.current_state.name == expected_state:
+                print(f"Result: Success! The action succeeded")
             else:
-                print(f"Result: Failure! The action will fail")
-                failure_state_mapping = {
-                    "BALL_RECEIVED": "FAILURE",
-                    "GOAL_SCORED": "MISSED",
-                    "BLOCKING_EFFECTIVE": "BLOCKING_FAILURE",
-                    "BALL_INTERCEPTED": "INTERCEPTION_FAILURE"
-                }
-                
-                force_failure_state = True
-                failure_state_name = failure_state_mapping.get(event, None)
-                expected_state = failure_state_name
-        
-        fsm.process_event(event)
-        
-        if force_failure_state and failure_state_name and failure_state_name in fsm.states:
-            print("-" * 50)
-            print(f"Action performed: {fsm.current_state.name}")
-            print(f"Outcome: Failed")
-            print(f"Transitioning to: {failure_state_name}")
-            print("-" * 50)
-            fsm.current_state = fsm.states[failure_state_name]
+                print(f"Result: Failure! The action failed")
+                print("-" * 50)
+                print(f"Outcome: Failed")
+                print(f"Transitioned to: {fsm.current_state.name}")
+                print("-" * 50)
+    finally:
+        fsm.stochastic = stochastic
+        fsm.restore(snapshot)
+
 def export_fsm_to_text(fsm, filename="fsm_export.txt"):
     """
     Exports FSM to text format.
@@ -523,5 +360,243 @@ def main():
         else:
             print("Invalid option. Please try again.")
 
+def _read_lines(path):
+    """
+    Non-empty lines of a text file ("-" for stdin), without '#' comments.
+    """
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def _load_fsm(args):
+    """
+    Builds the FSM selected by the --instruction/--action/--load options.
+    """
+    if args.instruction:
+        fsm, description = create_fsm_from_instruction(args.instruction)
+        if fsm is None:
+            raise SystemExit(f"error: {description}: {args.instruction!r}")
+        return fsm, description
+    if args.load:
+        return FSM.load(args.load), args.load
+    params = {"target_robot": args.target_robot} if args.target_robot else {}
+    return FSM_TEMPLATES.instance(args.action, **params), args.action
+
+def _emit(data, args):
+    """
+    Writes one JSON document to the output of the command.
+    """
+    print(json.dumps(data, indent=args.indent, default=str), file=args.output)
+
+def cmd_generate(args):
+    """
+    Builds the FSM of every instruction, one JSON line (or rendering) each.
+    """
+    import serialization
+
+    instructions = list(args.instructions)
+    if args.file:
+        instructions += _read_lines(args.file)
+    if not instructions:
+        raise SystemExit("error: no instruction given")
+
+    failures = 0
+    for instruction in instructions:
+        fsm, description = create_fsm_from_instruction(instruction)
+        if fsm is None:
+            failures += 1
+            _emit({"instruction": instruction, "error": description}, args)
+        elif args.format == "json":
+            _emit({"instruction": instruction, "description": description,
+                   "fsm": serialization.fsm_to_dict(fsm)}, args)
+        else:
+            import render
+            render.render(fsm, args.format, out=args.output)
+    return 1 if failures else 0
+
+def cmd_simulate(args):
+    """
+    Runs an FSM on an event file, replays a multi-robot log, or estimates
+    its outcome probabilities by Monte Carlo.
+    """
+    import contextlib
+
+    fsm, description = _load_fsm(args)
+
+    if args.log:
+        import replay
+
+        # Replays may last hours: robots keep no history, only their current state
+        factory = lambda robot: fsm.spawn(history="off")
+        with contextlib.redirect_stdout(sys.stderr):
+            for change in replay.replay(replay.open_log(args.log), factory,
+                                        restart_on_final=args.restart_on_final):
+                print(json.dumps(change._asdict()), file=args.output)
+        return 0
+
+    if args.events:
+        # Actions print to stdout, keep it for the machine-readable output
+        with contextlib.redirect_stdout(sys.stderr):
+            for event in _read_lines(args.events):
+                if fsm.process_event(event):
+                    break
+        state = fsm.current_state
+        _emit({"fsm": description, "history": list(fsm.history), "state": state.name,
+               "is_final": state.is_final, "is_success": state.is_success}, args)
+        return 0
+
+    if args.exact:
+        result = fsm.absorption_analysis()
+    else:
+        import simulation
+
+        result = simulation.simulate(fsm, args.rollouts, max_steps=args.max_steps, seed=args.seed)
+    _emit({"fsm": description, **result.as_dict()}, args)
+    return 0
+
+def cmd_export(args):
+    """
+    Writes an FSM as JSON, binary, text, DOT, Mermaid or ASCII.
+    """
+    fsm, _ = _load_fsm(args)
+    if args.format in ("json", "binary"):
+        if args.path is None:
+            raise SystemExit(f"error: --format {args.format} needs an output path")
+        if args.format == "binary" and args.path.endswith(".json"):
+            raise SystemExit("error: binary exports cannot use the .json extension")
+        import serialization
+
+        if args.format == "json" and not args.path.endswith(".json"):
+            with open(args.path, "w") as f:
+                f.write(serialization.dumps_json(fsm, indent=2))
+        else:
+            serialization.save(fsm, args.path)
+    elif args.format == "text":
+        export_fsm_to_text(fsm, args.path or "fsm_export.txt")
+    else:
+        import render
+
+        if args.path is None:
+            render.render(fsm, args.format, out=args.output)
+        else:
+            with open(args.path, "w") as f:
+                render.render(fsm, args.format, out=f)
+    return 0
+
+def cmd_analyze(args):
+    """
+    Reports validation issues, exact absorption statistics and the minimized size of an FSM.
+    """
+    fsm, description = _load_fsm(args)
+    report = {"fsm": description, "validation": fsm.validate().as_dict()}
+    try:
+        report["minimized_states"] = len(fsm.minimize().state_list())
+    except ValueError as error:
+        report["minimized_states"] = None
+        report["minimize_error"] = str(error)
+    if not args.no_markov:
+        report["absorption"] = fsm.absorption_analysis().as_dict()
+    _emit(report, args)
+    return 1 if args.strict and report["validation"]["issues"] else 0
+
+def cmd_bench(args):
+    """
+    Runs the benchmark suite (benchmarks.py) with the remaining arguments.
+    """
+    import benchmarks
+
+    return benchmarks.main_cli(args.extra)
+
+def _add_fsm_arguments(parser):
+    """
+    Options selecting the FSM a command works on.
+    """
+    from instruction_parser import INSTRUCTION_MAPPING
+
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("-i", "--instruction", help="build the FSM from a text instruction")
+    source.add_argument("-a", "--action", choices=sorted(INSTRUCTION_MAPPING), default="pass",
+                        help="build the FSM of an action (default: pass)")
+    source.add_argument("--load", metavar="PATH", help="load an FSM saved as JSON or binary")
+    parser.add_argument("--target-robot", help="target robot of --action (e.g. R4)")
+
+def build_arg_parser():
+    """
+    Command-line interface; without a subcommand the interactive menu is started.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Robotic action planning system for RoboCup SSL")
+    parser.add_argument("--indent", type=int, default=None, help="indentation of the JSON output")
+    parser.add_argument("-o", "--output", type=argparse.FileType("w"), default=sys.stdout,
+                        help="write the output to a file instead of stdout")
+    commands = parser.add_subparsers(dest="command")
+
+    generate = commands.add_parser("generate", help="build FSMs from instructions")
+    generate.add_argument("instructions", nargs="*", help="text instructions")
+    generate.add_argument("-f", "--file", help="file with one instruction per line ('-' for stdin)")
+    generate.add_argument("--format", choices=["json", "ascii", "dot", "mermaid"], default="json")
+    generate.set_defaults(handler=cmd_generate)
+
+    simulate = commands.add_parser("simulate", help="run an FSM on events or estimate its outcomes")
+    _add_fsm_arguments(simulate)
+    simulate.add_argument("-e", "--events", help="file with one event per line ('-' for stdin)")
+    simulate.add_argument("--log", help="multi-robot event log (.jsonl, .csv or binary) to replay")
+    simulate.add_argument("--restart-on-final", action="store_true",
+                          help="with --log, restart a robot's FSM once it is finished")
+    simulate.add_argument("-n", "--rollouts", type=int, default=10000, help="Monte Carlo rollouts")
+    simulate.add_argument("--max-steps", type=int, default=100, help="maximum events per rollout")
+    simulate.add_argument("--seed", type=int, default=None, help="random seed")
+    simulate.add_argument("--exact", action="store_true", help="solve the Markov chain instead of sampling")
+    simulate.set_defaults(handler=cmd_simulate)
+
+    export = commands.add_parser("export", help="save or render an FSM")
+    _add_fsm_arguments(export)
+    export.add_argument("--format", choices=["json", "binary", "text", "ascii", "dot", "mermaid"],
+                        default="json")
+    export.add_argument("path", nargs="?", help="output file (renderings go to stdout by default)")
+    export.set_defaults(handler=cmd_export)
+
+    analyze = commands.add_parser("analyze", help="validate and analyse an FSM")
+    _add_fsm_arguments(analyze)
+    analyze.add_argument("--no-markov", action="store_true", help="skip the absorption analysis")
+    analyze.add_argument("--strict", action="store_true", help="exit with status 1 if issues are found")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    bench = commands.add_parser("bench", help="run the benchmark suite (other arguments go to benchmarks.py)")
+    bench.set_defaults(handler=cmd_bench)
+    return parser
+
+def cli(argv=None):
+    """
+    Entry point: runs a subcommand, or the interactive menu when none is given.
+    """
+    parser = build_arg_parser()
+    args, extra = parser.parse_known_args(argv)
+    args.extra = extra
+    # Opened by argparse for -o; stdout stays open
+    close_output = args.output is not sys.stdout and args.output is not sys.__stdout__
+    try:
+        if args.extra and args.command != "bench":
+            parser.error(f"unrecognized arguments: {' '.join(args.extra)}")
+        if args.command is None:
+            main()
+            return 0
+        return args.handler(args)
+    except BrokenPipeError:
+        # The reader of the output went away (e.g. piped into head)
+        sys.stdout = None
+        return 1
+    finally:
+        if close_output:
+            args.output.close()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(cli())
\ No newline at end of file
@@ -0,0 +1,198 @@
+import numpy as np
+
+# Above this number of transient states the sparse solver is used by default.
+SPARSE_THRESHOLD = 200
+
+
+def _policy_event(policy, state_name):
+    if policy is None:
+        return None
+    if callable(policy):
+        return policy(state_name)
+    return policy.get(state_name)
+
+
+def outcome_rows(fsm, policy=None):
+    """
+    Convert an FSM into the rows of its Markov chain.
+
+    FSMs with composite states are analysed in their flattened form.
+
+    Args:
+        fsm (FSM): FSM to convert
+        policy (dict or callable, optional): Event emitted in each state, by state
+            name. States without an event (or a None policy) let every outgoing
+            transition compete, see State.outcomes.
+
+    Returns:
+        tuple: (states, rows) where rows[i] is a list of (target id, probability)
+            summing to 1; final states are absorbing
+    """
+    if fsm.has_composites():
+        fsm = fsm.flatten()
+    states = fsm.state_list()
+    index = {id(state): i for i, state in enumerate(states)}
+
+    rows = []
+    for i, state in enumerate(states):
+        if state.is_final:
+            rows.append([(i, 1.0)])
+            continue
+        outcomes = state.outcomes(_policy_event(policy, state.name))
+        row = [(index[id(t.target_state)], mass) for t, mass in outcomes]
+        residual = 1.0 - sum(mass for _, mass in row)
+        if residual > 1e-12 or not row:
+            row.append((i, max(residual, 0.0)))
+        rows.append(row)
+    return states, rows
+
+
+class AbsorptionAnalysis:
+    def __init__(self, state_names, visits, absorption, trapped_probability, success_states):
+        """
+        Exact absorption statistics of an FSM, starting from its initial state.
+
+        Args:
+            state_names (list): Name of each state id
+            visits (dict): Expected number of events processed in each non-final state
+            absorption (dict): Probability of ending in each final state
+            trapped_probability (float): Probability of never reaching a final state
+            success_states (set): Names of the success final states
+        """
+        self.state_names = state_names
+        self.visits = visits
+        self.absorption = absorption
+        self.trapped_probability = trapped_probability
+        self.success_states = success_states
+
+    @property
+    def success_probability(self):
+        """Probability of ending in a success state"""
+        return sum(p for name, p in self.absorption.items() if name in self.success_states)
+
+    @property
+    def failure_probability(self):
+        """Probability of ending in a failure state"""
+        return sum(p for name, p in self.absorption.items() if name not in self.success_states)
+
+    @property
+    def expected_steps(self):
+        """Expected number of events before absorption (inf if the FSM can get stuck)"""
+        if self.trapped_probability > 1e-12:
+            return float("inf")
+        return sum(self.visits.values())
+
+    def as_dict(self):
+        """Plain-Python summary of the analysis"""
+        return {
+            "success_probability": self.success_probability,
+            "failure_probability": self.failure_probability,
+            "trapped_probability": self.trapped_probability,
+            "expected_steps": self.expected_steps,
+            "absorption": dict(self.absorption),
+            "visits": dict(self.visits),
+        }
+
+    def __str__(self):
+        return (f"AbsorptionAnalysis(success={self.success_probability:.4f}, "
+                f"failure={self.failure_probability:.4f}, steps={self.expected_steps:.2f})")
+
+
+def _can_reach_final(states, rows):
+    """Ids of the states from which some final state is reachable"""
+    predecessors = [[] for _ in states]
+    for i, row in enumerate(rows):
+        for target, mass in row:
+            if mass > 0 and target != i:
+                predecessors[target].append(i)
+    live = {i for i, state in enumerate(states) if state.is_final}
+    stack = list(live)
+    while stack:
+        for source in predecessors[stack.pop()]:
+            if source not in live:
+                live.add(source)
+                stack.append(source)
+    return live
+
+
+def analyze(fsm, policy=None, sparse=None):
+    """
+    Solve the FSM as an absorbing Markov chain.
+
+    With Q the transient-to-transient block of the chain, the expected visit
+    counts from the initial state solve (I - Q)^T v = e_initial; absorption
+    probabilities and the expected number of steps follow from v. States that
+    cannot reach any final state are left out of the system and their mass is
+    reported as trapped_probability.
+
+    Args:
+        fsm (FSM): FSM to analyse
+        policy (dict or callable, optional): Event emitted in each state, by state name
+        sparse (bool, optional): Use scipy.sparse; by default only for large FSMs
+
+    Returns:
+        AbsorptionAnalysis: Absorption probabilities, expected steps and visits
+    """
+    states, rows = outcome_rows(fsm, policy)
+    names = [state.name for state in states]
+    success_states = {state.name for state in states if state.is_final and state.is_success}
+    finals = [i for i, state in enumerate(states) if state.is_final]
+
+    if states[0].is_final:
+        absorption = {names[i]: float(i == 0) for i in finals}
+        return AbsorptionAnalysis(names, {}, absorption, 0.0, success_states)
+
+    live = _can_reach_final(states, rows)
+    if 0 not in live:
+        absorption = {names[i]: 0.0 for i in finals}
+        return AbsorptionAnalysis(names, {names[0]: float("inf")}, absorption, 1.0, success_states)
+
+    transient = [i for i in range(len(states)) if i in live and not states[i].is_final]
+    position = {state_id: k for k, state_id in enumerate(transient)}
+    n = len(transient)
+
+    # A = (I - Q)^T, assembled as coordinate triplets
+    rows_idx, cols_idx, values = list(range(n)), list(range(n)), [1.0] * n
+    exits = []
+    for k, state_id in enumerate(transient):
+        for target, mass in rows[state_id]:
+            if target in position:
+                rows_idx.append(position[target])
+                cols_idx.append(k)
+                values.append(-mass)
+            elif states[target].is_final:
+                exits.append((k, target, mass))
+
+    rhs = np.zeros(n)
+    rhs[position[0]] = 1.0
+
+    if sparse is None:
+        sparse = n > SPARSE_THRESHOLD
+    if sparse:
+        from scipy.sparse import csc_matrix
+        from scipy.sparse.linalg import spsolve
+
+        matrix = csc_matrix((values, (rows_idx, cols_idx)), shape=(n, n))
+        visits = np.atleast_1d(spsolve(matrix, rhs))
+    else:
+        matrix = np.zeros((n, n))
+        np.add.at(matrix, (rows_idx, cols_idx), values)
+        visits = np.linalg.solve(matrix, rhs)
+
+    absorption = {names[i]: 0.0 for i in finals}
+    for k, target, mass in exits:
+        absorption[names[target]] += float(visits[k] * mass)
+
+    trapped = max(0.0, 1.0 - sum(absorption.values()))
+    visit_counts = {names[state_id]: float(visits[k]) for k, state_id in enumerate(transient)}
+    if trapped > 1e-12:
+        stack, reached = [0], {0}
+        while stack:
+            for target, mass in rows[stack.pop()]:
+                if mass > 0 and target not in reached:
+                    reached.add(target)
+                    stack.append(target)
+        for i in reached:
+            if i not in live:
+                visit_counts[names[i]] = float("inf")
+    return AbsorptionAnalysis(names, visit_counts, absorption, trapped, success_states)
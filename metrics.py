@@ -0,0 +1,169 @@
+import math
+from collections import Counter
+from time import perf_counter
+
+# Upper bound of the first histogram bucket, in seconds (1 µs); each next bucket doubles it.
+BUCKET_BASE = 1e-6
+BUCKET_COUNT = 32
+
+
+class LatencyHistogram:
+    def __init__(self):
+        """
+        Histogram of durations over log2 buckets.
+
+        Bucket i counts durations up to BUCKET_BASE * 2**i; the last bucket
+        also holds everything above.
+        """
+        self.buckets = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, duration):
+        """Add one duration, in seconds"""
+        ticks = duration / BUCKET_BASE
+        index = 0 if ticks <= 1 else min(math.ceil(math.log2(ticks)), BUCKET_COUNT - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """
+        Estimate a percentile from the buckets.
+
+        Args:
+            q (float): Percentile between 0 and 100
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile (capped by
+                the largest recorded duration), 0.0 if the histogram is empty
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(BUCKET_BASE * 2 ** i, self.max)
+        return self.max
+
+    def as_dict(self):
+        """Summary of the histogram with non-empty buckets keyed by their upper bound"""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": {BUCKET_BASE * 2 ** i: n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class MetricsCollector:
+    def __init__(self, clock=perf_counter):
+        """
+        FSM observer collecting counters and latency histograms.
+
+        Register it with FSM.add_observer; one collector may observe several
+        FSMs, whose metrics are then merged by state name (entry times and
+        transition sources are tracked per FSM).
+
+        Counters: visits (entries per state), transitions per (source, target)
+        pair and unmatched events per (state, event) pair. Histograms: action
+        duration and dwell time (time between entering and leaving) per state.
+
+        Args:
+            clock (callable): Time source for dwell times, in seconds
+        """
+        self.clock = clock
+        self.visits = Counter()
+        self.transitions = Counter()
+        self.unmatched = Counter()
+        self.action_latency = {}
+        self.dwell_time = {}
+        self._entered = {}
+        self._last_exit = {}
+
+    def _histogram(self, table, name):
+        histogram = table.get(name)
+        if histogram is None:
+            histogram = table[name] = LatencyHistogram()
+        return histogram
+
+    def on_action(self, fsm, state, event, duration):
+        self._histogram(self.action_latency, state.name).record(duration)
+
+    def on_exit(self, fsm, state, event):
+        now = self.clock()
+        entered = self._entered.get(id(fsm))
+        # Only measure from an entry into this very state (not from before a reset or restore)
+        if entered is not None and entered[0] is state:
+            self._histogram(self.dwell_time, state.name).record(now - entered[1])
+        self._last_exit[id(fsm)] = state.name
+
+    def on_enter(self, fsm, state, event):
+        self.visits[state.name] += 1
+        self.transitions[self._last_exit.pop(id(fsm), None), state.name] += 1
+        self._entered[id(fsm)] = (state, self.clock())
+
+    def on_reset(self, fsm, state):
+        self._entered[id(fsm)] = (state, self.clock())
+        self._last_exit.pop(id(fsm), None)
+
+    def on_unmatched(self, fsm, state, event):
+        self.unmatched[state.name, event] += 1
+
+    def reset(self):
+        """Clear every counter and histogram"""
+        self.__init__(self.clock)
+
+    def export(self):
+        """
+        Export the collected metrics as plain data.
+
+        Returns:
+            dict: "visits", "transitions" (keys "SOURCE->TARGET"), "unmatched"
+                (keys "STATE:EVENT"), "action_latency" and "dwell_time"
+                (histogram summaries by state name)
+        """
+        return {
+            "visits": dict(self.visits),
+            "transitions": {f"{source}->{target}": n for (source, target), n in self.transitions.items()},
+            "unmatched": {f"{state}:{event}": n for (state, event), n in self.unmatched.items()},
+            "action_latency": {name: h.as_dict() for name, h in self.action_latency.items()},
+            "dwell_time": {name: h.as_dict() for name, h in self.dwell_time.items()},
+        }
+
+    def report(self):
+        """
+        Format the metrics as a text table.
+
+        Returns:
+            str: One line per state with visits, action and dwell statistics
+        """
+        names = sorted(set(self.visits) | set(self.action_latency) | set(self.dwell_time))
+        lines = [f"{'STATE':<28}{'VISITS':>8}{'ACTIONS':>9}{'ACT p50':>11}{'ACT p99':>11}{'DWELL mean':>12}"]
+        empty = LatencyHistogram()
+        for name in names:
+            action = self.action_latency.get(name, empty)
+            dwell = self.dwell_time.get(name, empty)
+            lines.append(f"{name:<28}{self.visits[name]:>8}{action.count:>9}"
+                         f"{action.percentile(50) * 1e6:>9.1f}us{action.percentile(99) * 1e6:>9.1f}us"
+                         f"{dwell.mean * 1e3:>10.2f}ms")
+        if self.unmatched:
+            lines.append("Unmatched events:")
+            for (state, event), n in self.unmatched.most_common():
+                lines.append(f"  {state} <- {event}: {n}")
+        return "\n".join(lines)
@@ -0,0 +1,263 @@
+import io
+
+# Marks appended to the name of final states in text renderings.
+SUCCESS_MARK = "✓"
+FAILURE_MARK = "✗"
+
+
+def _states(fsm):
+    if fsm.has_composites():
+        fsm = fsm.flatten()
+    return fsm.state_list()
+
+
+def _condition_label(transition):
+    event = transition.event
+    if event is not None:
+        return event
+    name = getattr(transition.condition, "__name__", "")
+    return name if name and name != "<lambda>" else "<guard>"
+
+
+def _edge_label(transition, extra=None):
+    label = _condition_label(transition)
+    if transition.probability < 1.0:
+        label += f" {transition.probability * 100:.0f}%"
+    if extra:
+        label += f" [{extra}]"
+    return label
+
+
+def _format_value(value):
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+
+def annotations(stats):
+    """
+    Convert statistics into labels for the renderers.
+
+    Args:
+        stats: None, a dict of values by state name, a metrics.MetricsCollector
+            (visits and transition counts), a markov.AbsorptionAnalysis (expected
+            visits and absorption probabilities) or a simulation.SimulationResult
+            (share of rollouts ending in each final state)
+
+    Returns:
+        tuple: (label by state name, label by (source, target) state names)
+    """
+    if stats is None:
+        return {}, {}
+    if isinstance(stats, dict):
+        return {name: _format_value(value) for name, value in stats.items()}, {}
+    if hasattr(stats, "transitions") and hasattr(stats, "visits"):
+        return ({name: f"visits={n}" for name, n in stats.visits.items()},
+                {key: f"n={n}" for key, n in stats.transitions.items()})
+    if hasattr(stats, "absorption"):
+        labels = {name: f"visits={v:.2f}" for name, v in stats.visits.items()}
+        labels.update({name: f"p={p:.1%}" for name, p in stats.absorption.items()})
+        return labels, {}
+    if hasattr(stats, "terminal_histogram"):
+        total = stats.n_rollouts or 1
+        return {name: f"{count / total:.1%}" for name, count in stats.terminal_histogram.items()}, {}
+    raise TypeError(f"Unsupported statistics: {type(stats).__name__}")
+
+
+def _output(out):
+    return out if out is not None else io.StringIO()
+
+
+def _result(out, buffer):
+    return buffer.getvalue() if out is None else None
+
+
+def _dot_string(*lines):
+    escaped = (line.replace("\\", "\\\\").replace('"', '\\"') for line in lines)
+    return '"' + "\\n".join(escaped) + '"'
+
+
+def to_dot(fsm, stats=None, out=None, name="FSM"):
+    """
+    Render an FSM as a Graphviz DOT digraph.
+
+    Final states are drawn as double circles (green for success, red for
+    failure); the initial state has a bold outline.
+
+    Args:
+        fsm (FSM): FSM to render (composites are flattened)
+        stats (optional): Statistics to annotate states and transitions with (see annotations)
+        out (file, optional): Text stream to write to
+        name (str): Graph name
+
+    Returns:
+        str or None: The DOT source if out is None, None otherwise
+    """
+    buffer = _output(out)
+    write = buffer.write
+    states = _states(fsm)
+    index = {id(state): i for i, state in enumerate(states)}
+    state_labels, edge_labels = annotations(stats)
+
+    write(f"digraph {_dot_string(name)} {{\n  rankdir=LR;\n  node [shape=box, style=rounded];\n")
+    for i, state in enumerate(states):
+        lines = [state.name]
+        if state.name in state_labels:
+            lines.append(state_labels[state.name])
+        attributes = [f"label={_dot_string(*lines)}"]
+        if state.is_final:
+            color = "darkgreen" if state.is_success else "firebrick"
+            attributes += ["shape=doublecircle", f"color={color}"]
+        if i == 0:
+            attributes.append("penwidth=2")
+        write(f"  s{i} [{', '.join(attributes)}];\n")
+    for i, state in enumerate(states):
+        for transition in state.transitions:
+            target = transition.target_state
+            label = _edge_label(transition, edge_labels.get((state.name, target.name)))
+            write(f"  s{i} -> s{index[id(target)]} [label={_dot_string(label)}];\n")
+    write("}\n")
+    return _result(out, buffer)
+
+
+def _mermaid_text(text):
+    return text.replace('"', "'").replace(":", " ")
+
+
+def to_mermaid(fsm, stats=None, out=None):
+    """
+    Render an FSM as a Mermaid stateDiagram-v2.
+
+    States get synthetic ids (s0, s1, ...) so any state name can be displayed.
+
+    Args:
+        fsm (FSM): FSM to render (composites are flattened)
+        stats (optional): Statistics to annotate states and transitions with (see annotations)
+        out (file, optional): Text stream to write to
+
+    Returns:
+        str or None: The Mermaid source if out is None, None otherwise
+    """
+    buffer = _output(out)
+    write = buffer.write
+    states = _states(fsm)
+    index = {id(state): i for i, state in enumerate(states)}
+    state_labels, edge_labels = annotations(stats)
+
+    write("stateDiagram-v2\n")
+    for i, state in enumerate(states):
+        label = state.name
+        if state.name in state_labels:
+            label += f" ({state_labels[state.name]})"
+        write(f'    state "{_mermaid_text(label)}" as s{i}\n')
+    write("    [*] --> s0\n")
+    for i, state in enumerate(states):
+        for transition in state.transitions:
+            target = transition.target_state
+            label = _edge_label(transition, edge_labels.get((state.name, target.name)))
+            write(f"    s{i} --> s{index[id(target)]} : {_mermaid_text(label)}\n")
+        if state.is_final:
+            write(f"    s{i} --> [*]\n")
+    return _result(out, buffer)
+
+
+def layers(states):
+    """
+    Assign every state to a layer: its distance in transitions from the initial state.
+
+    States that cannot be reached from the initial state go to one extra layer.
+
+    Args:
+        states (list): States, initial state first (as returned by FSM.state_list)
+
+    Returns:
+        list: Lists of state ids, one per layer
+    """
+    index = {id(state): i for i, state in enumerate(states)}
+    depth = {0: 0}
+    frontier = [0]
+    result = [[0]]
+    while frontier:
+        following = []
+        for i in frontier:
+            for transition in states[i].transitions:
+                j = index[id(transition.target_state)]
+                if j not in depth:
+                    depth[j] = len(result)
+                    following.append(j)
+        if following:
+            result.append(following)
+        frontier = following
+    unreachable = [i for i in range(len(states)) if i not in depth]
+    if unreachable:
+        result.append(unreachable)
+    return result
+
+
+def _node(state, labels):
+    text = f"[{state.name}]"
+    if state.is_final:
+        text += " " + (SUCCESS_MARK if state.is_success else FAILURE_MARK)
+    if state.name in labels:
+        text += f" ({labels[state.name]})"
+    return text
+
+
+def to_ascii(fsm, stats=None, out=None):
+    """
+    Render an FSM as text, one layer of states per row.
+
+    Layers follow the distance from the initial state. Under each layer,
+    every outgoing transition is listed as "EVENT ---> [TARGET]"; targets
+    that are not in a later layer (loops and transitions back up) are marked
+    with "^". Works for any graph: branches, several finals and cycles.
+
+    Args:
+        fsm (FSM): FSM to render (composites are flattened)
+        stats (optional): Statistics to annotate states and transitions with (see annotations)
+        out (file, optional): Text stream to write to
+
+    Returns:
+        str or None: The text rendering if out is None, None otherwise
+    """
+    buffer = _output(out)
+    write = buffer.write
+    states = _states(fsm)
+    index = {id(state): i for i, state in enumerate(states)}
+    state_labels, edge_labels = annotations(stats)
+    rows = layers(states)
+    layer_of = {i: k for k, row in enumerate(rows) for i in row}
+
+    edges = []
+    for k, row in enumerate(rows):
+        for i in row:
+            state = states[i]
+            for transition in state.transitions:
+                target = transition.target_state
+                label = _edge_label(transition, edge_labels.get((state.name, target.name)))
+                edges.append((k, state.name, label, target, layer_of[index[id(target)]] <= k))
+    width = max((len(label) for _, _, label, _, _ in edges), default=0) + 4
+    source_width = max((len(source) for _, source, _, _, _ in edges), default=0)
+
+    position = 0
+    for k, row in enumerate(rows):
+        write(f"L{k:<3}" + "   ".join(_node(states[i], state_labels) for i in row) + "\n")
+        while position < len(edges) and edges[position][0] == k:
+            _, source, label, target, back = edges[position]
+            arrow = f"{label} ".ljust(width, "-") + "> "
+            write(f"      {source:<{source_width}}  {arrow}{'^' if back else ''}{_node(target, {})}\n")
+            position += 1
+    return _result(out, buffer)
+
+
+RENDERERS = {"ascii": to_ascii, "dot": to_dot, "mermaid": to_mermaid}
+
+
+def render(fsm, fmt="ascii", stats=None, out=None):
+    """
+    Render an FSM in one of the RENDERERS formats ("ascii", "dot" or "mermaid").
+
+    Returns:
+        str or None: The rendering if out is None, None otherwise
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {sorted(RENDERERS)}")
+    return RENDERERS[fmt](fsm, stats=stats, out=out)
@@ -0,0 +1,199 @@
+import csv
+import json
+import struct
+from collections import namedtuple
+
+from events import EVENTS, normalize
+
+LOG_MAGIC = b"EVLG"
+LOG_VERSION = 1
+
+_LOG_HEADER = struct.Struct("<4sHHH")  # magic, version, robots, events
+_LENGTH = struct.Struct("<H")
+_RECORD = struct.Struct("<dHH")  # timestamp, robot code, event code
+_RECORDS_PER_READ = 4096
+
+Record = namedtuple("Record", ["timestamp", "robot", "event"])
+StateChange = namedtuple("StateChange", ["timestamp", "robot", "event", "source", "target", "is_final"])
+
+
+def _open(source, mode):
+    """Return (file, should_close) for a path or an already open file"""
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        return open(source, mode), True
+    return source, False
+
+
+def read_jsonl(source):
+    """
+    Stream records from a JSON Lines log.
+
+    Each line is an object with "t" (or "timestamp"), "robot" and "event".
+
+    Args:
+        source (str or file): Path or text file
+
+    Yields:
+        Record: One record per non-empty line
+    """
+    f, close = _open(source, "r")
+    try:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                yield Record(float(data.get("t", data.get("timestamp", 0.0))), data["robot"], data["event"])
+    finally:
+        if close:
+            f.close()
+
+
+def read_csv(source):
+    """
+    Stream records from a CSV log with columns timestamp, robot, event.
+
+    A header row starting with "timestamp" is skipped.
+
+    Args:
+        source (str or file): Path or text file
+
+    Yields:
+        Record: One record per row
+    """
+    f, close = _open(source, "r")
+    try:
+        for row in csv.reader(f):
+            if not row or row[0] == "timestamp":
+                continue
+            yield Record(float(row[0]), row[1], row[2])
+    finally:
+        if close:
+            f.close()
+
+
+def _write_symbols(f, symbols):
+    for symbol in symbols:
+        encoded = symbol.encode("utf-8")
+        f.write(_LENGTH.pack(len(encoded)))
+        f.write(encoded)
+
+
+def _read_symbols(f, count):
+    symbols = []
+    for _ in range(count):
+        (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        symbols.append(f.read(length).decode("utf-8"))
+    return symbols
+
+
+def write_binary_log(target, records, robots, events):
+    """
+    Write records to the binary log format.
+
+    Layout: header, robot and event symbol tables, then fixed-size
+    (timestamp, robot code, event code) records.
+
+    Args:
+        target (str or file): Path or binary file
+        records (iterable): Records to write
+        robots (list): Every robot id appearing in the records
+        events (list): Every event name appearing in the records
+    """
+    robot_codes = {robot: i for i, robot in enumerate(robots)}
+    event_codes = {event: i for i, event in enumerate(events)}
+    f, close = _open(target, "wb")
+    try:
+        f.write(_LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, len(robots), len(events)))
+        _write_symbols(f, robots)
+        _write_symbols(f, events)
+        buffer = bytearray()
+        for timestamp, robot, event in records:
+            buffer += _RECORD.pack(timestamp, robot_codes[robot], event_codes[event])
+            if len(buffer) >= _RECORD.size * _RECORDS_PER_READ:
+                f.write(buffer)
+                buffer.clear()
+        f.write(buffer)
+    finally:
+        if close:
+            f.close()
+
+
+def read_binary(source):
+    """
+    Stream records from a binary log written by write_binary_log.
+
+    Events are yielded as codes of the shared events.EVENTS registry, which
+    FSM.process_event accepts directly.
+
+    Args:
+        source (str or file): Path or binary file
+
+    Yields:
+        Record: One record per entry of the log
+    """
+    f, close = _open(source, "rb")
+    try:
+        magic, version, n_robots, n_events = _LOG_HEADER.unpack(f.read(_LOG_HEADER.size))
+        if magic != LOG_MAGIC:
+            raise ValueError("Not a binary event log")
+        if version != LOG_VERSION:
+            raise ValueError(f"Unsupported event log version {version}")
+        robots = _read_symbols(f, n_robots)
+        events = [EVENTS.intern(name) for name in _read_symbols(f, n_events)]
+
+        chunk_size = _RECORD.size * _RECORDS_PER_READ
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            usable = len(chunk) - len(chunk) % _RECORD.size
+            for timestamp, robot, event in _RECORD.iter_unpack(chunk[:usable]):
+                yield Record(timestamp, robots[robot], events[event])
+            if usable != len(chunk):
+                raise ValueError("Truncated event log")
+    finally:
+        if close:
+            f.close()
+
+
+def open_log(path):
+    """Stream records from a log, choosing the reader from the file extension"""
+    if path.endswith(".jsonl"):
+        return read_jsonl(path)
+    if path.endswith(".csv"):
+        return read_csv(path)
+    return read_binary(path)
+
+
+def replay(records, fsm_factory, restart_on_final=False):
+    """
+    Drive one FSM per robot through a stream of records.
+
+    FSMs are created on the first record of each robot. Records are consumed
+    one at a time, so memory does not depend on the length of the log as long
+    as the factory builds FSMs with a bounded history ("off" or "ring").
+
+    Args:
+        records (iterable): Records (timestamp, robot, event), e.g. from open_log
+        fsm_factory (callable): Returns a new FSM for a robot id
+        restart_on_final (bool): Reset a robot's FSM after it reaches a final state
+
+    Yields:
+        StateChange: One entry per transition taken
+    """
+    fsms = {}
+    for timestamp, robot, event in records:
+        fsm = fsms.get(robot)
+        if fsm is None:
+            fsm = fsms[robot] = fsm_factory(robot)
+
+        if event.__class__ is not str and event.__class__ is not int:
+            event = normalize(event)
+        source = fsm.current_state
+        finished = fsm.process_event(event)
+        target = fsm.current_state
+        if target is not source:
+            if event.__class__ is int:
+                event = EVENTS.names[event]
+            yield StateChange(timestamp, robot, event, source.name, target.name, target.is_final)
+        if finished and restart_on_final:
+            fsm.reset()
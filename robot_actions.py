@@ -1,26 +1,84 @@
+from commands import Command, CommandBuffer
+
+# Buffer receiving the commands of the actions below. By default each command
+# is printed as soon as it is emitted; a control loop installs its own buffer
+# with set_command_buffer and flushes it once per cycle.
+COMMANDS = CommandBuffer(autoflush=True)
+
+# Position computed for each robot by the last planning action, used by go_to_position.
+# Plans are results, not actuator commands: they never go through COMMANDS.
+PLANNED_POSITIONS = {}
+
+def set_command_buffer(buffer):
+    """Route the commands of the actions to another buffer, returning the previous one"""
+    global COMMANDS
+    previous, COMMANDS = COMMANDS, buffer
+    return previous
+
 def go_to_ball(robot):
     """Robot moves towards the ball"""
-    print(f"Robot {robot} moves towards the ball")
+    COMMANDS.emit(Command(robot, "go_to_ball"))
     return True
 
 def align_with_target(robot, target):
     """Robot aligns with the target (goal or other robot)"""
-    print(f"Robot {robot} aligns with {target}")
+    COMMANDS.emit(Command(robot, "align", target))
     return True
 
 def kick_ball(robot, power=1.0):
     """Robot kicks the ball"""
-    print(f"Robot {robot} kicks the ball with power {power}")
+    COMMANDS.emit(Command(robot, "kick", power=power))
     return True
 
 def pass_ball(robot, target_robot):
     """Robot passes the ball to another robot"""
-    print(f"Robot {robot} passes the ball to {target_robot}")
+    COMMANDS.emit(Command(robot, "pass", target_robot))
     return True
 
 def block_robot(robot, target_robot):
     """Robot blocks an opponent robot"""
-    print(f"Robot {robot} blocks {target_robot}")
+    COMMANDS.emit(Command(robot, "block", target_robot))
+    return True
+
+def calculate_trajectory(robot):
+    """
+    Robot computes where it can intercept the ball (kinematics.ENGINE frame).
+
+    The point is stored in PLANNED_POSITIONS; without a vision frame the
+    previous plan is dropped and False is returned.
+    """
+    import kinematics
+
+    plan = kinematics.ENGINE.interception_point(robot)
+    if plan is None:
+        PLANNED_POSITIONS.pop(robot, None)
+        return False
+    PLANNED_POSITIONS[robot] = plan[0]
+    return plan[2]
+
+def calculate_block_position(robot, target_robot):
+    """
+    Robot computes where to stand to block an opponent (kinematics.ENGINE frame).
+
+    Like calculate_trajectory, the point is stored in PLANNED_POSITIONS.
+    """
+    import kinematics
+
+    plan = kinematics.ENGINE.blocking_point(robot, target_robot)
+    if plan is None:
+        PLANNED_POSITIONS.pop(robot, None)
+        return False
+    PLANNED_POSITIONS[robot] = plan[0]
+    return True
+
+def go_to_position(robot, purpose):
+    """Robot moves to a computed position (e.g. "blocking", "interception")"""
+    COMMANDS.emit(Command(robot, "go_to_position", purpose, point=PLANNED_POSITIONS.get(robot)))
+    return True
+
+def intercept_ball(robot):
+    """Robot attempts to intercept the ball"""
+    COMMANDS.emit(Command(robot, "intercept"))
     return True
 
 def is_near_ball(event):
@@ -37,4 +95,4 @@ def ball_kicked(event):
 
 def ball_received(event):
     """Check if the ball has been received"""
-    return event == "BALL_RECEIVED"
\ No newline at end of file
+    return event == "BALL_RECEIVED"
@@ -0,0 +1,347 @@
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+
+from fsm import FSM, State, Transition
+
+FSM_MAGIC = b"FSMB"
+LIBRARY_MAGIC = b"FSML"
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct("<4sHIII")  # magic, version, symbols, states, transitions
+_LIBRARY_HEADER = struct.Struct("<4sHI")  # magic, version, entries
+_LIBRARY_ENTRY = struct.Struct("<QQ")  # offset, length
+_LENGTH = struct.Struct("<H")
+
+FLAG_FINAL = 1
+FLAG_SUCCESS = 2
+
+
+def _literal_transitions(state):
+    for transition in state.transitions:
+        event = transition.event
+        if event is None:
+            raise ValueError(
+                f"Transition {state.name} -> {transition.target_state.name} has a dynamic "
+                "condition and cannot be serialized; use an event literal")
+        yield transition, event
+
+
+def _resolve_action(actions, name):
+    if actions is None:
+        return None
+    if callable(actions):
+        return actions(name)
+    return actions.get(name)
+
+
+def fsm_to_dict(fsm):
+    """
+    Convert an FSM to plain data (state ids follow FSM.state_list).
+
+    Actions are not serialized; only literal-event transitions are supported.
+    Composite states are flattened, so a loaded play runs like the original.
+
+    Args:
+        fsm (FSM): FSM to convert
+
+    Returns:
+        dict: JSON-compatible description of the FSM
+    """
+    if fsm.has_composites():
+        fsm = fsm.flatten()
+    states = fsm.state_list()
+    index = {id(state): i for i, state in enumerate(states)}
+    return {
+        "version": FORMAT_VERSION,
+        "initial": states[0].name,
+        "states": [
+            {
+                "name": state.name,
+                "is_final": state.is_final,
+                "is_success": state.is_success,
+                "timeout": state.timeout,
+                "timeout_event": state.timeout_event,
+            }
+            for state in states
+        ],
+        "transitions": [
+            {
+                "source": i,
+                "target": index[id(transition.target_state)],
+                "event": event,
+                "probability": transition.probability,
+                "priority": transition.priority,
+            }
+            for i, state in enumerate(states)
+            for transition, event in _literal_transitions(state)
+        ],
+    }
+
+
+def fsm_from_dict(data, actions=None):
+    """
+    Rebuild an FSM from fsm_to_dict output.
+
+    Args:
+        data (dict): Serialized FSM
+        actions (dict or callable, optional): Action of each state, by state name
+
+    Returns:
+        FSM: The rebuilt FSM, compiled
+    """
+    states = [
+        State(spec["name"], _resolve_action(actions, spec["name"]),
+              is_final=spec["is_final"], is_success=spec["is_success"],
+              timeout=spec.get("timeout"), timeout_event=spec.get("timeout_event", "TIMEOUT"))
+        for spec in data["states"]
+    ]
+    for spec in data["transitions"]:
+        states[spec["source"]].add_transition(
+            Transition(states[spec["target"]], spec["event"], probability=spec["probability"],
+                       priority=spec.get("priority", 0)))
+
+    fsm = FSM(states[0])
+    for state in states[1:]:
+        fsm.add_state(state)
+    return fsm.compile()
+
+
+def dumps_json(fsm, **kwargs):
+    """Serialize an FSM to a JSON string"""
+    return json.dumps(fsm_to_dict(fsm), **kwargs)
+
+
+def loads_json(text, actions=None):
+    """Rebuild an FSM from a JSON string"""
+    return fsm_from_dict(json.loads(text), actions)
+
+
+def _column(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _read_column(typecode, buffer, offset, count):
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    column.frombytes(buffer[offset:end])
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column, end
+
+
+def dumps_binary(fsm):
+    """
+    Serialize an FSM to the compact binary format.
+
+    Layout: header, symbol table (length-prefixed UTF-8 state names and
+    events), then fixed-width little-endian columns for states (name, flags,
+    timeout, timeout event) and transitions (source, target, event, probability, priority).
+
+    Args:
+        fsm (FSM): FSM to serialize
+
+    Returns:
+        bytes: Encoded FSM
+    """
+    data = fsm_to_dict(fsm)
+    symbols = {}
+
+    def symbol(text):
+        if text not in symbols:
+            symbols[text] = len(symbols)
+        return symbols[text]
+
+    state_names = [symbol(spec["name"]) for spec in data["states"]]
+    timeout_events = [symbol(spec["timeout_event"]) for spec in data["states"]]
+    flags = [(FLAG_FINAL if spec["is_final"] else 0) | (FLAG_SUCCESS if spec["is_success"] else 0)
+             for spec in data["states"]]
+    timeouts = [math.nan if spec["timeout"] is None else spec["timeout"] for spec in data["states"]]
+    transitions = data["transitions"]
+    events = [symbol(spec["event"]) for spec in transitions]
+
+    parts = [_HEADER.pack(FSM_MAGIC, FORMAT_VERSION, len(symbols), len(state_names), len(transitions))]
+    for text in symbols:
+        encoded = text.encode("utf-8")
+        parts.append(_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    parts += [
+        _column("i", state_names),
+        _column("i", timeout_events),
+        _column("d", timeouts),
+        _column("B", flags),
+        _column("i", [spec["source"] for spec in transitions]),
+        _column("i", [spec["target"] for spec in transitions]),
+        _column("i", events),
+        _column("d", [spec["probability"] for spec in transitions]),
+        _column("i", [spec["priority"] for spec in transitions]),
+    ]
+    return b"".join(parts)
+
+
+def loads_binary(buffer, actions=None):
+    """
+    Rebuild an FSM from the compact binary format.
+
+    Args:
+        buffer (bytes-like): Encoded FSM (bytes, memoryview or mmap slice)
+        actions (dict or callable, optional): Action of each state, by state name
+
+    Returns:
+        FSM: The rebuilt FSM, compiled
+    """
+    buffer = memoryview(buffer)
+    magic, version, n_symbols, n_states, n_transitions = _HEADER.unpack_from(buffer, 0)
+    if magic != FSM_MAGIC:
+        raise ValueError("Not a binary FSM")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported FSM format version {version}")
+
+    offset = _HEADER.size
+    symbols = []
+    for _ in range(n_symbols):
+        (length,) = _LENGTH.unpack_from(buffer, offset)
+        offset += _LENGTH.size
+        symbols.append(str(buffer[offset:offset + length], "utf-8"))
+        offset += length
+
+    names, offset = _read_column("i", buffer, offset, n_states)
+    timeout_events, offset = _read_column("i", buffer, offset, n_states)
+    timeouts, offset = _read_column("d", buffer, offset, n_states)
+    flags, offset = _read_column("B", buffer, offset, n_states)
+    sources, offset = _read_column("i", buffer, offset, n_transitions)
+    targets, offset = _read_column("i", buffer, offset, n_transitions)
+    events, offset = _read_column("i", buffer, offset, n_transitions)
+    probabilities, offset = _read_column("d", buffer, offset, n_transitions)
+    priorities, offset = _read_column("i", buffer, offset, n_transitions)
+
+    states = []
+    for i in range(n_states):
+        name = symbols[names[i]]
+        states.append(State(name, _resolve_action(actions, name),
+                            is_final=bool(flags[i] & FLAG_FINAL),
+                            is_success=bool(flags[i] & FLAG_SUCCESS),
+                            timeout=None if math.isnan(timeouts[i]) else timeouts[i],
+                            timeout_event=symbols[timeout_events[i]]))
+    for k in range(n_transitions):
+        states[sources[k]].add_transition(
+            Transition(states[targets[k]], symbols[events[k]], probability=probabilities[k],
+                       priority=priorities[k]))
+
+    fsm = FSM(states[0])
+    for state in states[1:]:
+        fsm.add_state(state)
+    return fsm.compile()
+
+
+def save(fsm, path):
+    """Write an FSM to a file: JSON if the path ends with .json, binary otherwise"""
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            f.write(dumps_json(fsm, indent=2))
+    else:
+        with open(path, "wb") as f:
+            f.write(dumps_binary(fsm))
+
+
+def load(path, actions=None):
+    """Read an FSM written by save()"""
+    if path.endswith(".json"):
+        with open(path) as f:
+            return loads_json(f.read(), actions)
+    with open(path, "rb") as f:
+        return loads_binary(f.read(), actions)
+
+
+def save_library(path, fsms):
+    """
+    Write several FSMs into one binary library file.
+
+    Args:
+        path (str): Output file
+        fsms (dict): FSM of each behavior, by name
+    """
+    blobs = [(name.encode("utf-8"), dumps_binary(fsm)) for name, fsm in fsms.items()]
+    index_size = _LIBRARY_HEADER.size + sum(
+        _LENGTH.size + len(name) + _LIBRARY_ENTRY.size for name, _ in blobs)
+
+    with open(path, "wb") as f:
+        f.write(_LIBRARY_HEADER.pack(LIBRARY_MAGIC, FORMAT_VERSION, len(blobs)))
+        offset = index_size
+        for name, blob in blobs:
+            f.write(_LENGTH.pack(len(name)))
+            f.write(name)
+            f.write(_LIBRARY_ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        for _, blob in blobs:
+            f.write(blob)
+
+
+class FSMLibrary:
+    def __init__(self, path, actions=None):
+        """
+        Read-only, memory-mapped library of FSMs written by save_library.
+
+        Only the index is read when the library is opened; each FSM is decoded
+        from the mapping the first time it is requested, then kept as a
+        template that instances are spawned from.
+
+        Args:
+            path (str): Library file
+            actions (dict or callable, optional): Action of each state, by state name
+        """
+        self.actions = actions
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._templates = {}
+
+        magic, version, count = _LIBRARY_HEADER.unpack_from(self._map, 0)
+        if magic != LIBRARY_MAGIC:
+            raise ValueError("Not an FSM library")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported FSM library version {version}")
+
+        self.entries = {}
+        offset = _LIBRARY_HEADER.size
+        for _ in range(count):
+            (length,) = _LENGTH.unpack_from(self._map, offset)
+            offset += _LENGTH.size
+            name = self._map[offset:offset + length].decode("utf-8")
+            offset += length
+            self.entries[name] = _LIBRARY_ENTRY.unpack_from(self._map, offset)
+            offset += _LIBRARY_ENTRY.size
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, name):
+        """Return a new runnable instance of a behavior"""
+        template = self._templates.get(name)
+        if template is None:
+            offset, length = self.entries[name]
+            with memoryview(self._map)[offset:offset + length] as view:
+                template = self._templates[name] = loads_binary(view, self.actions)
+        return template.spawn()
+
+    def close(self):
+        self._templates.clear()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,164 @@
+import numpy as np
+
+from markov import outcome_rows
+
+
+class SimulationResult:
+    def __init__(self, state_names, terminal_counts, path_lengths, truncated, n_rollouts, success_states):
+        """
+        Aggregated outcome of a batch of rollouts.
+
+        Args:
+            state_names (list): Name of each state id
+            terminal_counts (numpy.ndarray): Number of rollouts absorbed in each state id
+            path_lengths (numpy.ndarray): Histogram of absorption steps (index = number of events)
+            truncated (int): Rollouts that did not reach a final state within max_steps
+            n_rollouts (int): Total number of rollouts
+            success_states (set): Names of the success final states
+        """
+        self.state_names = state_names
+        self.terminal_counts = terminal_counts
+        self.path_lengths = path_lengths
+        self.truncated = truncated
+        self.n_rollouts = n_rollouts
+        self.success_states = success_states
+
+    @property
+    def terminal_histogram(self):
+        """Number of rollouts that ended in each final state, by state name"""
+        return {self.state_names[i]: int(count)
+                for i, count in enumerate(self.terminal_counts) if count}
+
+    @property
+    def success_rate(self):
+        """Fraction of rollouts absorbed in a success state"""
+        successes = sum(count for name, count in self.terminal_histogram.items()
+                        if name in self.success_states)
+        return successes / self.n_rollouts if self.n_rollouts else 0.0
+
+    @property
+    def failure_rate(self):
+        """Fraction of rollouts absorbed in a failure state"""
+        absorbed = int(self.terminal_counts.sum())
+        return (absorbed / self.n_rollouts - self.success_rate) if self.n_rollouts else 0.0
+
+    @property
+    def truncated_rate(self):
+        """Fraction of rollouts still running after max_steps"""
+        return self.truncated / self.n_rollouts if self.n_rollouts else 0.0
+
+    @property
+    def mean_path_length(self):
+        """Average number of events before absorption, over absorbed rollouts"""
+        absorbed = self.path_lengths.sum()
+        if not absorbed:
+            return 0.0
+        return float((self.path_lengths * np.arange(len(self.path_lengths))).sum() / absorbed)
+
+    def as_dict(self):
+        """Plain-Python summary of the result"""
+        return {
+            "n_rollouts": self.n_rollouts,
+            "success_rate": self.success_rate,
+            "failure_rate": self.failure_rate,
+            "truncated_rate": self.truncated_rate,
+            "terminal_histogram": self.terminal_histogram,
+            "path_lengths": {i: int(c) for i, c in enumerate(self.path_lengths) if c},
+            "mean_path_length": self.mean_path_length,
+        }
+
+    def __str__(self):
+        return (f"SimulationResult(n={self.n_rollouts}, success={self.success_rate:.4f}, "
+                f"failure={self.failure_rate:.4f}, truncated={self.truncated_rate:.4f})")
+
+
+def compile_outcome_tables(fsm, policy=None):
+    """
+    Convert an FSM into cumulative outcome tables indexed by state id.
+
+    Args:
+        fsm (FSM): FSM to convert
+        policy (dict or callable, optional): Event emitted in each state, by state name
+
+    Returns:
+        tuple: (states, targets, cumulative, final) where targets and cumulative
+            are (n_states, width) arrays and final is a boolean mask
+    """
+    states, rows = outcome_rows(fsm, policy)
+
+    width = max(len(row) for row in rows)
+    targets = np.empty((len(states), width), dtype=np.int32)
+    cumulative = np.ones((len(states), width), dtype=np.float64)
+    for i, row in enumerate(rows):
+        masses = np.cumsum([mass for _, mass in row])
+        targets[i, :len(row)] = [target for target, _ in row]
+        targets[i, len(row):] = row[-1][0]
+        cumulative[i, :len(row)] = masses
+    # Guard against rounding: the last outcome of each row always catches r < 1.
+    cumulative[np.arange(len(states)), [len(row) - 1 for row in rows]] = 1.0
+    cumulative[:, -1] = 1.0
+    final = np.array([state.is_final for state in states], dtype=bool)
+    return states, targets, cumulative, final
+
+
+def simulate(fsm, n_rollouts, policy=None, max_steps=100, seed=None, chunk_size=1_000_000):
+    """
+    Run independent rollouts of the FSM's probabilistic model in batch.
+
+    Every rollout starts in the initial state; at each step all running
+    rollouts draw their next state at once from the outcome tables. Rollouts
+    are processed in chunks so memory stays bounded for very large batches.
+
+    Args:
+        fsm (FSM): FSM to simulate (e.g. from create_simple_pass_fsm)
+        n_rollouts (int): Number of rollouts
+        policy (dict or callable, optional): Event emitted in each state, by state name
+        max_steps (int): Maximum number of events per rollout
+        seed (int, optional): Seed of the random generator
+        chunk_size (int): Maximum number of rollouts simulated together
+
+    Returns:
+        SimulationResult: Success rate, terminal histogram and path lengths
+    """
+    states, targets, cumulative, final = compile_outcome_tables(fsm, policy)
+    rng = np.random.default_rng(seed)
+    initial = 0
+
+    terminal_counts = np.zeros(len(states), dtype=np.int64)
+    path_lengths = np.zeros(max_steps + 1, dtype=np.int64)
+    truncated = 0
+
+    remaining = n_rollouts
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        remaining -= size
+
+        current = np.full(size, initial, dtype=np.int32)
+        if final[initial]:
+            terminal_counts[initial] += size
+            path_lengths[0] += size
+            continue
+
+        for step in range(1, max_steps + 1):
+            draws = rng.random(current.size)
+            choice = (draws[:, None] >= cumulative[current]).sum(axis=1)
+            current = targets[current, choice]
+
+            done = final[current]
+            absorbed = int(done.sum())
+            if absorbed:
+                terminal_counts += np.bincount(current[done], minlength=len(states))
+                path_lengths[step] += absorbed
+                current = current[~done]
+            if current.size == 0:
+                break
+        truncated += current.size
+
+    return SimulationResult(
+        [state.name for state in states],
+        terminal_counts,
+        path_lengths,
+        truncated,
+        n_rollouts,
+        {state.name for state in states if state.is_final and state.is_success},
+    )
@@ -0,0 +1,160 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def transition_pairs(fsm):
+    """(source, target) state names of every transition of an FSM"""
+    return {(state.name, transition.target_state.name)
+            for state in fsm.state_list() for transition in state.transitions}
+
+
+def scenario_grid(builders, params=({},), overrides=({},), seeds=(0,)):
+    """
+    Build the cartesian product of scenario settings.
+
+    Overrides are scoped per builder: an override set is only combined with
+    the builders whose FSM has every transition it names, so a grid mixing
+    e.g. pass and block builders can override transitions of one of them.
+
+    Args:
+        builders (iterable): Names of FSM builders in main.py (e.g. "create_simple_pass_fsm")
+        params (iterable): Keyword arguments for the builder (e.g. {"target_robot": "R4"})
+        overrides (iterable): Probability overrides, {(source, target): probability}
+            by state names
+        seeds (iterable): Random seeds
+
+    Returns:
+        list: Scenario dicts with keys builder, params, overrides and seed
+
+    Raises:
+        ValueError: If an override set applies to none of the builders
+    """
+    import main
+
+    builders, params, overrides = list(builders), [dict(p) for p in params], [dict(o) for o in overrides]
+    pairs = {}
+    scenarios = []
+    used = [False] * len(overrides)
+    for builder, p in itertools.product(builders, params):
+        key = (builder, tuple(sorted(p.items())))
+        if key not in pairs:
+            pairs[key] = transition_pairs(getattr(main, builder)(**p))
+        for k, o in enumerate(overrides):
+            if not o.keys() <= pairs[key]:
+                continue
+            used[k] = True
+            scenarios += [{"builder": builder, "params": dict(p), "overrides": dict(o), "seed": seed}
+                          for seed in seeds]
+    for o, applied in zip(overrides, used):
+        if not applied:
+            raise ValueError(f"No builder has the transitions of overrides {sorted(o)}")
+    return scenarios
+
+
+def apply_overrides(fsm, overrides):
+    """
+    Set transition probabilities of an FSM in place.
+
+    Args:
+        fsm (FSM): FSM to modify
+        overrides (dict): New probability for each (source, target) pair of state names
+    """
+    remaining = dict(overrides)
+    for state in fsm.state_list():
+        for transition in state.transitions:
+            key = (state.name, transition.target_state.name)
+            if key in remaining:
+                transition.probability = remaining.pop(key)
+    if remaining:
+        raise ValueError(f"No transition for overrides {sorted(remaining)}")
+
+
+def scenario_seed(base_seed, index, seed):
+    """Seed of one scenario, derived from its position so it does not depend on the worker"""
+    return int(np.random.SeedSequence([base_seed, index, seed]).generate_state(1)[0])
+
+
+def run_scenario(task):
+    """
+    Evaluate one scenario (executed in a worker process).
+
+    Args:
+        task (tuple): (index, scenario, n_rollouts, max_steps, exact, base_seed)
+
+    Returns:
+        tuple: (index, result dict)
+    """
+    import main
+    import simulation
+
+    index, scenario, n_rollouts, max_steps, exact, base_seed = task
+    fsm = getattr(main, scenario["builder"])(**scenario["params"])
+    apply_overrides(fsm, scenario["overrides"])
+
+    if exact:
+        analysis = fsm.absorption_analysis()
+        return index, {"success_rate": analysis.success_probability,
+                       "failure_rate": analysis.failure_probability,
+                       "mean_path_length": analysis.expected_steps}
+
+    seed = scenario_seed(base_seed, index, scenario["seed"])
+    result = simulation.simulate(fsm, n_rollouts, max_steps=max_steps, seed=seed)
+    return index, {"success_rate": result.success_rate,
+                   "failure_rate": result.failure_rate,
+                   "mean_path_length": result.mean_path_length}
+
+
+def _group_key(scenario):
+    return (scenario["builder"],
+            tuple(sorted(scenario["params"].items())),
+            tuple(sorted(scenario["overrides"].items())))
+
+
+def run_sweep(scenarios, n_rollouts=100_000, max_steps=100, exact=False,
+              max_workers=None, chunksize=None, base_seed=0):
+    """
+    Evaluate scenarios in parallel over a process pool.
+
+    Every scenario gets a seed derived from base_seed, its position and its
+    own seed, so results are reproducible whatever the number of workers.
+    Results are streamed back in chunks and aggregated across seeds as they
+    arrive.
+
+    Args:
+        scenarios (list): Scenarios from scenario_grid
+        n_rollouts (int): Monte Carlo rollouts per scenario
+        max_steps (int): Maximum events per rollout
+        exact (bool): Use the absorbing Markov chain solve instead of sampling
+        max_workers (int, optional): Worker processes (all cores by default)
+        chunksize (int, optional): Scenarios sent to a worker at once
+        base_seed (int): Seed of the whole sweep
+
+    Returns:
+        tuple: (per-scenario results in input order, aggregate by scenario
+            group with mean and std of the success rate over seeds)
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(scenarios) // (max_workers * 4))
+    tasks = [(i, scenario, n_rollouts, max_steps, exact, base_seed)
+             for i, scenario in enumerate(scenarios)]
+
+    results = [None] * len(scenarios)
+    groups = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for index, result in executor.map(run_scenario, tasks, chunksize=chunksize):
+            results[index] = result
+            group = groups.setdefault(_group_key(scenarios[index]), [0, 0.0, 0.0])
+            group[0] += 1
+            group[1] += result["success_rate"]
+            group[2] += result["success_rate"] ** 2
+
+    aggregate = {}
+    for key, (count, total, squares) in groups.items():
+        mean = total / count
+        aggregate[key] = {"runs": count, "success_mean": mean,
+                          "success_std": max(squares / count - mean * mean, 0.0) ** 0.5}
+    return results, aggregate
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+
+
+class TemplateRegistry:
+    def __init__(self, maxsize=64):
+        """
+        Cache of built FSM topologies, keyed by action and parameters.
+
+        Each template is built once by its registered builder, compiled, and
+        kept in an LRU cache. Callers get lightweight instances (FSM.spawn)
+        that share the states and transitions of the template and only carry
+        their own current state and history.
+
+        Args:
+            maxsize (int): Maximum number of cached templates
+        """
+        self.maxsize = maxsize
+        self.builders = {}
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, action, builder):
+        """
+        Register the builder of an action.
+
+        Args:
+            action (str): Action name (e.g. "pass")
+            builder (callable): Function returning a new FSM from keyword parameters
+        """
+        self.builders[action] = builder
+        for key in [key for key in self._cache if key[0] == action]:
+            del self._cache[key]
+
+    def template(self, action, **params):
+        """
+        Return the shared, compiled FSM of an action (built on first use).
+
+        The returned FSM must not be modified nor run directly; use instance().
+        """
+        key = (action, tuple(sorted(params.items())))
+        fsm = self._cache.get(key)
+        if fsm is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return fsm
+
+        self.misses += 1
+        if action not in self.builders:
+            raise KeyError(f"No FSM builder registered for action '{action}'")
+        fsm = self.builders[action](**params).compile()
+        self._cache[key] = fsm
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return fsm
+
+    def instance(self, action, rng=None, seed=None, **params):
+        """
+        Return a new runnable FSM sharing the cached template of an action.
+
+        rng and seed are given to FSM.spawn, for reproducible stochastic instances.
+        """
+        return self.template(action, **params).spawn(rng, seed)
+
+    def clear(self):
+        """Drop every cached template"""
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
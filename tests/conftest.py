@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to main.py.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import robot_actions as ra  # noqa: E402
+from commands import CommandBuffer, ListSink  # noqa: E402
+
+
+@pytest.fixture
+def buffer():
+    """Command buffer collecting packets in a ListSink, installed for robot_actions"""
+    buffer = CommandBuffer(ListSink())
+    previous = ra.set_command_buffer(buffer)
+    yield buffer
+    ra.set_command_buffer(previous)
@@ -0,0 +1,65 @@
+import main
+from fsm import FSM, State, Transition
+
+
+def make_fsm(*transitions):
+    start = State("START")
+    x = State("X", is_final=True, is_success=True)
+    y = State("Y", is_final=True)
+    targets = {"X": x, "Y": y}
+    for condition, target, probability in transitions:
+        start.add_transition(Transition(targets[target], condition, probability))
+    fsm = FSM(start)
+    fsm.add_state(x)
+    fsm.add_state(y)
+    return fsm
+
+
+def kinds(fsm):
+    return [issue.kind for issue in fsm.validate().issues]
+
+
+def test_transitions_on_different_events_do_not_compete():
+    assert kinds(make_fsm(("GO", "X", 1.0), ("ABORT", "Y", 1.0))) == []
+
+
+def test_starved_transition_on_the_same_event():
+    fsm = make_fsm((lambda e: e.startswith("G"), "X", 1.0), ("GO", "Y", 1.0))
+    assert kinds(fsm) == ["probability"]
+
+
+def test_shadowed_transition_reported_once():
+    assert kinds(make_fsm(("GO", "X", 1.0), ("GO", "Y", 1.0))) == ["shadowed"]
+
+
+def test_shadowed_across_a_guard():
+    fsm = make_fsm(("GO", "X", 1.0), (lambda e: e.startswith("S"), "X", 1.0), ("GO", "Y", 1.0))
+    assert kinds(fsm) == ["shadowed"]
+
+
+def test_repo_fsms_are_valid():
+    for builder in [main.create_simple_pass_fsm, main.create_shoot_fsm,
+                    main.create_block_fsm, main.create_intercept_fsm]:
+        assert builder().validate().ok
+
+
+def test_unreachable_and_dead_end():
+    fsm = make_fsm(("GO", "X", 1.0), ("ABORT", "Y", 1.0))
+    fsm.add_state(State("ORPHAN"))
+    middle = State("MIDDLE")
+    fsm.initial_state.add_transition(Transition(middle, "WAIT"))
+    assert sorted(kinds(fsm)) == ["dead_end", "unreachable"]
+
+
+def test_minimize_merges_equivalent_states():
+    start = State("START")
+    a, b = State("A"), State("B")
+    done = State("DONE", is_final=True, is_success=True)
+    start.add_transition(Transition(a, "LEFT"))
+    start.add_transition(Transition(b, "RIGHT"))
+    a.add_transition(Transition(done, "GO"))
+    b.add_transition(Transition(done, "GO"))
+    fsm = FSM(start)
+    for state in (a, b, done):
+        fsm.add_state(state)
+    assert len(fsm.minimize().state_list()) == 3
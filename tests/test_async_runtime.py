@@ -0,0 +1,75 @@
+import asyncio
+
+from async_runtime import AsyncFSMRunner, AsyncRuntime
+from fsm import FSM, State, Transition
+
+
+def make_retry_fsm(timeout=0.05, loop_on_timeout=True):
+    wait = State("WAIT", timeout=timeout)
+    done = State("DONE", is_final=True, is_success=True)
+    if loop_on_timeout:
+        wait.add_transition(Transition(wait, "TIMEOUT"))
+    wait.add_transition(Transition(done, "GO"))
+    fsm = FSM(wait)
+    fsm.add_state(done)
+    return fsm
+
+
+def run_with_late_event(fsm, delay):
+    async def scenario():
+        runner = AsyncFSMRunner(fsm)
+        task = asyncio.ensure_future(runner.run())
+        await asyncio.sleep(delay)
+        runner.post("GO")
+        return await asyncio.wait_for(task, 1.0)
+
+    return asyncio.run(scenario())
+
+
+def test_self_loop_timeout_is_rearmed():
+    fsm = make_retry_fsm(timeout=0.05)
+    assert run_with_late_event(fsm, 0.2).name == "DONE"
+    # Roughly one timeout every 50 ms, not a busy loop
+    assert 2 <= len(fsm.history) <= 8
+
+
+def test_unmatched_timeout_is_rearmed():
+    fsm = make_retry_fsm(timeout=0.05, loop_on_timeout=False)
+    assert run_with_late_event(fsm, 0.2).name == "DONE"
+    assert len(fsm.history) <= 8
+
+
+def test_queued_event_wins_over_expired_timeout():
+    fsm = make_retry_fsm(timeout=0.0)
+
+    async def scenario():
+        runner = AsyncFSMRunner(fsm)
+        runner.post("GO")
+        return await runner.run()
+
+    assert asyncio.run(scenario()).name == "DONE"
+    assert list(fsm.history) == ["WAIT"]
+
+
+def test_async_actions_and_stop():
+    seen = []
+
+    async def action(event):
+        await asyncio.sleep(0)
+        seen.append(event)
+
+    wait = State("WAIT", action)
+    done = State("DONE", is_final=True, is_success=True)
+    wait.add_transition(Transition(done, "GO"))
+    fsm = FSM(wait)
+    fsm.add_state(done)
+
+    async def scenario():
+        runtime = AsyncRuntime()
+        runtime.add("R1", fsm)
+        runtime.post_many([("R1", "NOISE"), ("R1", "NOISE")])
+        runtime.stop()
+        return await runtime.run()
+
+    assert asyncio.run(scenario())["R1"].name == "WAIT"
+    assert seen == ["NOISE", "NOISE"]
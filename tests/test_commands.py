@@ -0,0 +1,48 @@
+from commands import Command
+from fleet import Fleet
+from fsm_builder import build_fsm, fsm_from_instruction
+
+
+def test_flush_sends_one_packet_per_tick(buffer):
+    buffer.emit(Command("R1", "go_to_ball"))
+    buffer.emit(Command("R1", "align", "R2"))
+    buffer.emit(Command("R1", "kick", power=1.0))
+    packet = buffer.flush()
+
+    # align replaced go_to_ball on the motion channel
+    assert packet.tick == 0
+    assert [c.kind for c in packet.commands] == ["align", "kick"]
+    assert buffer.flush() is None
+    assert buffer.sink.packets == [packet]
+
+
+def test_attached_fsm_commands_its_robot(buffer):
+    fsm, _ = fsm_from_instruction("Pass the ball to R3", robot="R7")
+    buffer.attach(fsm, "R7")
+    for event in ["NEAR_BALL", "NEAR_BALL", "NEAR_BALL"]:
+        fsm.process_event(event)
+        buffer.flush()
+
+    # One command per state entry: the repeated events are deduplicated
+    commands = [c for packet in buffer.sink.packets for c in packet.commands]
+    assert [(c.robot, c.kind) for c in commands] == [("R7", "go_to_ball")]
+
+
+
+
+def test_attached_fleet_sends_once_per_state_entry(buffer):
+    fleet = Fleet(build_fsm("pass"), ["R1", "R2"])
+    buffer.attach_fleet(fleet)
+    fleet.add_robot("R3")
+    robots = ["R1", "R2", "R3"]
+    for event in ["NEAR_BALL", "NEAR_BALL", "NEAR_BALL", "ALIGNED", "ALIGNED"]:
+        fleet.dispatch([(robot, event) for robot in robots])
+        buffer.flush()
+
+    commands = [(c.robot, c.kind) for packet in buffer.sink.packets for c in packet.commands]
+    assert sorted(commands) == sorted([(robot, kind) for robot in robots for kind in ["go_to_ball", "align"]])
+
+    fleet.reset(["R1"])
+    for event in ["NEAR_BALL", "NEAR_BALL"]:
+        fleet.dispatch([("R1", event)])
+    assert [(c.robot, c.kind) for c in buffer.pending] == [("R1", "go_to_ball")]
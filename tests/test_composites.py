@@ -0,0 +1,100 @@
+import pytest
+
+import serialization
+from fsm import FSM, CompositeState, State, Transition
+from fsm_builder import build_play
+
+
+def make_kick():
+    start = State("START")
+    done = State("DONE", is_final=True, is_success=True)
+    lost = State("LOST", is_final=True)
+    start.add_transition(Transition(done, "KICKED"))
+    start.add_transition(Transition(lost, "STOLEN"))
+    fsm = FSM(start)
+    fsm.add_state(done)
+    fsm.add_state(lost)
+    return fsm
+
+
+def make_play():
+    """IDLE -GO-> KICK (composite) -NEXT-> END"""
+    idle = State("IDLE")
+    kick = CompositeState("KICK", make_kick(), prefix="KICK.")
+    end = State("END", is_final=True, is_success=True)
+    idle.add_transition(Transition(kick, "GO"))
+    kick.add_transition(Transition(end, "NEXT"))
+    fsm = FSM(idle)
+    fsm.add_state(kick)
+    fsm.add_state(end)
+    return fsm
+
+
+def run(fsm, events):
+    names = []
+    for event in events:
+        fsm.process_event(event)
+        names.append(fsm.current_state.name)
+    return names
+
+
+def test_flatten_wires_success_to_the_composite_transitions():
+    flat = make_play().flatten()
+    assert not flat.has_composites()
+    assert sorted(flat.states) == ["END", "IDLE", "KICK.DONE", "KICK.LOST", "KICK.START"]
+    done = flat.states["KICK.DONE"]
+    assert not done.is_final
+    assert [t.target_state.name for t in done.transitions] == ["END"]
+    lost = flat.states["KICK.LOST"]
+    assert lost.is_final and not lost.is_success
+
+
+def test_success_and_failure_exits():
+    assert run(make_play().compile(), ["GO", "KICKED", "NEXT"]) == ["KICK.START", "KICK.DONE", "END"]
+    fsm = make_play().compile()
+    assert run(fsm, ["GO", "STOLEN", "NEXT"]) == ["KICK.START", "KICK.LOST", "KICK.LOST"]
+
+
+def test_uncompiled_fsm_is_flattened_on_first_dispatch():
+    fsm = make_play()
+    assert run(fsm, ["GO", "KICKED", "NEXT"]) == ["KICK.START", "KICK.DONE", "END"]
+    assert fsm.compiled and not fsm.has_composites()
+
+
+def test_composite_initial_state():
+    kick = CompositeState("KICK", make_kick())
+    fsm = FSM(kick)
+    assert run(fsm, ["KICKED"]) == ["DONE"]
+    assert fsm.current_state.is_final
+
+
+def test_dispatch_refuses_to_start_on_a_composite():
+    fsm = make_play()
+    fsm.current_state = fsm.states["KICK"]
+    with pytest.raises(RuntimeError):
+        fsm.process_event("KICKED")
+
+
+def test_duplicate_names_need_a_prefix():
+    fsm = FSM(CompositeState("A", make_kick()))
+    fsm.add_state(CompositeState("B", make_kick()))
+    with pytest.raises(ValueError):
+        fsm.flatten()
+
+
+def test_build_play_chains_actions():
+    fsm = build_play(["pass", "shoot"])
+    fsm.run_actions = False
+    names = run(fsm, ["NEAR_BALL", "ALIGNED", "BALL_KICKED", "BALL_RECEIVED", "START", "NEAR_BALL"])
+    assert names[-3:] == ["PASS_1.SUCCESS", "SHOOT_2.INITIAL", "SHOOT_2.GO_TO_BALL"]
+    assert fsm.states["SHOOT_2.GOAL"].is_success
+
+
+@pytest.mark.parametrize("encoding", ["json", "binary"])
+def test_composite_round_trip(encoding):
+    if encoding == "json":
+        loaded = serialization.loads_json(serialization.dumps_json(make_play()))
+    else:
+        loaded = serialization.loads_binary(serialization.dumps_binary(make_play()))
+    assert serialization.fsm_to_dict(loaded) == serialization.fsm_to_dict(make_play().flatten())
+    assert run(loaded, ["GO", "KICKED", "NEXT"]) == ["KICK.START", "KICK.DONE", "END"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from events import EVENTS, EventRegistry, normalize
+from fleet import Fleet
+from fsm import FSM, State, Transition
+
+
+def make_fsm(seen):
+    start = State("START", seen.append)
+    middle = State("MIDDLE", seen.append)
+    end = State("END", is_final=True, is_success=True)
+    start.add_transition(Transition(middle, "GO"))
+    middle.add_transition(Transition(end, lambda e: e == "FINISH" or e.startswith("STOP")))
+    fsm = FSM(start)
+    fsm.add_state(middle)
+    fsm.add_state(end)
+    return fsm
+
+
+def test_registry_round_trip():
+    registry = EventRegistry(["A", "B"])
+    codes = registry.encode(["B", "C", "A"])
+    assert list(codes) == [1, 2, 0]
+    assert registry.decode(codes) == ["B", "C", "A"]
+    assert "C" in registry and len(registry) == 3
+
+
+def test_normalize():
+    assert normalize(np.uint16(3)).__class__ is int
+    assert normalize("GO") == "GO"
+    assert normalize(None) is None
+    assert normalize(True) is True
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_numpy_codes_match_and_actions_get_names(compiled):
+    seen = []
+    fsm = make_fsm(seen)
+    if compiled:
+        fsm.compile()
+    codes = np.array(EVENTS.encode(["GO", "FINISH"]))
+
+    assert not fsm.process_event(codes[0])
+    assert fsm.current_state.name == "MIDDLE"
+    assert fsm.process_event(codes[1])
+    assert seen == ["GO", "FINISH"]
+    assert all(event.__class__ is str for event in seen)
+
+
+def test_fleet_numpy_codes():
+    seen = []
+    fleet = Fleet(make_fsm(seen), ["R1"])
+    code = np.array(EVENTS.encode(["GO"]))[0]
+    fleet.dispatch([("R1", code)])
+    assert fleet.state_of("R1").name == "MIDDLE"
+    assert seen == ["GO"]
@@ -0,0 +1,42 @@
+from fleet import Fleet
+from fsm_builder import build_fsm
+
+
+def test_dispatch_runs_actions_for_each_robot(buffer):
+    robots = ["R1", "R7", "R9"]
+    fleet = Fleet(build_fsm("pass"), robots)
+    for event in ["NEAR_BALL", "ALIGNED"]:
+        fleet.dispatch([(robot, event) for robot in robots])
+
+    assert fleet.state_counts() == {"ALIGN": 3}
+    assert [(c.robot, c.kind) for c in buffer.pending] == [(robot, "go_to_ball") for robot in robots]
+
+
+def test_dispatch_without_actions(buffer):
+    fleet = Fleet(build_fsm("pass"), ["R1", "R2"], run_actions=False)
+    for event in ["NEAR_BALL", "ALIGNED"]:
+        fleet.dispatch([("R1", event), ("R2", event)])
+    assert buffer.pending == []
+
+
+def test_plain_actions_only_get_the_event():
+    from fsm import FSM, State, Transition
+
+    seen = []
+    start = State("START", lambda e: seen.append(e))
+    end = State("END", is_final=True, is_success=True)
+    start.add_transition(Transition(end, "GO"))
+    fsm = FSM(start)
+    fsm.add_state(end)
+
+    fleet = Fleet(fsm, ["A", "B"])
+    assert fleet.dispatch([("A", "GO"), ("B", "WAIT")]) == ["A"]
+    assert seen == ["GO", "WAIT"]
+
+
+def test_fork_shares_arrays_until_written():
+    fleet = Fleet(build_fsm("pass"), ["R1", "R2"], run_actions=False)
+    fork = fleet.fork()
+    fork.dispatch([("R1", "NEAR_BALL")])
+    assert fork.state_of("R1").name == "GO_TO_BALL"
+    assert fleet.state_of("R1").name == "INITIAL"
@@ -0,0 +1,202 @@
+import random
+
+import pytest
+
+import robot_actions as ra
+from events import EVENTS
+from fsm import FSM, EventCondition, State, Transition, literal_event
+from fsm_builder import FSM_TEMPLATES, build_fsm
+
+
+def make_coin_fsm(stochastic=True):
+    start = State("START")
+    heads = State("HEADS", is_final=True, is_success=True)
+    tails = State("TAILS", is_final=True)
+    start.add_transition(Transition(heads, "FLIP", probability=0.5))
+    start.add_transition(Transition(tails, "FLIP"))
+    fsm = FSM(start, stochastic=stochastic)
+    fsm.add_state(heads)
+    fsm.add_state(tails)
+    return fsm.compile()
+
+
+def flips(fsm, n=20):
+    outcomes = []
+    for _ in range(n):
+        fsm.reset()
+        fsm.process_event("FLIP")
+        outcomes.append(fsm.current_state.name)
+    return outcomes
+
+
+def test_deterministic_fsm_creates_no_rng():
+    fsm = build_fsm("pass")
+    for event in ["NEAR_BALL", "ALIGNED", "BALL_KICKED"]:
+        fsm.process_event(event)
+    assert fsm._rng is None
+    assert fsm.spawn()._rng is None
+
+
+def test_rng_created_on_first_stochastic_use():
+    fsm = make_coin_fsm()
+    assert fsm._rng is None
+    fsm.process_event("FLIP")
+    assert isinstance(fsm.rng, random.Random)
+
+
+def test_spawn_seed_is_reproducible():
+    template = make_coin_fsm()
+    assert flips(template.spawn(seed=7)) == flips(template.spawn(seed=7))
+    assert flips(template.spawn(rng=random.Random(3))) == flips(template.spawn(seed=3))
+
+
+def test_template_instance_seed():
+    first = FSM_TEMPLATES.instance("pass", seed=1)
+    assert first.rng.random() == random.Random(1).random()
+
+
+def test_fork_does_not_run_actions_by_default():
+    from commands import CommandBuffer, ListSink
+    import robot_actions as ra
+
+    buffer = CommandBuffer(ListSink())
+    previous = ra.set_command_buffer(buffer)
+    try:
+        fsm = build_fsm("pass")
+        fsm.process_event("NEAR_BALL")
+        for _ in range(3):
+            fork = fsm.fork()
+            fork.process_event("ALIGNED")
+            assert fork.current_state.name == "ALIGN"
+        assert buffer.pending == []
+
+        fsm.fork(run_actions=True).process_event("ALIGNED")
+        assert [c.kind for c in buffer.pending] == ["go_to_ball"]
+    finally:
+        ra.set_command_buffer(previous)
+    assert fsm.current_state.name == "GO_TO_BALL"
+
+
+def test_restore_keeps_compact_timestamps():
+    ticks = iter(range(100))
+    fsm = FSM(State("START"), history="compact", history_timestamps=True)
+    fsm.history.clock = lambda: float(next(ticks))
+    for _ in range(3):
+        fsm.process_event("NOISE")
+    snapshot = fsm.snapshot()
+    fsm.process_event("NOISE")
+    fsm.restore(snapshot)
+
+    exported = fsm.export_history()
+    assert list(exported["timestamps"]) == [0.0, 1.0, 2.0]
+    assert list(fsm.snapshot(history_limit=2).history.timestamps) == [1.0, 2.0]
+    # The snapshot can be restored again
+    fsm.process_event("NOISE")
+    fsm.restore(snapshot)
+    assert len(fsm.history) == 3
+
+
+def test_fork_does_not_consume_parent_rng():
+    def live_run(n_forks):
+        fsm = make_coin_fsm().spawn(seed=11)
+        outcomes = []
+        for _ in range(10):
+            for _ in range(n_forks):
+                fsm.fork().process_event("FLIP")
+            fsm.reset()
+            fsm.process_event("FLIP")
+            outcomes.append(fsm.current_state.name)
+        return outcomes
+
+    assert live_run(0) == live_run(3)
+
+
+def test_forks_are_reproducible():
+    def fork_outcomes():
+        fsm = make_coin_fsm().spawn(seed=5)
+        return [flips(fsm.fork(), 5) for _ in range(3)]
+
+    assert fork_outcomes() == fork_outcomes()
+
+
+def test_literal_event_detection():
+    expected = "X"
+    assert literal_event(EventCondition("GO")) == "GO"
+    assert literal_event(lambda e: e == "GO") == "GO"
+    assert literal_event(lambda e: "GO" == e) == "GO"
+    assert literal_event(ra.is_near_ball) == "NEAR_BALL"
+    assert literal_event(lambda e: e == expected) is None
+    assert literal_event(lambda e: e == 3) is None
+    assert literal_event(lambda e: e.startswith("G")) is None
+    assert literal_event(str.isupper) is None
+
+
+def test_string_and_event_condition_transitions_are_equivalent():
+    target = State("T")
+    by_name = Transition(target, "GO")
+    by_condition = Transition(target, EventCondition("GO"))
+    assert by_name.event == by_condition.event == "GO"
+    assert by_name.should_transition("GO") and not by_name.should_transition("STOP")
+
+
+def make_mixed_fsm():
+    """Literal and guard transitions interleaved on one state"""
+    expected = "X"
+    start = State("START")
+    targets = {name: State(name, is_final=True) for name in "ABCDE"}
+    start.add_transition(Transition(targets["A"], "STOP"))
+    start.add_transition(Transition(targets["B"], lambda e: e.startswith("G")))
+    start.add_transition(Transition(targets["C"], "GO"))
+    start.add_transition(Transition(targets["D"], lambda e: e == expected))
+    start.add_transition(Transition(targets["E"], "X"))
+    fsm = FSM(start)
+    for state in targets.values():
+        fsm.add_state(state)
+    return fsm
+
+
+@pytest.mark.parametrize("event", ["STOP", "GO", "GET", "X", "OTHER"])
+def test_compiled_dispatch_keeps_declaration_order(event):
+    expected = {"STOP": "A", "GO": "B", "GET": "B", "X": "D", "OTHER": "START"}[event]
+    uncompiled = make_mixed_fsm()
+    uncompiled.process_event(event)
+    assert not uncompiled.compiled
+    compiled = make_mixed_fsm().compile()
+    compiled.process_event(event)
+    by_code = make_mixed_fsm().compile()
+    by_code.process_event(EVENTS.intern(event))
+    assert uncompiled.current_state.name == compiled.current_state.name == by_code.current_state.name == expected
+
+
+def make_priority_fsm():
+    start = State("START")
+    low, high, other = State("LOW", is_final=True), State("HIGH", is_final=True), State("OTHER", is_final=True)
+    start.add_transition(Transition(low, "GO"))
+    start.add_transition(Transition(other, lambda e: e.startswith("G"), priority=1))
+    start.add_transition(Transition(high, "GO", priority=2))
+    fsm = FSM(start)
+    for state in (low, high, other):
+        fsm.add_state(state)
+    return fsm
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_higher_priority_transition_added_later_wins(compiled):
+    fsm = make_priority_fsm()
+    if compiled:
+        fsm.compile()
+    assert [t.target_state.name for t in fsm.initial_state.transitions] == ["HIGH", "OTHER", "LOW"]
+    fsm.process_event("GO")
+    assert fsm.compiled is compiled
+    assert fsm.current_state.name == "HIGH"
+    fsm.reset()
+    fsm.process_event("GET")
+    assert fsm.current_state.name == "OTHER"
+
+
+def test_priority_added_after_compile():
+    fsm = make_priority_fsm().compile()
+    top = State("TOP", is_final=True)
+    fsm.initial_state.add_transition(Transition(top, "GO", priority=3))
+    fsm.process_event("GO")
+    assert fsm.current_state is top
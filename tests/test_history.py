@@ -0,0 +1,39 @@
+import pytest
+
+from history import CompactHistory, NullHistory, copy_history, make_history
+
+
+def test_modes():
+    assert make_history() == []
+    assert isinstance(make_history("off"), NullHistory)
+    assert isinstance(make_history("compact"), CompactHistory)
+    ring = make_history("ring", size=2)
+    for name in "ABC":
+        ring.append(name)
+    assert list(ring) == ["B", "C"]
+    with pytest.raises(ValueError):
+        make_history("ring")
+    with pytest.raises(ValueError):
+        make_history("unknown")
+
+
+def test_compact_history_codes_names_once():
+    history = CompactHistory()
+    for name in ["START", "GO", "START", "GO"]:
+        history.append(name)
+    assert list(history) == ["START", "GO", "START", "GO"]
+    assert history.names == ["START", "GO"]
+    assert history[-1] == "GO"
+
+
+def test_copy_keeps_mode_and_timestamps():
+    ticks = iter(range(10))
+    history = CompactHistory(timestamps=True, clock=lambda: float(next(ticks)))
+    for name in "ABC":
+        history.append(name)
+    copy = copy_history(history, limit=2)
+    assert isinstance(copy, CompactHistory)
+    assert list(copy) == ["B", "C"]
+    assert list(copy.timestamps) == [1.0, 2.0]
+    copy.append("D")
+    assert len(history) == 3
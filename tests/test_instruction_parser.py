@@ -0,0 +1,20 @@
+from instruction_parser import describe_instruction, parse_instruction
+
+
+def test_parses_action_and_robot():
+    parsed = parse_instruction("  Pass the ball to R12 ")
+    assert parsed["action"] == "pass"
+    assert parsed["params"] == {"target_robot": "R12"}
+    assert describe_instruction(parsed) == "Pass to robot R12"
+
+
+def test_defaults_and_unknown_instructions():
+    assert describe_instruction(parse_instruction("Block him")) == "Block robot R3"
+    assert parse_instruction("Shoot the ball into the goal")["params"] == {}
+    assert parse_instruction("Dance") is None
+
+
+def test_results_are_not_shared_between_calls():
+    first = parse_instruction("pass to r2")
+    first["params"]["target_robot"] = "R9"
+    assert parse_instruction("pass to r2")["params"] == {"target_robot": "R2"}
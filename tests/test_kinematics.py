@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import kinematics
+
+
+def test_ball_stops_under_friction():
+    times = np.array([0.0, 1.0, 2.0, 10.0])
+    positions = kinematics.ball_positions((0.0, 0.0), (1.0, 0.0), times, deceleration=0.5)
+    # Stops after v / a = 2 s, having travelled v^2 / 2a = 1 m
+    assert positions[:, 0] == pytest.approx([0.0, 0.75, 1.0, 1.0])
+    assert kinematics.stop_time((1.0, 0.0), 0.5) == pytest.approx(2.0)
+
+
+def test_interceptions_shapes_and_feasibility():
+    robots = [(0.5, 0.0), (100.0, 100.0)]
+    result = kinematics.interceptions(robots, [(0.0, 0.0)], [(1.0, 0.0)])
+    assert result.points.shape == (2, 1, 2)
+    assert result.feasible.tolist() == [[True], [False]]
+    assert result.times[0, 0] <= 0.5
+
+
+def test_blocking_point_between_threat_and_goal():
+    point = kinematics.blocking_points([(0.0, 0.0)], protect=(-4.5, 0.0), standoff=0.3)[0]
+    assert point == pytest.approx([-0.3, 0.0])
+
+
+def test_engine_caches_per_frame():
+    engine = kinematics.KinematicsEngine()
+    assert engine.interception_point("R1") is None
+    engine.update(1, (0.0, 0.0), (1.0, 0.0), {"R1": (0.5, 0.0)})
+    first = engine.interception()
+    assert engine.interception() is first
+    engine.update(1, (5.0, 5.0), (0.0, 0.0), {"R1": (0.5, 0.0)})
+    assert engine.interception() is first
+    engine.update(2, (5.0, 5.0), (0.0, 0.0), {"R1": (0.5, 0.0)})
+    assert engine.interception() is not first
@@ -0,0 +1,74 @@
+import json
+
+import main
+
+
+def run_cli(capsys, *argv):
+    status = main.cli(list(argv))
+    return status, capsys.readouterr().out
+
+
+def test_simulate_log_replay(tmp_path, capsys):
+    log = tmp_path / "game.jsonl"
+    log.write_text("\n".join(json.dumps(record) for record in [
+        {"t": 0.0, "robot": "R1", "event": "NEAR_BALL"},
+        {"t": 0.1, "robot": "R2", "event": "NOISE"},
+        {"t": 0.2, "robot": "R1", "event": "ALIGNED"},
+    ]) + "\n")
+
+    status, out = run_cli(capsys, "simulate", "-a", "pass", "--log", str(log))
+    changes = [json.loads(line) for line in out.splitlines()]
+    assert status == 0
+    assert [(c["robot"], c["source"], c["target"]) for c in changes] == [
+        ("R1", "INITIAL", "GO_TO_BALL"), ("R1", "GO_TO_BALL", "ALIGN")]
+
+
+def test_log_replay_keeps_no_history(monkeypatch, tmp_path, capsys):
+    import replay
+
+    spawned = []
+    original = replay.replay
+
+    def recording_replay(records, factory, **kwargs):
+        def tracked(robot):
+            spawned.append(factory(robot))
+            return spawned[-1]
+        return original(records, tracked, **kwargs)
+
+    monkeypatch.setattr(replay, "replay", recording_replay)
+    log = tmp_path / "game.jsonl"
+    log.write_text(json.dumps({"t": 0.0, "robot": "R1", "event": "NEAR_BALL"}) + "\n")
+    run_cli(capsys, "simulate", "-a", "pass", "--log", str(log))
+    assert spawned and all(len(fsm.history) == 0 and fsm.history_mode[0] == "off" for fsm in spawned)
+
+
+def test_simulate_events(tmp_path, capsys):
+    events = tmp_path / "events.txt"
+    events.write_text("NEAR_BALL\nALIGNED\n")
+    status, out = run_cli(capsys, "simulate", "-a", "pass", "-e", str(events))
+    result = json.loads(out)
+    assert status == 0 and result["state"] == "ALIGN"
+    assert result["history"] == ["INITIAL", "GO_TO_BALL"]
+
+
+def test_analyze_strict(capsys):
+    status, out = run_cli(capsys, "analyze", "-a", "shoot", "--strict")
+    assert status == 0
+    assert json.loads(out)["validation"]["issues"] == []
+
+
+def test_output_file_is_closed(monkeypatch, tmp_path, capsys):
+    import argparse
+
+    opened = []
+
+    def recording_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(argparse, "open", recording_open, raising=False)
+    path = tmp_path / "analysis.json"
+    status, out = run_cli(capsys, "-o", str(path), "analyze", "-a", "shoot")
+    assert status == 0 and out == ""
+    assert len(opened) == 1 and opened[0].closed
+    assert json.loads(path.read_text())["validation"]["issues"] == []
@@ -0,0 +1,53 @@
+import pytest
+
+import markov
+import simulation
+from fsm import FSM, State, Transition
+from fsm_builder import build_fsm
+
+
+def make_retry_fsm():
+    """Kick succeeds with probability 0.6, otherwise retries once before failing"""
+    start = State("START")
+    retry = State("RETRY")
+    goal = State("GOAL", is_final=True, is_success=True)
+    miss = State("MISS", is_final=True)
+    start.add_transition(Transition(goal, "KICK", probability=0.6))
+    start.add_transition(Transition(retry, "KICK"))
+    retry.add_transition(Transition(goal, "KICK", probability=0.6))
+    retry.add_transition(Transition(miss, "KICK"))
+    fsm = FSM(start, stochastic=True)
+    for state in [retry, goal, miss]:
+        fsm.add_state(state)
+    return fsm.compile()
+
+
+def test_exact_success_probability():
+    analysis = markov.analyze(make_retry_fsm())
+    assert analysis.success_probability == pytest.approx(0.6 + 0.4 * 0.6)
+    assert analysis.expected_steps == pytest.approx(1 + 0.4)
+
+
+def test_sparse_and_dense_agree():
+    dense = markov.analyze(make_retry_fsm(), sparse=False)
+    sparse = markov.analyze(make_retry_fsm(), sparse=True)
+    assert sparse.success_probability == pytest.approx(dense.success_probability)
+    assert sparse.expected_steps == pytest.approx(dense.expected_steps)
+
+
+def test_simulation_converges_to_exact_probability():
+    fsm = make_retry_fsm()
+    result = simulation.simulate(fsm, 20000, seed=3)
+    assert result.success_rate == pytest.approx(markov.analyze(fsm).success_probability, abs=0.02)
+    assert result.truncated_rate == 0
+
+
+def test_simulation_is_reproducible_with_a_seed():
+    fsm = make_retry_fsm()
+    first = simulation.simulate(fsm, 1000, seed=7).as_dict()
+    assert simulation.simulate(fsm, 1000, seed=7).as_dict() == first
+
+
+def test_deterministic_play_always_succeeds():
+    analysis = markov.analyze(build_fsm("shoot"))
+    assert analysis.success_probability == pytest.approx(1.0)
@@ -0,0 +1,82 @@
+from fsm import FSM, State, Transition
+from metrics import LatencyHistogram, MetricsCollector
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_fsm():
+    start = State("START")
+    work = State("WORK")
+    done = State("DONE", is_final=True, is_success=True)
+    start.add_transition(Transition(work, "GO"))
+    work.add_transition(Transition(done, "FINISH"))
+    fsm = FSM(start)
+    fsm.add_state(work)
+    fsm.add_state(done)
+    return fsm.compile()
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for duration in [1e-6] * 98 + [1e-3, 2e-3]:
+        histogram.record(duration)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 1e-6
+    assert histogram.percentile(100) == 2e-3
+
+
+def test_dwell_after_reset_starts_at_reset():
+    clock = FakeClock()
+    collector = MetricsCollector(clock)
+    fsm = make_fsm()
+    fsm.add_observer(collector)
+
+    fsm.process_event("GO")
+    clock.now = 1.0
+    fsm.process_event("FINISH")
+
+    clock.now = 100.0
+    fsm.reset()
+    clock.now = 102.0
+    fsm.process_event("GO")
+
+    assert collector.dwell_time["WORK"].total == 1.0
+    # Measured from the reset, not from the entry into DONE
+    assert collector.dwell_time["START"].total == 2.0
+    assert collector.transitions[("START", "WORK")] == 2
+
+
+def test_several_fsms_are_tracked_separately():
+    clock = FakeClock()
+    collector = MetricsCollector(clock)
+    first, second = make_fsm(), make_fsm()
+    first.add_observer(collector)
+    second.add_observer(collector)
+
+    first.process_event("GO")
+    clock.now = 1.0
+    second.process_event("GO")
+    clock.now = 3.0
+    first.process_event("FINISH")
+    second.process_event("FINISH")
+
+    assert collector.visits == {"WORK": 2, "DONE": 2}
+    assert collector.transitions == {("START", "WORK"): 2, ("WORK", "DONE"): 2}
+    assert collector.dwell_time["WORK"].min == 2.0
+    assert collector.dwell_time["WORK"].max == 3.0
+
+
+def test_unmatched_and_export():
+    collector = MetricsCollector()
+    fsm = make_fsm()
+    fsm.add_observer(collector)
+    fsm.process_event("NOISE")
+    export = collector.export()
+    assert export["unmatched"] == {"START:NOISE": 1}
+    assert "START" in collector.report()
@@ -0,0 +1,33 @@
+import io
+
+import pytest
+
+import markov
+import render
+from fsm_builder import build_fsm
+
+
+@pytest.mark.parametrize("fmt", ["ascii", "dot", "mermaid"])
+def test_every_state_and_event_is_rendered(fmt):
+    text = render.render(build_fsm("pass"), fmt)
+    for name in ["INITIAL", "GO_TO_BALL", "ALIGN", "PASS", "SUCCESS", "FAILURE", "BALL_RECEIVED"]:
+        assert name in text
+
+
+def test_writes_to_a_stream():
+    out = io.StringIO()
+    assert render.to_dot(build_fsm("shoot"), out=out) is None
+    assert out.getvalue() == render.to_dot(build_fsm("shoot"))
+
+
+def test_annotations_from_analysis():
+    labels, _ = render.annotations(markov.analyze(build_fsm("shoot")))
+    assert labels["GOAL"] == "p=100.0%"
+    assert "p=100.0%" in render.to_mermaid(build_fsm("shoot"), stats=markov.analyze(build_fsm("shoot")))
+
+
+def test_unknown_format_and_stats():
+    with pytest.raises(ValueError):
+        render.render(build_fsm("pass"), "svg")
+    with pytest.raises(TypeError):
+        render.annotations(42)
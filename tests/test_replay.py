@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+import replay
+from fsm_builder import build_fsm
+
+RECORDS = [
+    replay.Record(0.0, "R1", "NEAR_BALL"),
+    replay.Record(0.1, "R2", "NEAR_BALL"),
+    replay.Record(0.2, "R1", "ALIGNED"),
+    replay.Record(0.3, "R1", "UNKNOWN"),
+    replay.Record(0.4, "R2", "ALIGNED"),
+]
+ROBOTS = ["R1", "R2"]
+EVENTS = ["NEAR_BALL", "ALIGNED", "UNKNOWN"]
+
+
+def factory(robot):
+    fsm = build_fsm("pass").spawn(history="off")
+    fsm.run_actions = False
+    return fsm
+
+
+def test_binary_log_round_trip():
+    buffer = io.BytesIO()
+    replay.write_binary_log(buffer, RECORDS, ROBOTS, EVENTS)
+    buffer.seek(0)
+    changes = list(replay.replay(replay.read_binary(buffer), factory))
+    assert changes == list(replay.replay(RECORDS, factory))
+    assert [(c.robot, c.event, c.target) for c in changes] == [
+        ("R1", "NEAR_BALL", "GO_TO_BALL"),
+        ("R2", "NEAR_BALL", "GO_TO_BALL"),
+        ("R1", "ALIGNED", "ALIGN"),
+        ("R2", "ALIGNED", "ALIGN"),
+    ]
+
+
+def test_truncated_binary_log():
+    buffer = io.BytesIO()
+    replay.write_binary_log(buffer, RECORDS, ROBOTS, EVENTS)
+    with pytest.raises(ValueError):
+        list(replay.read_binary(io.BytesIO(buffer.getvalue()[:-3])))
+
+
+def test_text_logs():
+    jsonl = io.StringIO('{"t": 0.5, "robot": "R1", "event": "NEAR_BALL"}\n\n')
+    csv = io.StringIO("timestamp,robot,event\n0.5,R1,NEAR_BALL\n")
+    expected = [replay.Record(0.5, "R1", "NEAR_BALL")]
+    assert list(replay.read_jsonl(jsonl)) == expected
+    assert list(replay.read_csv(csv)) == expected
@@ -0,0 +1,36 @@
+import pytest
+
+import kinematics
+import robot_actions as ra
+from commands import describe
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = kinematics.KinematicsEngine()
+    monkeypatch.setattr(kinematics, "ENGINE", engine)
+    return engine
+
+
+def test_planning_sends_no_command(buffer, engine, capsys):
+    ra.PLANNED_POSITIONS["R4"] = (9.0, 9.0)
+    assert ra.calculate_trajectory("R4") is False
+    assert ra.calculate_block_position("R5", "R3") is False
+    assert capsys.readouterr().out == ""
+    assert buffer.pending == []
+    # A stale plan is not reused without a vision frame
+    ra.go_to_position("R4", "interception")
+    assert describe(buffer.pending[0]) == "Robot R4 moves to interception position"
+
+
+def test_planned_position_is_used_by_go_to_position(buffer, engine):
+    engine.update(1, (0.0, 0.0), (1.0, 0.0), {"R1": (1.0, 0.0)}, {"O1": (2.0, 0.0)})
+    assert ra.calculate_trajectory("R1")
+    assert buffer.pending == []
+    ra.go_to_position("R1", "interception")
+    command = buffer.pending[0]
+    assert command.kind == "go_to_position"
+    assert command.point == ra.PLANNED_POSITIONS["R1"]
+
+    assert ra.calculate_block_position("R1", "O1")
+    assert ra.PLANNED_POSITIONS["R1"] == pytest.approx(kinematics.blocking_points([(2.0, 0.0)])[0])
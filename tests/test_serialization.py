@@ -0,0 +1,37 @@
+import pytest
+
+import serialization
+from fsm_builder import build_fsm
+from instruction_parser import INSTRUCTION_MAPPING
+
+
+@pytest.mark.parametrize("action", sorted(INSTRUCTION_MAPPING))
+def test_json_and_binary_round_trip(action):
+    fsm = build_fsm(action)
+    expected = serialization.fsm_to_dict(fsm)
+    assert serialization.fsm_to_dict(serialization.loads_json(serialization.dumps_json(fsm))) == expected
+    assert serialization.fsm_to_dict(serialization.loads_binary(serialization.dumps_binary(fsm))) == expected
+
+
+def test_loaded_fsm_runs(tmp_path):
+    path = tmp_path / "pass.fsm"
+    serialization.save(build_fsm("pass"), str(path))
+    fsm = serialization.load(str(path))
+    names = []
+    for event in ["NEAR_BALL", "ALIGNED", "BALL_KICKED"]:
+        fsm.process_event(event)
+        names.append(fsm.current_state.name)
+    assert names == ["GO_TO_BALL", "ALIGN", "PASS"]
+
+
+def test_library_decodes_on_demand(tmp_path):
+    path = str(tmp_path / "plays.lib")
+    serialization.save_library(path, {action: build_fsm(action) for action in ["pass", "shoot"]})
+    with serialization.FSMLibrary(path) as library:
+        assert len(library) == 2
+        assert "shoot" in library and "block" not in library
+        first, second = library["pass"], library["pass"]
+        assert first is not second
+        assert serialization.fsm_to_dict(first) == serialization.fsm_to_dict(build_fsm("pass"))
+        with pytest.raises(KeyError):
+            library["block"]
@@ -0,0 +1,38 @@
+import pytest
+
+import main
+from sweep import apply_overrides, run_sweep, scenario_grid
+
+
+def test_overrides_are_scoped_per_builder():
+    grid = scenario_grid(["create_simple_pass_fsm", "create_block_fsm"],
+                         overrides=[{}, {("PASS", "SUCCESS"): 0.5}], seeds=(0, 1))
+    assert [(s["builder"], s["overrides"], s["seed"]) for s in grid] == [
+        ("create_simple_pass_fsm", {}, 0),
+        ("create_simple_pass_fsm", {}, 1),
+        ("create_simple_pass_fsm", {("PASS", "SUCCESS"): 0.5}, 0),
+        ("create_simple_pass_fsm", {("PASS", "SUCCESS"): 0.5}, 1),
+        ("create_block_fsm", {}, 0),
+        ("create_block_fsm", {}, 1),
+    ]
+
+
+def test_override_matching_no_builder():
+    with pytest.raises(ValueError):
+        scenario_grid(["create_block_fsm"], overrides=[{("PASS", "SUCCESS"): 0.5}])
+
+
+def test_apply_overrides():
+    fsm = main.create_simple_pass_fsm()
+    apply_overrides(fsm, {("PASS", "SUCCESS"): 0.25})
+    assert [t.probability for t in fsm.states["PASS"].transitions if t.target_state.name == "SUCCESS"] == [0.25]
+    with pytest.raises(ValueError):
+        apply_overrides(fsm, {("PASS", "NOWHERE"): 0.5})
+
+
+def test_mixed_sweep_runs():
+    grid = scenario_grid(["create_simple_pass_fsm", "create_block_fsm"],
+                         overrides=[{}, {("PASS", "SUCCESS"): 0.5}])
+    results, aggregate = run_sweep(grid, exact=True, max_workers=2)
+    assert len(results) == 3 and len(aggregate) == 3
+    assert results[1]["success_rate"] < results[0]["success_rate"]
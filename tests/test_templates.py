@@ -0,0 +1,61 @@
+import pytest
+
+from fsm import FSM, State
+from templates import TemplateRegistry
+
+
+def counting_builder(calls):
+    def build(**params):
+        calls.append(params)
+        return FSM(State("START"))
+    return build
+
+
+def test_hits_and_misses():
+    calls = []
+    registry = TemplateRegistry()
+    registry.register("pass", counting_builder(calls))
+    first = registry.template("pass", target="R2")
+    assert registry.template("pass", target="R2") is first
+    assert registry.template("pass", target="R3") is not first
+    assert (registry.hits, registry.misses) == (1, 2)
+    assert calls == [{"target": "R2"}, {"target": "R3"}]
+
+
+def test_least_recently_used_template_is_evicted():
+    calls = []
+    registry = TemplateRegistry(maxsize=2)
+    registry.register("pass", counting_builder(calls))
+    a = registry.template("pass", target="A")
+    registry.template("pass", target="B")
+    assert registry.template("pass", target="A") is a  # B is now the oldest
+    registry.template("pass", target="C")
+    assert len(registry) == 2
+    assert registry.template("pass", target="A") is a
+    registry.template("pass", target="B")
+    assert [params["target"] for params in calls] == ["A", "B", "C", "B"]
+
+
+def test_register_invalidates_the_action_only():
+    registry = TemplateRegistry()
+    registry.register("pass", counting_builder([]))
+    registry.register("shoot", counting_builder([]))
+    old_pass = registry.template("pass")
+    shoot = registry.template("shoot")
+    registry.register("pass", counting_builder([]))
+    assert registry.template("pass") is not old_pass
+    assert registry.template("shoot") is shoot
+
+
+def test_instances_share_the_template():
+    registry = TemplateRegistry()
+    registry.register("pass", counting_builder([]))
+    first, second = registry.instance("pass"), registry.instance("pass")
+    assert first is not second
+    assert first.states is second.states is registry.template("pass").states
+    assert first.compiled
+
+
+def test_unknown_action():
+    with pytest.raises(KeyError):
+        TemplateRegistry().template("dance")
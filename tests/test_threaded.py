@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+from events import EventRegistry
+from fsm import FSM, State, Transition
+from threaded import FSMInbox, LockedFSM
+
+N_PRODUCERS = 4
+PER_PRODUCER = 2000
+
+
+def run_threads(target, n_threads):
+    barrier = threading.Barrier(n_threads)
+
+    def start(k):
+        barrier.wait()
+        target(k)
+
+    threads = [threading.Thread(target=start, args=(k,)) for k in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def make_recorder(seen, fail_on=None):
+    def record(event):
+        if event == fail_on:
+            raise ValueError(f"bad event {event}")
+        seen.append(event)
+
+    state = State("RECORD", record)
+    state.add_transition(Transition(state, "NEVER"))
+    return FSM(state, history="off").compile()
+
+
+def produce(inbox):
+    def producer(k):
+        for seq in range(0, PER_PRODUCER, 10):
+            inbox.post((k, seq))
+            inbox.post_many([(k, seq + j) for j in range(1, 10)])
+    return producer
+
+
+def test_inbox_keeps_order_and_loses_nothing():
+    seen = []
+    inbox = FSMInbox(make_recorder(seen)).start()
+    run_threads(produce(inbox), N_PRODUCERS)
+    assert inbox.stop(timeout=10)
+
+    assert len(seen) == inbox.processed == N_PRODUCERS * PER_PRODUCER
+    for k in range(N_PRODUCERS):
+        assert [seq for producer, seq in seen if producer == k] == list(range(PER_PRODUCER))
+
+
+def test_inbox_batches_are_not_interleaved():
+    seen = []
+    inbox = FSMInbox(make_recorder(seen)).start()
+
+    def producer(k):
+        for batch in range(200):
+            inbox.post_many([(k, batch, j) for j in range(5)])
+    run_threads(producer, N_PRODUCERS)
+    assert inbox.stop(timeout=10)
+
+    for start in range(0, len(seen), 5):
+        chunk = seen[start:start + 5]
+        assert len({(k, batch) for k, batch, _ in chunk}) == 1
+        assert [j for _, _, j in chunk] == list(range(5))
+
+
+def test_drain_in_the_control_loop():
+    seen = []
+    inbox = FSMInbox(make_recorder(seen))
+    inbox.post("A")
+    inbox.post_many(["B", "C"])
+    future = inbox.submit(lambda fsm: fsm.current_state.name)
+    assert inbox.drain(max_items=1) == 1
+    assert seen == ["A"]
+    assert inbox.drain() == 2
+    assert seen == ["A", "B", "C"]
+    assert future.result(0) == "RECORD"
+
+
+def test_failing_event_does_not_stop_the_worker():
+    seen = []
+    inbox = FSMInbox(make_recorder(seen, fail_on="BAD")).start()
+    for event in ["X", "BAD", "X"]:
+        inbox.post(event)
+    inbox.post_many(["BAD", "Y"])
+    future = inbox.submit(lambda fsm: len(seen))
+    assert future.result(timeout=5) == 3
+    assert inbox.stop(timeout=5)
+
+    assert seen == ["X", "X", "Y"]
+    assert inbox.processed == 5
+    errors = []
+    while not inbox.errors.empty():
+        errors.append(inbox.errors.get())
+    assert [(event, type(error)) for event, error in errors] == [("BAD", ValueError)] * 2
+
+
+def test_on_error_callback_and_failing_submit():
+    reported = []
+    inbox = FSMInbox(make_recorder([], fail_on="BAD"),
+                     on_error=lambda event, error: reported.append(event)).start()
+    inbox.post("BAD")
+    future = inbox.submit(lambda fsm: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result(timeout=5)
+    assert inbox.stop(timeout=5)
+    assert reported == ["BAD"]
+    assert inbox.errors.empty()
+
+
+def test_stop_timeout_keeps_the_worker_owner():
+    release = threading.Event()
+    state = State("SLOW", lambda e: release.wait(5))
+    inbox = FSMInbox(FSM(state, history="off")).start()
+    inbox.post("GO")
+    time.sleep(0.05)
+
+    assert not inbox.stop(timeout=0.05)
+    with pytest.raises(RuntimeError):
+        inbox.drain()
+    release.set()
+    assert inbox.stop(timeout=5)
+    assert inbox.drain() == 0
+
+
+def test_locked_fsm_serializes_transitions():
+    ping, pong = State("PING"), State("PONG")
+    ping.add_transition(Transition(pong, "T"))
+    pong.add_transition(Transition(ping, "T"))
+    fsm = FSM(ping).compile()
+    fsm.add_state(pong)
+    locked = LockedFSM(fsm)
+
+    def worker(k):
+        for _ in range(PER_PRODUCER // 2):
+            locked.process_event("T")
+            locked.process_events(["T"])
+    run_threads(worker, N_PRODUCERS)
+
+    history = locked.export_history()
+    names = [history["states"][code] for code in history["codes"]]
+    assert len(names) == N_PRODUCERS * PER_PRODUCER
+    assert all(a != b for a, b in zip(names, names[1:]))
+    assert locked.current_state is ping
+
+
+def test_concurrent_intern_assigns_unique_codes():
+    for _ in range(20):
+        registry = EventRegistry()
+        names = [f"E{i}" for i in range(200)]
+        results = [None] * N_PRODUCERS
+
+        def worker(k):
+            results[k] = [registry.intern(name) for name in names]
+        run_threads(worker, N_PRODUCERS)
+
+        assert all(result == results[0] for result in results)
+        assert sorted(results[0]) == list(range(len(names)))
+        assert registry.decode(results[0]) == names
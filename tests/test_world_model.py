@@ -0,0 +1,82 @@
+import math
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from world_model import WorldModel
+
+
+def test_near_ball_has_hysteresis():
+    world = WorldModel()
+    assert world.update(0.0, (0.0, 0.0), {"R1": (1.0, 0.0, 0.0)}) == []
+    assert world.update(0.1, (0.0, 0.0), {"R1": (0.15, 0.0, 0.0)}) == [("R1", "NEAR_BALL")]
+    # Between the enter and release thresholds: no new event, still near
+    assert world.update(0.2, (0.0, 0.0), {"R1": (0.25, 0.0, 0.0)}) == []
+    assert world.update(0.3, (0.0, 0.0), {"R1": (0.15, 0.0, 0.0)}) == []
+    world.update(0.4, (0.0, 0.0), {"R1": (0.5, 0.0, 0.0)})
+    assert world.update(0.5, (0.0, 0.0), {"R1": (0.15, 0.0, 0.0)}) == [("R1", "NEAR_BALL")]
+
+
+def test_aligned_towards_target_robot():
+    world = WorldModel()
+    world.set_target("R1", "R2")
+    world.update(0.0, (5.0, 5.0), {"R1": (0.0, 0.0, math.pi / 2), "R2": (2.0, 0.0, 0.0)})
+    assert world.update(0.1, (5.0, 5.0), {"R1": (0.0, 0.0, 0.01)}) == [("R1", "ALIGNED")]
+    # The target moving away from the heading releases the alignment
+    world.update(0.2, (5.0, 5.0), {"R2": (0.0, 2.0, 0.0)})
+    assert "R1" not in world.aligned
+
+
+def test_kick_and_reception():
+    world = WorldModel()
+    robots = {"R1": (0.1, 0.0, 0.0), "R2": (3.0, 0.0, math.pi)}
+    assert world.update(0.0, (0.0, 0.0), robots) == [("R1", "NEAR_BALL")]
+    assert world.update(0.1, (1.0, 0.0), {}) == [("R1", "BALL_KICKED")]
+    assert world.update(0.2, (2.95, 0.0), {}) == [
+        ("R2", "NEAR_BALL"), ("R1", "BALL_RECEIVED"), ("R2", "BALL_RECEIVED"),
+    ]
+
+
+def test_receiver_is_the_robot_closest_to_the_ball():
+    world = WorldModel()
+    world.update(0.0, (0.0, 0.0), {"R1": (0.1, 0.0, 0.0), "R5": (3.1, 0.0, 0.0), "R3": (2.8, 0.0, 0.0)})
+    world.update(0.1, (1.0, 0.0), {})
+    assert world.update(0.2, (2.98, 0.0), {}) == [
+        ("R3", "NEAR_BALL"), ("R5", "NEAR_BALL"), ("R1", "BALL_RECEIVED"), ("R5", "BALL_RECEIVED"),
+    ]
+
+
+def test_frame_without_ball():
+    world = WorldModel()
+    world.set_target("R1", (5.0, 0.0))
+    world.update(0.0, (0.0, 0.0), {"R1": (1.0, 0.0, math.pi)})
+    # Robots are still tracked and aligned while the ball is not seen
+    assert world.update(0.1, None, {"R1": (0.1, 0.0, 0.0)}) == [("R1", "ALIGNED")]
+    assert world.update(0.2, (0.0, 0.0), {}) == [("R1", "NEAR_BALL")]
+
+
+def test_event_order_does_not_depend_on_the_hash_seed():
+    script = textwrap.dedent("""
+        import math
+        from world_model import WorldModel
+        world = WorldModel()
+        robots = {f"R{i}": (0.05 * (i % 3), 0.01 * i, 0.0) for i in range(12)}
+        for robot in robots:
+            world.set_target(robot, (5.0, 0.0))
+        print(world.update(0.0, (0.0, 0.0), robots))
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    outputs = {
+        subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True,
+                       env={**os.environ, "PYTHONHASHSEED": str(seed)}, check=True).stdout
+        for seed in range(4)
+    }
+    assert len(outputs) == 1
+
+
+def test_release_thresholds_must_be_looser():
+    with pytest.raises(ValueError):
+        WorldModel(near_distance=0.5, near_release=0.3)
@@ -0,0 +1,244 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+# Sentinel that stops an inbox's worker thread when put in its queue.
+STOP = object()
+
+
+class _Batch(list):
+    """Events posted together, processed back to back"""
+
+
+class _Call:
+    """Function submitted to run in the consumer"""
+
+    __slots__ = ("future", "function")
+
+    def __init__(self, future, function):
+        self.future = future
+        self.function = function
+
+
+class FSMInbox:
+    def __init__(self, fsm, on_final=None, on_error=None):
+        """
+        Single-writer execution of an FSM fed from any number of threads.
+
+        Concurrency model: producers (e.g. the vision thread) only call post(),
+        post_many() or submit(), which append to a queue.SimpleQueue and never
+        touch the FSM. Exactly one consumer processes the queue, either a
+        worker thread started with start() or a control loop calling drain().
+        The FSM is therefore only mutated by one thread and needs no lock.
+
+        Events of one producer are processed in the order it posted them, and
+        a post_many() batch is never interleaved with other events; events of
+        different producers are processed in the order they reached the
+        queue. Nothing is dropped: every posted event is processed before
+        STOP, even when an earlier one raised (an action or on_final error is
+        reported to on_error, or put in the `errors` queue, and the consumer
+        moves on). After each event, `state` and `processed` are published
+        with plain attribute stores, which other threads may read at any time.
+
+        The FSM graph is shared read-only: do not add states or transitions
+        while the inbox runs. Dispatch tables built lazily on the consumer
+        thread and events.EVENTS.intern are safe to use from several threads.
+
+        Args:
+            fsm (FSM): FSM owned by the inbox; do not call its methods from
+                other threads, use submit() instead
+            on_final (callable, optional): Called with the final state, in the
+                consumer thread, when the FSM reaches a final state
+            on_error (callable, optional): Called with (event, exception), in
+                the consumer thread, when processing an event raises; by
+                default the pair is put in the `errors` queue
+        """
+        self.fsm = fsm
+        self.on_final = on_final
+        self.on_error = on_error
+        self.queue = queue.SimpleQueue()
+        self.errors = queue.SimpleQueue()
+        self.state = fsm.current_state
+        self.processed = 0
+        self._thread = None
+        self._stopping = False
+
+    def post(self, event):
+        """Queue an event (any thread)"""
+        self.queue.put(event)
+
+    def post_many(self, events):
+        """Queue several events that must be processed back to back (any thread)"""
+        self.queue.put(_Batch(events))
+
+    def submit(self, function):
+        """
+        Run function(fsm) in the consumer, after the events already queued (any thread).
+
+        Use it for reads that must be consistent with the event order, such
+        as fsm.snapshot or fsm.export_history, or for reset.
+
+        Returns:
+            concurrent.futures.Future: Result of the call
+        """
+        future = Future()
+        self.queue.put(_Call(future, function))
+        return future
+
+    def _handle(self, item):
+        if item.__class__ is _Call:
+            future = item.future
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(item.function(self.fsm))
+                except BaseException as error:
+                    future.set_exception(error)
+            self.state = self.fsm.current_state
+            return
+        events = item if item.__class__ is _Batch else (item,)
+        fsm = self.fsm
+        for event in events:
+            try:
+                finished = fsm.process_event(event)
+                if finished and self.on_final is not None:
+                    self.on_final(fsm.current_state)
+            except Exception as error:
+                self._report(event, error)
+            self.processed += 1
+            self.state = fsm.current_state
+
+    def _report(self, event, error):
+        if self.on_error is None:
+            self.errors.put((event, error))
+            return
+        try:
+            self.on_error(event, error)
+        except Exception as handler_error:
+            self.errors.put((event, handler_error))
+
+    def drain(self, max_items=None):
+        """
+        Process the queued items without blocking (consumer only).
+
+        Args:
+            max_items (int, optional): Stop after this many queue items
+
+        Returns:
+            int: Number of queue items handled
+        """
+        if self._thread is not None:
+            raise RuntimeError("The inbox is consumed by its worker thread")
+        handled = 0
+        get = self.queue.get_nowait
+        while max_items is None or handled < max_items:
+            try:
+                item = get()
+            except queue.Empty:
+                break
+            if item is STOP:
+                break
+            self._handle(item)
+            handled += 1
+        return handled
+
+    def _run(self):
+        get = self.queue.get
+        while True:
+            item = get()
+            if item is STOP:
+                return
+            self._handle(item)
+
+    def start(self):
+        """Consume the queue in a dedicated daemon thread"""
+        if self._thread is not None:
+            raise RuntimeError("The inbox is already started")
+        self._thread = threading.Thread(target=self._run, name="FSMInbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Let the worker thread process what is queued, then stop it.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the worker
+
+        Returns:
+            bool: True once the worker has exited; if the timeout expired
+                first, the inbox still belongs to the worker (drain() refuses
+                to run) and stop() can be called again
+        """
+        if self._thread is None:
+            return True
+        if not self._stopping:
+            self._stopping = True
+            self.queue.put(STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False
+        self._thread = None
+        self._stopping = False
+        return True
+
+
+class LockedFSM:
+    def __init__(self, fsm):
+        """
+        FSM wrapper serializing every access with one lock.
+
+        Concurrency model: any thread may call process_event; each call (or
+        process_events batch) runs atomically, so an event's action, history
+        entry and transition are never interleaved with another event's.
+        Events racing from different threads are processed in the order
+        they acquire the lock. Prefer FSMInbox when one thread can own the
+        FSM: it never blocks producers.
+
+        Args:
+            fsm (FSM): FSM to protect; do not use it directly once wrapped
+        """
+        self.fsm = fsm
+        self.lock = threading.Lock()
+
+    @property
+    def current_state(self):
+        return self.fsm.current_state
+
+    def process_event(self, event):
+        """Thread-safe FSM.process_event"""
+        with self.lock:
+            return self.fsm.process_event(event)
+
+    def process_events(self, events):
+        """
+        Process several events atomically.
+
+        Returns:
+            bool: True if the FSM is in a final state afterwards
+        """
+        with self.lock:
+            finished = False
+            for event in events:
+                finished = self.fsm.process_event(event)
+            return finished
+
+    def reset(self):
+        with self.lock:
+            self.fsm.reset()
+
+    def snapshot(self, history_limit=None):
+        with self.lock:
+            return self.fsm.snapshot(history_limit)
+
+    def restore(self, snapshot):
+        with self.lock:
+            self.fsm.restore(snapshot)
+
+    def fork(self, history_limit=0, run_actions=False):
+        """Fork the FSM (the fork is a plain, unlocked FSM)"""
+        with self.lock:
+            return self.fsm.fork(history_limit, run_actions)
+
+    def export_history(self):
+        with self.lock:
+            return self.fsm.export_history()
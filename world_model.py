@@ -0,0 +1,223 @@
+import math
+
+# Distances in metres, angles in radians, speeds in m/s. Each condition has an
+# enter threshold and a looser release threshold (hysteresis), so noise around
+# a threshold does not make events flicker.
+NEAR_DISTANCE = 0.2
+NEAR_RELEASE = 0.3
+ALIGN_TOLERANCE = math.radians(5)
+ALIGN_RELEASE = math.radians(10)
+KICK_SPEED = 1.5
+KICK_RELEASE = 0.5
+GRID_CELL = NEAR_RELEASE
+
+
+class WorldModel:
+    def __init__(self, near_distance=NEAR_DISTANCE, near_release=NEAR_RELEASE,
+                 align_tolerance=ALIGN_TOLERANCE, align_release=ALIGN_RELEASE,
+                 kick_speed=KICK_SPEED, kick_release=KICK_RELEASE, cell_size=GRID_CELL):
+        """
+        Derive FSM events from vision frames, incrementally.
+
+        Robots are kept in a uniform grid (spatial hash), so only the robots
+        in the cells around the ball are measured each frame, and a robot is
+        moved between cells only when its position changes. Alignment is
+        recomputed only for robots whose pose or target moved.
+
+        Events are emitted once, when their condition becomes true:
+            NEAR_BALL: the robot comes within near_distance of the ball
+            ALIGNED: the robot's heading points at its target (see set_target)
+            BALL_KICKED: the ball speeds up past kick_speed while the robot was near it
+            BALL_RECEIVED: a kicked ball reaches another robot (sent to the
+                kicker and to the receiver, the robot closest to the ball)
+
+        Events of one frame come in a fixed order, whatever the hash seed:
+        BALL_KICKED, NEAR_BALL, BALL_RECEIVED then ALIGNED, each sorted by robot id.
+
+        Args:
+            near_distance (float): Distance to the ball entering NEAR_BALL
+            near_release (float): Distance to the ball leaving it
+            align_tolerance (float): Heading error entering ALIGNED
+            align_release (float): Heading error leaving it
+            kick_speed (float): Ball speed detecting a kick
+            kick_release (float): Ball speed below which a new kick can be detected
+            cell_size (float): Grid cell size, at least near_release is sensible
+        """
+        if near_release < near_distance or align_release < align_tolerance or kick_release > kick_speed:
+            raise ValueError("Release thresholds must be looser than enter thresholds")
+        self.near_distance = near_distance
+        self.near_release = near_release
+        self.align_tolerance = align_tolerance
+        self.align_release = align_release
+        self.kick_speed = kick_speed
+        self.kick_release = kick_release
+        self.cell_size = cell_size
+
+        self.poses = {}
+        self.targets = {}
+        self.ball = None
+        self.ball_speed = 0.0
+        self.ball_fast = False
+        self.time = None
+        self.near = set()
+        self.aligned = set()
+        self.kickers = set()
+        self._ball_lost = False
+        self._grid = {}
+        self._cells = {}
+        self._dirty = set()
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def set_target(self, robot, target):
+        """
+        Set what a robot must face to be ALIGNED.
+
+        Args:
+            robot (str): Robot id
+            target (str or tuple): Id of another robot, or a fixed (x, y) point;
+                None removes the target
+        """
+        if target is None:
+            self.targets.pop(robot, None)
+            self.aligned.discard(robot)
+        else:
+            self.targets[robot] = target
+        self._dirty.add(robot)
+
+    def remove_robot(self, robot):
+        """Forget a robot that left the field"""
+        if robot in self.poses:
+            del self.poses[robot]
+            cell = self._cells.pop(robot)
+            self._grid[cell].discard(robot)
+        self.near.discard(robot)
+        self.aligned.discard(robot)
+        self.kickers.discard(robot)
+        self.targets.pop(robot, None)
+
+    def robots_near(self, x, y, radius):
+        """Robots within a radius of a point, found through the grid"""
+        reach = math.ceil(radius / self.cell_size)
+        cx, cy = self._cell(x, y)
+        found = []
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for robot in self._grid.get((i, j), ()):
+                    px, py, _ = self.poses[robot]
+                    if math.hypot(px - x, py - y) <= radius:
+                        found.append(robot)
+        return found
+
+    def _move_robots(self, robots):
+        moved = []
+        for robot, pose in robots.items():
+            if self.poses.get(robot) == pose:
+                continue
+            self.poses[robot] = pose
+            cell = self._cell(pose[0], pose[1])
+            previous = self._cells.get(robot)
+            if previous != cell:
+                if previous is not None:
+                    self._grid[previous].discard(robot)
+                self._grid.setdefault(cell, set()).add(robot)
+                self._cells[robot] = cell
+            moved.append(robot)
+        return moved
+
+    def _heading_error(self, robot):
+        target = self.targets[robot]
+        if isinstance(target, str):
+            if target not in self.poses:
+                return math.pi
+            tx, ty = self.poses[target][:2]
+        else:
+            tx, ty = target
+        x, y, heading = self.poses[robot]
+        bearing = math.atan2(ty - y, tx - x)
+        return abs((heading - bearing + math.pi) % (2 * math.pi) - math.pi)
+
+    def _ball_events(self, time, ball, moved):
+        """BALL_KICKED, NEAR_BALL and BALL_RECEIVED events of a frame showing the ball"""
+        events = []
+        # Every robot may have moved while the ball was not seen
+        ball_moved = ball != self.ball or self._ball_lost
+        self._ball_lost = False
+
+        # Kick detection uses the robots that were near the ball before this frame
+        if self.ball is not None and self.time is not None and time > self.time:
+            speed = self.ball_speed = math.hypot(ball[0] - self.ball[0], ball[1] - self.ball[1]) / (time - self.time)
+            if not self.ball_fast and speed >= self.kick_speed:
+                self.ball_fast = True
+                if self.near:
+                    self.kickers = set(self.near)
+                    events += [(robot, "BALL_KICKED") for robot in sorted(self.near)]
+            elif self.ball_fast and speed < self.kick_release:
+                self.ball_fast = False
+        self.ball = ball
+        self.time = time
+
+        # Near ball: only robots around the ball, plus those currently near (to release them)
+        if not (ball_moved or moved):
+            return events
+        candidates = set(self.robots_near(ball[0], ball[1], self.near_release)) | self.near
+        arrivals = {}
+        for robot in sorted(candidates):
+            x, y, _ = self.poses[robot]
+            distance = math.hypot(x - ball[0], y - ball[1])
+            if robot in self.near:
+                if distance > self.near_release:
+                    self.near.discard(robot)
+            elif distance < self.near_distance:
+                self.near.add(robot)
+                events.append((robot, "NEAR_BALL"))
+                arrivals[robot] = distance
+
+        receivers = [robot for robot in arrivals if robot not in self.kickers]
+        if self.kickers and receivers:
+            receiver = min(receivers, key=lambda robot: (arrivals[robot], robot))
+            events += [(kicker, "BALL_RECEIVED") for kicker in sorted(self.kickers)]
+            events.append((receiver, "BALL_RECEIVED"))
+            self.kickers = set()
+        return events
+
+    def update(self, time, ball, robots):
+        """
+        Ingest one vision frame.
+
+        Args:
+            time (float): Frame timestamp in seconds
+            ball (tuple): Ball position (x, y), None if the ball was not seen
+                (ball events then wait for the next frame showing it)
+            robots (dict): Pose (x, y, heading) of the robots seen in the frame,
+                by robot id; robots absent from the frame keep their last pose
+
+        Returns:
+            list: (robot_id, event) pairs, ready for Fleet.dispatch or AsyncRuntime.post_many
+        """
+        events = []
+        moved = self._move_robots(robots)
+        if ball is None:
+            self._ball_lost = True
+        else:
+            events += self._ball_events(time, ball, moved)
+
+        # Alignment: robots whose pose moved, whose target moved, or whose target changed
+        dirty = self._dirty
+        self._dirty = set()
+        if moved:
+            moved_set = set(moved)
+            dirty |= moved_set
+            dirty |= {robot for robot, target in self.targets.items() if target in moved_set}
+        for robot in sorted(dirty):
+            if robot not in self.targets or robot not in self.poses:
+                continue
+            error = self._heading_error(robot)
+            if robot in self.aligned:
+                if error > self.align_release:
+                    self.aligned.discard(robot)
+            elif error < self.align_tolerance:
+                self.aligned.add(robot)
+                events.append((robot, "ALIGNED"))
+        return events